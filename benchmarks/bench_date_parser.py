@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Time clip date parsing with dateparser against the fixed-format fast path.
+
+Parses the `span.date` text of Naver TV clip pages (YYYY.MM.DD.) with
+dateparser.parse (the previous implementation) and with
+NaverTvSpider._parse_date_text, which only falls back to dateparser for
+formats it does not recognize.
+
+    $ python -m benchmarks.bench_date_parser --num-dates 2000
+"""
+
+import argparse
+import datetime
+import timeit
+
+import dateparser
+
+from kbo.constants import KST_TZINFO, NAVER_TV_CLIP_TYPE_FULL_GAME
+from kbo.spiders.naver_tv import NaverTvSpider
+
+
+def get_date_texts(num_dates):
+    first_date = datetime.date(2020, 5, 5)
+
+    return [
+        (first_date + datetime.timedelta(days=day_number % 180)).strftime('%Y.%m.%d.')
+        for day_number in range(num_dates)
+    ]
+
+
+def parse_date_text_with_dateparser(date_text):
+    return dateparser.parse(date_text).replace(tzinfo=KST_TZINFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-dates', type=int, default=2000)
+    args = parser.parse_args()
+
+    date_texts = get_date_texts(args.num_dates)
+    spider = NaverTvSpider(
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        do_dry_run=True
+    )
+
+    # warm up dateparser's lazily loaded language data before timing
+    parse_date_text_with_dateparser(date_texts[0])
+
+    dateparser_results = [parse_date_text_with_dateparser(date_text) for date_text in date_texts]
+    fast_path_results = [spider._parse_date_text(date_text) for date_text in date_texts]
+
+    if dateparser_results != fast_path_results:
+        raise SystemExit('Fast path results differ from dateparser results')
+
+    dateparser_time = timeit.timeit(
+        lambda: [parse_date_text_with_dateparser(date_text) for date_text in date_texts],
+        number=1
+    )
+    fast_path_time = timeit.timeit(
+        lambda: [spider._parse_date_text(date_text) for date_text in date_texts],
+        number=1
+    )
+
+    print("{num_dates:,} clip dates".format(num_dates=len(date_texts)))
+    print("dateparser: {per_call:10.2f}us per call".format(per_call=dateparser_time / len(date_texts) * 1e6))
+    print("fast path:  {per_call:10.2f}us per call".format(per_call=fast_path_time / len(date_texts) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Time away team lookups against a synthetic multi-season full game feed.
+
+Compares a linear scan of the loaded CSV (the previous implementation)
+against NaverTvSpider's index keyed by (home_team_name, year, month, day).
+
+    $ python -m benchmarks.bench_full_game_feed --num-seasons 10
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import os
+import tempfile
+import timeit
+
+from kbo.constants import (
+    KBO_LEAGUE_TEAM_NAMES_LONG,
+    KBO_LEAGUE_TEAM_NAME_UNKNOWN,
+    KST_TZINFO,
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_GAME
+)
+from kbo.spiders.naver_tv import NaverTvSpider
+
+FULL_GAME_FEED_FIELDS = [
+    'away_team_name',
+    'channel_path',
+    'clip_id',
+    'clip_type',
+    'day',
+    'home_team_name',
+    'length',
+    'month',
+    'url',
+    'year'
+]
+
+
+def write_full_game_feed(file_path, num_seasons, first_year=2011):
+    team_names = list(KBO_LEAGUE_TEAM_NAMES_LONG)
+    pairings = list(itertools.permutations(team_names, 2))
+    clip_ids = itertools.count(10000000)
+    lookups = []
+
+    with open(file_path, 'w', newline='') as f:
+        csv_writer = csv.DictWriter(f, FULL_GAME_FEED_FIELDS)
+        csv_writer.writeheader()
+
+        for year in range(first_year, first_year + num_seasons):
+            game_date = datetime.date(year, 3, 24)
+
+            for day_number in range(144):
+                for game_number in range(len(team_names) // 2):
+                    away_team_name, home_team_name = pairings[(day_number * 5 + game_number) % len(pairings)]
+                    clip_id = next(clip_ids)
+
+                    csv_writer.writerow({
+                        'away_team_name': away_team_name,
+                        'channel_path': '/kbaseball',
+                        'clip_id': clip_id,
+                        'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME,
+                        'day': game_date.day,
+                        'home_team_name': home_team_name,
+                        'length': 12000,
+                        'month': game_date.month,
+                        'url': "https://tv.naver.com/v/{clip_id}".format(clip_id=clip_id),
+                        'year': game_date.year
+                    })
+                    lookups.append((
+                        home_team_name,
+                        datetime.datetime(game_date.year, game_date.month, game_date.day, tzinfo=KST_TZINFO)
+                    ))
+
+                game_date = game_date + datetime.timedelta(days=1)
+
+    return lookups
+
+
+def get_away_team_name_linear(full_game_feed, home_team_name, clip_date_parsed):
+    for row in full_game_feed:
+        is_match = (
+            row['home_team_name'] == home_team_name and
+            int(row['year']) == clip_date_parsed.year and
+            int(row['month']) == clip_date_parsed.month and
+            int(row['day']) == clip_date_parsed.day
+        )
+
+        if is_match:
+            return row['away_team_name']
+
+    return KBO_LEAGUE_TEAM_NAME_UNKNOWN
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-seasons', type=int, default=10)
+    parser.add_argument('--num-lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
+        file_path = os.path.join(tmp_dir_path, 'full_game_feed.csv')
+        lookups = write_full_game_feed(file_path, args.num_seasons)
+        lookups = lookups[::max(1, len(lookups) // args.num_lookups)][:args.num_lookups]
+
+        with open(file_path) as f:
+            full_game_feed = list(csv.DictReader(f))
+
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+            full_game_feed_path=file_path,
+            do_dry_run=True
+        )
+        index_build_time = timeit.timeit(spider._get_full_game_feed, number=1)
+
+        linear_time = timeit.timeit(
+            lambda: [get_away_team_name_linear(full_game_feed, *lookup) for lookup in lookups],
+            number=1
+        )
+        indexed_time = timeit.timeit(
+            lambda: [spider._get_away_team_name_from_full_game_feed(*lookup) for lookup in lookups],
+            number=1
+        )
+
+    print("{num_rows:,} feed rows, {num_lookups} lookups".format(
+        num_rows=len(full_game_feed),
+        num_lookups=len(lookups)
+    ))
+    print("index build: {seconds:.4f}s (once per crawl)".format(seconds=index_build_time))
+    print("linear scan: {per_lookup:10.2f}us per lookup".format(per_lookup=linear_time / len(lookups) * 1e6))
+    print("indexed:     {per_lookup:10.2f}us per lookup".format(per_lookup=indexed_time / len(lookups) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""Time parsing of a saved Naver TV search results page.
+
+Compares the previous chained CSS selectors per field and double title
+regex matching against NaverTvSpider's precompiled single pass extractor
+and combined title classifier, on tests/kbo/spiders/fixtures/naver_tv_search_clip.html.
+
+    $ python -m benchmarks.bench_search_results --num-pages 200
+"""
+
+import argparse
+import os
+import re
+import timeit
+
+import scrapy
+
+from kbo.constants import NAVER_TV_CLIP_TYPE_FULL_GAME
+from kbo.spiders.naver_tv import NaverTvSpider
+
+SEARCH_CLIP_FIXTURE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'tests',
+    'kbo',
+    'spiders',
+    'fixtures',
+    'naver_tv_search_clip.html'
+)
+
+FULL_GAME_TITLE_REGEX = re.compile(
+    r"^(?P<away_team_name>[^\-\s]+)-(?P<home_team_name>[^\-\s]+) 풀영상$"
+)
+CONDENSED_GAME_TITLE_REGEX = re.compile(
+    r"^\[?전체HL\]? -?(?P<description>.+)$"
+)
+
+
+def get_search_clip_response():
+    with open(SEARCH_CLIP_FIXTURE_PATH, 'rb') as f:
+        body = f.read()
+
+    return scrapy.http.HtmlResponse(
+        url='https://tv.naver.com/search/clip?page=1',
+        body=body,
+        encoding='utf-8'
+    )
+
+
+def parse_search_results_chained(search_clip_response):
+    search_results = (
+        search_clip_response.css('div#clip_list')
+                            .css('div.thl')
+                            .css('div.thl_a')
+    )
+    parsed_search_results = []
+
+    for search_result in search_results:
+        title = search_result.css('div.inner').css('dl').css('dt').css('a::attr(title)').get()
+
+        if FULL_GAME_TITLE_REGEX.fullmatch(title):
+            title_parsed = FULL_GAME_TITLE_REGEX.match(title)
+        elif CONDENSED_GAME_TITLE_REGEX.fullmatch(title):
+            title_parsed = CONDENSED_GAME_TITLE_REGEX.match(title)
+        else:
+            title_parsed = None
+
+        parsed_search_results.append((
+            search_result.css('a.cds_thm').css('span.tm_b::text').get(),
+            title,
+            search_result.css('div.inner').css('dl').css('dt').css('a::attr(href)').get(),
+            search_result.css('div.inner').css('dl').css('dd').css('span.ch_txt').css('a::attr(href)').get(),
+            title_parsed
+        ))
+
+    return parsed_search_results
+
+
+def parse_search_results_single_pass(spider, search_clip_response):
+    return [
+        spider._parse_search_result(search_result)
+        for search_result in spider._get_search_results(search_clip_response)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-pages', type=int, default=200)
+    args = parser.parse_args()
+
+    spider = NaverTvSpider(
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        do_dry_run=True
+    )
+    # a fresh response per parse, so parsel's cached document is not reused
+    responses = [get_search_clip_response() for _ in range(args.num_pages)]
+    num_search_results = len(spider._get_search_results(responses[0]))
+
+    chained_time = timeit.timeit(
+        lambda: [parse_search_results_chained(response) for response in responses],
+        number=1
+    )
+    responses = [get_search_clip_response() for _ in range(args.num_pages)]
+    single_pass_time = timeit.timeit(
+        lambda: [parse_search_results_single_pass(spider, response) for response in responses],
+        number=1
+    )
+
+    print("{num_pages} pages of {num_search_results} search results".format(
+        num_pages=args.num_pages,
+        num_search_results=num_search_results
+    ))
+    print("chained selectors: {per_page:10.2f}us per page".format(per_page=chained_time / args.num_pages * 1e6))
+    print("single pass:       {per_page:10.2f}us per page".format(per_page=single_pass_time / args.num_pages * 1e6))
+
+
+if __name__ == '__main__':
+    main()
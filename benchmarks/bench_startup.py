@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Time the cold start of a naver_tv crawl: imports plus spider construction.
+
+Each run is a fresh interpreter that imports the project's pipelines and
+spider and constructs a dry run NaverTvSpider, which is what every
+`scrapy crawl naver_tv` pays before its first request. The same is timed
+with youtube_dl, ffmpeg, mutagen and dateparser imported eagerly (the
+previous behavior) for comparison. Exits non-zero when the median cold
+start exceeds --budget seconds.
+
+    $ python -m benchmarks.bench_startup --num-runs 10 --budget 1.5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+STARTUP_SCRIPT = '''
+import time
+
+started_at = time.perf_counter()
+
+{eager_imports}
+import kbo.pipelines
+from kbo.spiders.naver_tv import NaverTvSpider
+
+NaverTvSpider(clip_type='full_game', do_dry_run='true')
+
+print(time.perf_counter() - started_at)
+'''
+
+EAGER_IMPORTS = '''
+import dateparser
+import ffmpeg
+import mutagen.mp4
+import youtube_dl
+'''
+
+
+def time_startup(eager_imports, num_runs):
+    script = STARTUP_SCRIPT.format(eager_imports=eager_imports)
+
+    return [
+        float(subprocess.check_output([sys.executable, '-c', script]))
+        for _ in range(num_runs)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=None)
+    args = parser.parse_args()
+
+    lazy_times = time_startup('', args.num_runs)
+    eager_times = time_startup(EAGER_IMPORTS, args.num_runs)
+
+    print("{num_runs} runs each (median / max)".format(num_runs=args.num_runs))
+    print("eager imports: {median:.3f}s / {max:.3f}s".format(
+        median=statistics.median(eager_times),
+        max=max(eager_times)
+    ))
+    print("lazy imports:  {median:.3f}s / {max:.3f}s".format(
+        median=statistics.median(lazy_times),
+        max=max(lazy_times)
+    ))
+
+    if args.budget is not None and statistics.median(lazy_times) > args.budget:
+        sys.exit("Cold start of {median:.3f}s exceeds the {budget:.3f}s budget".format(
+            median=statistics.median(lazy_times),
+            budget=args.budget
+        ))
+
+
+if __name__ == '__main__':
+    main()
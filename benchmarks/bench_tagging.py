@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""Report the bytes written to a clip file per tag operation.
+
+Compares mutagen's plain MP4.save() against ClipTagPipeline on a synthetic
+clip with the moov atom in front of a large mdat atom, which is the layout
+that forces mutagen to shift the media data.
+
+    $ python -m benchmarks.bench_tagging --mdat-size-mb 256
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import tempfile
+import time
+
+from mutagen.mp4 import MP4
+
+from kbo.constants import (
+    GAME_CLIP_SHOW_NAME,
+    MUTAGEN_TAG_ARTIST_KEY,
+    MUTAGEN_TAG_DATE_RELEASED_KEY,
+    MUTAGEN_TAG_TITLE_KEY,
+    MUTAGEN_TAG_TV_SHOW_KEY,
+    NAVER_TV_CLIP_TYPE_FULL_GAME
+)
+from kbo.items import NaverTvClip
+from kbo.pipelines import (
+    ClipTagPipeline,
+    _get_clip_date_released,
+    _get_clip_file_path,
+    _get_clip_title
+)
+
+
+class _Spider:
+
+    def __init__(self, tmp_dir_path):
+        self.tmp_dir_path = tmp_dir_path
+        self.do_dry_run = False
+
+
+def create_mp4_file(file_path, mdat_size):
+    def atom(atom_type, data):
+        return struct.pack('>I4s', 8 + len(data), atom_type) + data
+
+    with open(file_path, 'wb') as f:
+        f.write(atom(b'ftyp', b'isom' + bytes(4) + b'isommp41'))
+        f.write(atom(b'moov', atom(b'mvhd', bytes(12) + struct.pack('>II', 1000, 10000) + bytes(80))))
+        f.write(struct.pack('>I4s', 8 + mdat_size, b'mdat'))
+
+        chunk = os.urandom(1024 * 1024)
+
+        for _ in range(mdat_size // len(chunk)):
+            f.write(chunk)
+
+        f.write(chunk[:mdat_size % len(chunk)])
+
+
+def get_bytes_written(before_file_path, after_file_path, chunk_size=1024 * 1024):
+    num_bytes = abs(os.path.getsize(after_file_path) - os.path.getsize(before_file_path))
+
+    with open(before_file_path, 'rb') as before_file, open(after_file_path, 'rb') as after_file:
+        while True:
+            before_chunk = before_file.read(chunk_size)
+            after_chunk = after_file.read(chunk_size)
+
+            if not before_chunk or not after_chunk:
+                break
+
+            if before_chunk != after_chunk:
+                num_bytes = num_bytes + sum(
+                    1 for before_byte, after_byte in zip(before_chunk, after_chunk)
+                    if before_byte != after_byte
+                )
+
+    return num_bytes
+
+
+def tag_with_mutagen(item, spider):
+    clip_file = MP4(_get_clip_file_path(item, spider.tmp_dir_path))
+
+    if clip_file.tags is None:
+        clip_file.add_tags()
+
+    clip_file.tags[MUTAGEN_TAG_ARTIST_KEY] = GAME_CLIP_SHOW_NAME
+    clip_file.tags[MUTAGEN_TAG_TV_SHOW_KEY] = GAME_CLIP_SHOW_NAME
+    clip_file.tags[MUTAGEN_TAG_TITLE_KEY] = _get_clip_title(item)
+    clip_file.tags[MUTAGEN_TAG_DATE_RELEASED_KEY] = _get_clip_date_released(item)
+    clip_file.save()
+
+
+def tag_with_pipeline(item, spider):
+    ClipTagPipeline()._tag_clip(item, spider)
+
+
+def run(tag_function, mdat_size, num_operations):
+    item = NaverTvClip(
+        clip_id=13820293,
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        home_team_name='SK Wyverns',
+        away_team_name='NC Dinos',
+        year=2020,
+        month=5,
+        day=16
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
+        spider = _Spider(tmp_dir_path)
+        file_path = _get_clip_file_path(item, tmp_dir_path)
+        before_file_path = file_path + '.before'
+        create_mp4_file(file_path, mdat_size)
+        results = []
+
+        for operation_number in range(num_operations):
+            if operation_number > 0:
+                item['away_team_name'] = "Team {number}".format(number=operation_number)
+                os.replace(file_path, _get_clip_file_path(item, tmp_dir_path))
+                file_path = _get_clip_file_path(item, tmp_dir_path)
+
+            shutil.copyfile(file_path, before_file_path)
+
+            start_time = time.perf_counter()
+            tag_function(item, spider)
+            elapsed_time = time.perf_counter() - start_time
+
+            results.append((
+                get_bytes_written(before_file_path, file_path),
+                elapsed_time
+            ))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mdat-size-mb', type=int, default=256)
+    parser.add_argument('--num-operations', type=int, default=3)
+    args = parser.parse_args()
+
+    mdat_size = args.mdat_size_mb * 1024 * 1024
+
+    print("{name:<20} {operation:>9} {bytes_written:>15} {seconds:>9}".format(
+        name='method',
+        operation='operation',
+        bytes_written='bytes written',
+        seconds='seconds'
+    ))
+
+    for name, tag_function in [('mutagen save()', tag_with_mutagen), ('ClipTagPipeline', tag_with_pipeline)]:
+        results = run(tag_function, mdat_size, args.num_operations)
+
+        for operation_number, (bytes_written, elapsed_time) in enumerate(results, start=1):
+            print("{name:<20} {operation:>9} {bytes_written:>15,} {seconds:>9.3f}".format(
+                name=name,
+                operation=operation_number,
+                bytes_written=bytes_written,
+                seconds=elapsed_time
+            ))
+
+
+if __name__ == '__main__':
+    main()
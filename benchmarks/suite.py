@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""Run the spider parser and pipeline helper micro-benchmarks on recorded fixtures.
+
+Each benchmark parses the recorded Naver TV pages in tests/kbo/spiders/fixtures
+or works on synthetic full game feeds of increasing size, and reports
+operations per second plus the peak memory allocated (via tracemalloc) by a
+single operation. Results can be saved as JSON and compared with a run from
+another commit:
+
+    $ python -m benchmarks.suite --save /tmp/before.json
+    $ git checkout my-branch
+    $ python -m benchmarks.suite --compare /tmp/before.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import tempfile
+import timeit
+import tracemalloc
+
+import scrapy
+
+from benchmarks.bench_full_game_feed import write_full_game_feed
+from kbo.constants import (
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_GAME
+)
+from kbo.items import NaverTvClip
+from kbo.pipelines import (
+    ClipValidationPipeline,
+    _get_clip_date_released,
+    _get_clip_file_path,
+    _get_clip_title
+)
+from kbo.spiders.naver_tv import NaverTvSpider
+
+FIXTURES_DIR_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'tests',
+    'kbo',
+    'spiders',
+    'fixtures'
+)
+
+FULL_GAME_FEED_NUM_SEASONS = [1, 5, 10]
+
+
+def read_fixture(file_name):
+    with open(os.path.join(FIXTURES_DIR_PATH, file_name), 'rb') as f:
+        return f.read()
+
+
+def get_items(num_items):
+    first_date = datetime.date(2020, 5, 5)
+    items = []
+
+    for item_number in range(num_items):
+        clip_date = first_date + datetime.timedelta(days=item_number % 180)
+
+        items.append(NaverTvClip(
+            clip_id=13820293 + item_number,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=clip_date.year,
+            month=clip_date.month,
+            day=clip_date.day
+        ))
+
+    return items
+
+
+def cycle(values):
+    values = itertools.cycle(values)
+
+    return lambda: next(values)
+
+
+def get_spider_benchmarks():
+    search_clip_body = read_fixture('naver_tv_search_clip.html')
+    clip_body = read_fixture('naver_tv_clip.html')
+    spider = NaverTvSpider(
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        start_date='2020-05-16',
+        end_date='2020-05-16',
+        max_num_pages=1,
+        do_dry_run=True
+    )
+    next_clip_length_text = cycle(['4:23:33', '9:51', '0:41', '3:12:55', '24:10'])
+
+    def parse_search_clip_response():
+        response = scrapy.http.HtmlResponse(
+            url='https://tv.naver.com/search/clip?page=1',
+            body=search_clip_body,
+            encoding='utf-8'
+        )
+
+        return list(spider._parse_search_clip_response(response))
+
+    def parse_clip_response():
+        response = scrapy.http.HtmlResponse(
+            url='https://tv.naver.com/v/13820293',
+            body=clip_body,
+            encoding='utf-8'
+        )
+        parsed_clip = NaverTvClip(
+            clip_id='13820293',
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos'
+        )
+
+        return list(spider._parse_clip_response(response, parsed_clip))
+
+    return [
+        ('spider/parse_search_clip_response', parse_search_clip_response),
+        ('spider/parse_clip_response', parse_clip_response),
+        ('spider/get_clip_length_parsed', lambda: spider._get_clip_length_parsed(next_clip_length_text()))
+    ]
+
+
+def get_full_game_feed_benchmarks(tmp_dir_path):
+    benchmarks = []
+
+    for num_seasons in FULL_GAME_FEED_NUM_SEASONS:
+        file_path = os.path.join(
+            tmp_dir_path,
+            "full_game_feed_{num_seasons}.csv".format(num_seasons=num_seasons)
+        )
+        lookups = write_full_game_feed(file_path, num_seasons)
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+            full_game_feed_path=file_path,
+            do_dry_run=True
+        )
+        spider._get_full_game_feed()
+        next_lookup = cycle(lookups)
+
+        benchmarks.append((
+            "spider/get_away_team_name_from_full_game_feed[{num_rows} rows]".format(num_rows=len(lookups)),
+            lambda spider=spider, next_lookup=next_lookup: spider._get_away_team_name_from_full_game_feed(*next_lookup())
+        ))
+
+    return benchmarks
+
+
+def get_pipeline_benchmarks():
+    spider = NaverTvSpider(
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        start_date='2020-05-01',
+        end_date='2020-12-31',
+        do_dry_run=True
+    )
+    pipeline = ClipValidationPipeline()
+    # more distinct items than the file name cache holds, so misses are measured too
+    next_item = cycle(get_items(4096))
+
+    return [
+        ('pipelines/get_clip_file_path', lambda: _get_clip_file_path(next_item(), '/tmp')),
+        ('pipelines/get_clip_title', lambda: _get_clip_title(next_item())),
+        ('pipelines/get_clip_date_released', lambda: _get_clip_date_released(next_item())),
+        ('pipelines/validate_clip', lambda: pipeline.process_item(next_item(), spider))
+    ]
+
+
+def measure_ops_per_second(benchmark, min_time):
+    timer = timeit.Timer(benchmark)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+
+    return number / min(timer.repeat(repeat=3, number=number))
+
+
+def measure_peak_allocated_bytes(benchmark, num_samples=20):
+    peaks = []
+
+    for _ in range(num_samples):
+        # restarting resets the peak, since tracemalloc.reset_peak() needs Python 3.9
+        tracemalloc.start()
+
+        try:
+            benchmark()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        peaks.append(peak)
+
+    return sorted(peaks)[len(peaks) // 2]
+
+
+def run_benchmarks(benchmarks, name_filter, min_time):
+    results = {}
+
+    for name, benchmark in benchmarks:
+        if name_filter and name_filter not in name:
+            continue
+
+        benchmark()
+
+        results[name] = {
+            'ops_per_second': measure_ops_per_second(benchmark, min_time),
+            'peak_allocated_bytes': measure_peak_allocated_bytes(benchmark)
+        }
+
+    return results
+
+
+def print_results(results, previous_results):
+    name_width = max(len(name) for name in results)
+
+    print("{name:<{name_width}} {ops:>14} {allocated:>14}{change}".format(
+        name='benchmark',
+        name_width=name_width,
+        ops='ops/s',
+        allocated='peak KiB/op',
+        change='   ops/s change' if previous_results else ''
+    ))
+
+    for name, result in results.items():
+        change = ''
+
+        if previous_results and name in previous_results:
+            change = "   {change:+13.1f}%".format(
+                change=(result['ops_per_second'] / previous_results[name]['ops_per_second'] - 1) * 100
+            )
+
+        print("{name:<{name_width}} {ops:>14,.0f} {allocated:>14.1f}{change}".format(
+            name=name,
+            name_width=name_width,
+            ops=result['ops_per_second'],
+            allocated=result['peak_allocated_bytes'] / 1024,
+            change=change
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filter', default=None, help='only run benchmarks whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing repeat')
+    parser.add_argument('--save', default=None, help='write the results as JSON to this path')
+    parser.add_argument('--compare', default=None, help='compare against results saved with --save')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir_path:
+        benchmarks = (
+            get_spider_benchmarks() +
+            get_full_game_feed_benchmarks(tmp_dir_path) +
+            get_pipeline_benchmarks()
+        )
+        results = run_benchmarks(benchmarks, args.filter, args.min_time)
+
+    previous_results = None
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous_results = json.load(f)
+
+    print_results(results, previous_results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
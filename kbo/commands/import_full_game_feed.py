@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+
+from kbo.stores import FullGameStore
+
+
+class Command(ScrapyCommand):
+
+    requires_project = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self):
+        return '<full_game_feed_path> <full_game_store_path>'
+
+    def short_desc(self):
+        return 'Import the CSV feed of a full_game crawl into a full game store'
+
+    def run(self, args, opts):
+        if len(args) != 2:
+            raise UsageError()
+
+        full_game_feed_path, full_game_store_path = args
+
+        if os.path.exists(full_game_feed_path) is False:
+            raise UsageError(
+                "Invalid full_game_feed_path given (does not exist): {full_game_feed_path}".format(
+                    full_game_feed_path=full_game_feed_path
+                )
+            )
+
+        full_game_store = FullGameStore(full_game_store_path)
+
+        try:
+            num_imported = full_game_store.import_csv(full_game_feed_path)
+        finally:
+            full_game_store.close()
+
+        print("Imported {num_imported} full games into {full_game_store_path}".format(
+            num_imported=num_imported,
+            full_game_store_path=full_game_store_path
+        ))
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from scrapy.commands.crawl import Command as CrawlCommand
+
+
+class Command(CrawlCommand):
+
+    def short_desc(self):
+        return 'Run a spider that keeps polling for new clips until it is stopped'
+
+    def process_options(self, args, opts):
+        super(Command, self).process_options(args, opts)
+
+        opts.spargs['do_watch'] = 'true'
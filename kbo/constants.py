@@ -4,6 +4,8 @@ import datetime
 import re
 import urllib.parse
 
+from lxml import etree
+
 KST_TZINFO = datetime.timezone(
     offset=datetime.timedelta(hours=9),
     name='Asia/Seoul'
@@ -46,12 +48,51 @@ NAVER_TV_CHANNEL_PATHS = NAVER_TV_CHANNEL_PATH_TO_KBO_LEAGUE_TEAM_NAME_LONG.keys
 NAVER_TV_CLIP_TYPE_FULL_GAME = 'full_game'
 NAVER_TV_CLIP_TYPE_CONDENSED_GAME = 'condensed_game'
 NAVER_TV_CLIP_TYPE_UNKNOWN = 'unknown'
+NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME = 'full_and_condensed_game'
+
+NAVER_TV_TARGET_CLIP_TYPES = {
+    NAVER_TV_CLIP_TYPE_FULL_GAME: [NAVER_TV_CLIP_TYPE_FULL_GAME],
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME: [NAVER_TV_CLIP_TYPE_CONDENSED_GAME],
+    NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME: [
+        NAVER_TV_CLIP_TYPE_FULL_GAME,
+        NAVER_TV_CLIP_TYPE_CONDENSED_GAME
+    ]
+}
+
+DEFAULT_MIN_CLIP_LENGTHS = {
+    NAVER_TV_CLIP_TYPE_FULL_GAME: 3600
+}
+DEFAULT_MAX_CLIP_LENGTHS = {
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME: 3600
+}
+
+NAVER_TV_CLIP_TITLE_REGEX = re.compile(
+    r"^(?:"
+    r"(?P<away_team_name>[^\-\s]+)-(?P<home_team_name>[^\-\s]+) 풀영상"
+    r"|"
+    r"\[?전체HL\]? -?(?P<description>.+)"
+    r")$"
+)
+
+NAVER_TV_CLIP_DATE_REGEX = re.compile(
+    r"^\s*(?P<year>\d{4})(?P<separator>[.\-/])\s*(?P<month>\d{1,2})(?P=separator)\s*(?P<day>\d{1,2})\.?\s*$"
+)
 
-NAVER_TV_CLIP_FULL_GAME_TITLE_REGEX = re.compile(
-    r"^(?P<away_team_name>[^\-\s]+)-(?P<home_team_name>[^\-\s]+) 풀영상$"
+NAVER_TV_SEARCH_RESULTS_XPATH = etree.XPath(
+    "//div[@id='clip_list']"
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' thl ')]"
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' thl_a ')]"
 )
-NAVER_TV_CLIP_CONDENSED_GAME_TITLE_REGEX = re.compile(
-    r"^\[?전체HL\]? -?(?P<description>.+)$"
+NAVER_TV_SEARCH_RESULT_CLIP_LENGTH_XPATH = etree.XPath(
+    ".//a[contains(concat(' ', normalize-space(@class), ' '), ' cds_thm ')]"
+    "//span[contains(concat(' ', normalize-space(@class), ' '), ' tm_b ')]/text()"
+)
+NAVER_TV_SEARCH_RESULT_CLIP_LINK_XPATH = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' inner ')]//dl//dt//a"
+)
+NAVER_TV_SEARCH_RESULT_CHANNEL_URL_XPATH = etree.XPath(
+    ".//div[contains(concat(' ', normalize-space(@class), ' '), ' inner ')]//dl//dd"
+    "//span[contains(concat(' ', normalize-space(@class), ' '), ' ch_txt ')]//a/@href"
 )
 
 NAVER_TV_SCHEME = 'https'
@@ -92,6 +133,70 @@ NAVER_TV_SPIDER_CONDENSED_GAME_URL = urllib.parse.urlunparse((
     '',
 ))
 
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+DEFAULT_DOWNLOAD_NUM_CONNECTIONS = 8
+
+DOWNLOAD_ENGINE_YOUTUBE_DL = 'youtube_dl'
+DOWNLOAD_ENGINE_SEGMENTED = 'segmented'
+DOWNLOAD_ENGINES = [DOWNLOAD_ENGINE_YOUTUBE_DL, DOWNLOAD_ENGINE_SEGMENTED]
+
+DOWNLOAD_SEGMENT_SIZE = 16 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_PART_FILE_SUFFIX = '.kbo.part'
+DOWNLOAD_PART_FILE_SUFFIXES = ['.part', '.part.ts', '.ytdl']
+DOWNLOAD_TIMEOUT = 60
+
+DEFAULT_DOWNLOAD_RETRY_TIMES = 3
+DOWNLOAD_RETRY_BACKOFF = 10
+DOWNLOAD_RETRY_BACKOFF_MAX = 60 * 60
+
+DEFAULT_DOWNLOAD_BACKFILL_AGE = 2
+DOWNLOAD_SCHEDULER_WAKEUP_INTERVAL = 60
+
+DEFAULT_THUMBNAIL_CONCURRENCY = 2
+DEFAULT_THUMBNAIL_BATCH_SIZE = 4
+THUMBNAIL_TIMEOUT = 5 * 60
+FFMPEG_EXECUTABLE = 'ffmpeg'
+
+DEFAULT_HTTPCACHE_SEARCH_TTL = 60 * 60
+DEFAULT_HTTPCACHE_CLIP_TTL = 0
+
+METRICS_STATS_PREFIX = 'kbo/pipeline/'
+METRICS_STAGE_OUTCOME_OK = 'ok'
+METRICS_STAGE_OUTCOME_DROPPED = 'dropped'
+METRICS_STAGE_OUTCOME_ERROR = 'error'
+METRICS_STAGE_OUTCOMES = [
+    METRICS_STAGE_OUTCOME_OK,
+    METRICS_STAGE_OUTCOME_DROPPED,
+    METRICS_STAGE_OUTCOME_ERROR
+]
+METRICS_TEXTFILE_TMP_SUFFIX = '.kbo.tmp'
+
+DEFAULT_WATCH_PEAK_INTERVAL = 30
+DEFAULT_WATCH_INTERVAL = 5 * 60
+DEFAULT_WATCH_OFF_PEAK_INTERVAL = 30 * 60
+# hours (in KST) from the end of weekend day games until well after the end of night games
+WATCH_PEAK_HOURS = (17, 2)
+WATCH_OFF_PEAK_HOURS = (3, 12)
+DEFAULT_WATCH_RETRY_TIMES = 6
+WATCH_RETRY_BACKOFF = 5 * 60
+WATCH_RETRY_BACKOFF_MAX = 6 * 60 * 60
+# drop reasons that may go away by a later poll, e.g. once the full game of a condensed game is stored
+WATCH_RETRY_DROP_REASONS = (
+    'Away team name unknown',
+    'Clip download backing off',
+    'Could not download clip',
+    'Could not create thumbnail'
+)
+
+DEFAULT_PROFILE_TOP_N = 20
+PROFILE_FILENAME_TEMPLATE = "{spider_name}-{clip_type}-{started_at}-{pid}.prof"
+PROFILE_SUMMARY_FILENAME_TEMPLATE = "{spider_name}-{clip_type}-{started_at}-{pid}.txt"
+
+TRANSFER_LEDGER_FILENAME = '.kbo_transfer_ledger.json'
+TRANSFER_LEDGER_MAX_AGE = 7 * 24 * 60 * 60
+ORPHANED_PART_FILE_MIN_AGE = 15 * 60
+
 GAME_CLIP_SHOW_NAME = 'KBO League'
 GAME_CLIP_THUMBNAIL_TIMESTAMP = '00:00:03'
 GAME_CLIP_DATE_RELEASED_TEMPLATE = "{year}-{month:02d}-{day:02d}"
@@ -104,6 +209,13 @@ CONDENSED_GAME_CLIP_TITLE_TEMPLATE = "{away_team_name} at {home_team_name} (cond
 CONDENSED_GAME_CLIP_FILENAME_TEMPLATE = "KBO League - S{year}E{clip_id} - {year}.{month:02d}.{day:02d} - {away_team_name} at {home_team_name} (condensed).mp4"
 CONDENSED_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE = "KBO League - S{year}E{clip_id} - {year}.{month:02d}.{day:02d} - {away_team_name} at {home_team_name} (condensed).jpg"
 
+MP4_TAG_PADDING = 4096
+
+MOVE_TMP_FILE_TEMPLATE = ".{file_name}.kbo.tmp"
+MOVE_COPY_BUFFER_SIZE = 16 * 1024 * 1024
+
+FICLONE = 0x40049409
+
 MUTAGEN_TAG_ARTIST_KEY = '\xa9ART'
 MUTAGEN_TAG_TV_SHOW_KEY = 'tvsh'
 MUTAGEN_TAG_TITLE_KEY = '\xa9nam'
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+_directory_indexes = {}
+_directory_indexes_lock = threading.Lock()
+
+
+class DirectoryIndex:
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self._lock = threading.Lock()
+        self._file_names = self._scan_file_names()
+
+    def exists(self, file_path):
+        with self._lock:
+            return os.path.basename(file_path) in self._file_names
+
+    def add(self, file_path):
+        with self._lock:
+            self._file_names.add(os.path.basename(file_path))
+
+    def discard(self, file_path):
+        with self._lock:
+            self._file_names.discard(os.path.basename(file_path))
+
+    def _scan_file_names(self):
+        dir_entries = os.scandir(self.dir_path)
+
+        # scandir() is only a context manager from Python 3.6
+        try:
+            return set(dir_entry.name for dir_entry in dir_entries)
+        finally:
+            dir_entries.close()
+
+
+def get_directory_index(dir_path):
+    with _directory_indexes_lock:
+        if dir_path not in _directory_indexes:
+            _directory_indexes[dir_path] = DirectoryIndex(dir_path)
+
+        return _directory_indexes[dir_path]
+
+
+def clear_directory_indexes():
+    with _directory_indexes_lock:
+        _directory_indexes.clear()
+
+
+def file_exists(file_path):
+    return get_directory_index(os.path.dirname(file_path)).exists(file_path)
+
+
+def add_file(file_path):
+    get_directory_index(os.path.dirname(file_path)).add(file_path)
+
+
+def discard_file(file_path):
+    get_directory_index(os.path.dirname(file_path)).discard(file_path)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+import time
+import urllib.parse
+
+from scrapy import signals
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import FilesystemCacheStorage
+from scrapy.settings import Settings
+from w3lib.url import canonicalize_url
+
+from kbo.constants import (
+    DEFAULT_HTTPCACHE_CLIP_TTL,
+    DEFAULT_HTTPCACHE_SEARCH_TTL,
+    NAVER_TV_SCHEME,
+    NAVER_TV_SEARCH_CLIP_PATH
+)
+
+
+class NaverTvHttpCacheMiddleware(HttpCacheMiddleware):
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+
+        if settings.getbool('KBO_HTTPCACHE_REPLAY', False):
+            settings = Settings(settings.copy_to_dict())
+            settings.set('HTTPCACHE_ENABLED', True)
+            settings.set('HTTPCACHE_IGNORE_MISSING', True)
+
+        middleware = cls(settings, crawler.stats)
+        middleware.crawler = crawler
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+
+        return middleware
+
+
+class NaverTvCacheStorage(FilesystemCacheStorage):
+
+    def __init__(self, settings):
+        super(NaverTvCacheStorage, self).__init__(settings)
+
+        self.search_ttl = settings.getint(
+            'KBO_HTTPCACHE_SEARCH_TTL',
+            DEFAULT_HTTPCACHE_SEARCH_TTL
+        )
+        self.clip_ttl = settings.getint(
+            'KBO_HTTPCACHE_CLIP_TTL',
+            DEFAULT_HTTPCACHE_CLIP_TTL
+        )
+        self.replay = settings.getbool('KBO_HTTPCACHE_REPLAY', False)
+
+    def _get_request_path(self, spider, request):
+        key = hashlib.sha1(
+            get_normalized_url(request.url).encode('utf-8')
+        ).hexdigest()
+
+        return os.path.join(self.cachedir, spider.name, key[0:2], key)
+
+    def _read_meta(self, spider, request):
+        metadata = super(NaverTvCacheStorage, self)._read_meta(spider, request)
+
+        if metadata is None or self.replay is True:
+            return metadata
+
+        ttl = self._get_ttl(request.url)
+
+        if 0 < ttl < time.time() - metadata['timestamp']:
+            return None
+
+        return metadata
+
+    def _get_ttl(self, url):
+        url_parsed = urllib.parse.urlparse(url)
+
+        if url_parsed.path == NAVER_TV_SEARCH_CLIP_PATH:
+            return self.search_ttl
+
+        if url_parsed.path.startswith('/v/'):
+            return self.clip_ttl
+
+        return 0
+
+
+def get_normalized_url(url):
+    url_parsed = urllib.parse.urlparse(url)
+
+    if url_parsed.path.startswith('/v/'):
+        return urllib.parse.urlunparse((
+            NAVER_TV_SCHEME,
+            url_parsed.netloc,
+            url_parsed.path,
+            '',
+            '',
+            '',
+        ))
+
+    return canonicalize_url(url)
@@ -14,3 +14,4 @@ class NaverTvClip(scrapy.Item):
     year = scrapy.Field()
     month = scrapy.Field()
     day = scrapy.Field()
+    stage_timings = scrapy.Field()
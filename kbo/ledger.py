@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from kbo.scheduler import get_retry_backoff
+
+
+class TransferLedger:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def get(self, clip_id):
+        with self._locked_records():
+            record = self._records.get(str(clip_id))
+
+            if record is None:
+                return None
+
+            return dict(record, segments_done=list(record.get('segments_done', [])))
+
+    def get_retry_at(self, clip_id):
+        record = self.get(clip_id)
+
+        if record is None or record.get('attempts', 0) == 0:
+            return None
+
+        return record.get('last_attempt_at') + get_retry_backoff(record.get('attempts'))
+
+    def start_transfer(self,
+                       clip_id,
+                       source_url,
+                       file_path,
+                       content_length=None,
+                       can_resume=True):
+        with self._locked_records():
+            record = self._get_or_create_record(clip_id)
+
+            is_same_transfer = (
+                can_resume is True and
+                record.get('file_path') == file_path and
+                record.get('content_length') == content_length
+            )
+
+            if is_same_transfer is False:
+                record['bytes_done'] = 0
+                record['segments_done'] = []
+
+            record['source_url'] = source_url
+            record['file_path'] = file_path
+            record['content_length'] = content_length
+            record['last_attempt_at'] = time.time()
+            self._save_records()
+
+            return list(record['segments_done'])
+
+    def add_progress(self, clip_id, num_bytes, segment_offset=None):
+        with self._locked_records():
+            record = self._get_or_create_record(clip_id)
+            record['bytes_done'] = record.get('bytes_done', 0) + num_bytes
+
+            if segment_offset is not None:
+                record['segments_done'].append(segment_offset)
+
+            self._save_records()
+
+    def set_bytes_done(self, clip_id, bytes_done):
+        with self._locked_records():
+            record = self._get_or_create_record(clip_id)
+            record['bytes_done'] = bytes_done
+            self._save_records()
+
+    def record_failure(self, clip_id, error):
+        with self._locked_records():
+            record = self._get_or_create_record(clip_id)
+            record['attempts'] = record.get('attempts', 0) + 1
+            record['last_error'] = str(error)
+            record['last_attempt_at'] = time.time()
+            self._save_records()
+
+            return record['attempts']
+
+    def remove_stale(self, max_age):
+        with self._locked_records():
+            min_last_attempt_at = time.time() - max_age
+            stale_clip_ids = [
+                clip_id
+                for clip_id, record in self._records.items()
+                if (record.get('last_attempt_at') or 0) < min_last_attempt_at
+            ]
+
+            for clip_id in stale_clip_ids:
+                del self._records[clip_id]
+
+            if stale_clip_ids:
+                self._save_records()
+
+    def get_file_paths(self):
+        with self._locked_records():
+            return [
+                record.get('file_path')
+                for record in self._records.values()
+                if record.get('file_path') is not None
+            ]
+
+    def remove(self, clip_id):
+        with self._locked_records():
+            if self._records.pop(str(clip_id), None) is not None:
+                self._save_records()
+
+    @contextlib.contextmanager
+    def _locked_records(self):
+        # crawls overlap, so every change is merged into the records another crawl may have saved since
+        with self._lock, open(self.file_path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+            try:
+                self._records = self._load_records()
+
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _get_or_create_record(self, clip_id):
+        return self._records.setdefault(str(clip_id), {
+            'source_url': None,
+            'file_path': None,
+            'content_length': None,
+            'bytes_done': 0,
+            'segments_done': [],
+            'attempts': 0,
+            'last_error': None,
+            'last_attempt_at': None
+        })
+
+    def _load_records(self):
+        if os.path.exists(self.file_path) is False:
+            return {}
+
+        try:
+            with open(self.file_path) as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def _save_records(self):
+        tmp_file_path = self.file_path + '.tmp'
+
+        with open(tmp_file_path, 'w') as f:
+            json.dump(self._records, f)
+
+        os.replace(tmp_file_path, self.file_path)
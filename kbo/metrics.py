@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import DropItem, NotConfigured
+from twisted.internet import defer
+
+from kbo import signals as kbo_signals
+from kbo.constants import (
+    METRICS_STAGE_OUTCOME_DROPPED,
+    METRICS_STAGE_OUTCOME_ERROR,
+    METRICS_STAGE_OUTCOME_OK,
+    METRICS_STAGE_OUTCOMES,
+    METRICS_STATS_PREFIX,
+    METRICS_TEXTFILE_TMP_SUFFIX
+)
+
+
+def instrument_stage(process_item):
+    @functools.wraps(process_item)
+    def wrapper(self, item, spider):
+        stats = _get_stats(spider)
+
+        if stats is None:
+            return process_item(self, item, spider)
+
+        stage_name = self.stage_name
+        started_at = time.monotonic()
+        in_flight_key = _get_stage_key(stage_name, 'in_flight')
+
+        stats.inc_value(in_flight_key)
+        stats.max_value(
+            _get_stage_key(stage_name, 'max_in_flight'),
+            stats.get_value(in_flight_key)
+        )
+
+        def record(outcome):
+            stats.inc_value(in_flight_key, -1)
+            _record_stage_outcome(spider, stats, stage_name, item, outcome, time.monotonic() - started_at)
+
+        try:
+            result = process_item(self, item, spider)
+        except DropItem:
+            record(METRICS_STAGE_OUTCOME_DROPPED)
+            raise
+        except Exception:
+            record(METRICS_STAGE_OUTCOME_ERROR)
+            raise
+
+        if isinstance(result, defer.Deferred):
+            def on_success(result):
+                record(METRICS_STAGE_OUTCOME_OK)
+
+                return result
+
+            def on_failure(failure):
+                if failure.check(DropItem):
+                    record(METRICS_STAGE_OUTCOME_DROPPED)
+                else:
+                    record(METRICS_STAGE_OUTCOME_ERROR)
+
+                return failure
+
+            result.addCallbacks(on_success, on_failure)
+        else:
+            record(METRICS_STAGE_OUTCOME_OK)
+
+        return result
+
+    return wrapper
+
+
+def record_stage_processed_bytes(spider, stage_name, file_paths):
+    stats = _get_stats(spider)
+
+    if stats is None:
+        return
+
+    num_bytes = sum(
+        os.path.getsize(file_path)
+        for file_path in file_paths
+        if os.path.exists(file_path)
+    )
+
+    stats.inc_value(_get_stage_key(stage_name, 'processed_bytes'), num_bytes)
+
+
+def get_stage_metrics(stats):
+    stage_metrics = {}
+
+    for key, value in stats.items():
+        if not key.startswith(METRICS_STATS_PREFIX):
+            continue
+
+        stage_name, _, metric_name = key[len(METRICS_STATS_PREFIX):].partition('/')
+        stage_metrics.setdefault(stage_name, {})[metric_name] = value
+
+    return stage_metrics
+
+
+def get_prometheus_textfile(stats, labels):
+    lines = []
+    stage_metrics = get_stage_metrics(stats)
+
+    def add_metric(name, help_text, samples):
+        lines.append("# HELP {name} {help_text}".format(name=name, help_text=help_text))
+        lines.append("# TYPE {name} gauge".format(name=name))
+
+        for sample_labels, value in samples:
+            lines.append("{name}{{{labels}}} {value}".format(
+                name=name,
+                labels=_format_prometheus_labels(dict(labels, **sample_labels)),
+                value=_format_prometheus_value(value)
+            ))
+
+    add_metric(
+        'kbo_pipeline_stage_items',
+        'Items that left the pipeline stage during the last crawl, by outcome.',
+        [
+            ({'stage': stage_name, 'outcome': outcome}, metrics.get("items/{outcome}".format(outcome=outcome), 0))
+            for stage_name, metrics in sorted(stage_metrics.items())
+            for outcome in METRICS_STAGE_OUTCOMES
+        ]
+    )
+    add_metric(
+        'kbo_pipeline_stage_seconds',
+        'Wall time spent in the pipeline stage during the last crawl, including time queued for a worker.',
+        [
+            ({'stage': stage_name}, metrics.get('seconds', 0))
+            for stage_name, metrics in sorted(stage_metrics.items())
+        ]
+    )
+    add_metric(
+        'kbo_pipeline_stage_max_seconds',
+        'Longest wall time of a single item in the pipeline stage during the last crawl.',
+        [
+            ({'stage': stage_name}, metrics.get('max_seconds', 0))
+            for stage_name, metrics in sorted(stage_metrics.items())
+        ]
+    )
+    add_metric(
+        'kbo_pipeline_stage_processed_bytes',
+        'Size of the files the pipeline stage processed during the last crawl, not the bytes it wrote to disk.',
+        [
+            ({'stage': stage_name}, metrics.get('processed_bytes', 0))
+            for stage_name, metrics in sorted(stage_metrics.items())
+        ]
+    )
+    add_metric(
+        'kbo_pipeline_stage_max_in_flight',
+        'Most items in the pipeline stage at once during the last crawl.',
+        [
+            ({'stage': stage_name}, metrics.get('max_in_flight', 0))
+            for stage_name, metrics in sorted(stage_metrics.items())
+        ]
+    )
+    add_metric(
+        'kbo_crawl_last_finished_timestamp_seconds',
+        'Unix time the last crawl finished.',
+        [({}, time.time())]
+    )
+    lines.append('# EOF')
+
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusTextfileExporter:
+
+    def __init__(self, stats, textfile_path):
+        self.stats = stats
+        self.textfile_path = textfile_path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        textfile_path = crawler.settings.get('KBO_METRICS_TEXTFILE_PATH')
+
+        if not textfile_path:
+            raise NotConfigured
+
+        exporter = cls(crawler.stats, textfile_path)
+        crawler.signals.connect(exporter.watch_polled, signal=kbo_signals.watch_polled)
+        crawler.signals.connect(exporter.spider_closed, signal=signals.spider_closed)
+
+        return exporter
+
+    def watch_polled(self, spider):
+        # a watching spider may run for weeks, so the textfile is kept current after every poll
+        self._write_textfile(spider)
+
+    def spider_closed(self, spider, reason):
+        self._write_textfile(spider)
+
+    def _write_textfile(self, spider):
+        textfile = get_prometheus_textfile(
+            self.stats.get_stats(),
+            {
+                'spider': spider.name,
+                'clip_type': spider.clip_type
+            }
+        )
+        tmp_file_path = self.textfile_path + METRICS_TEXTFILE_TMP_SUFFIX
+
+        # node_exporter may read the textfile at any time, so it is replaced atomically
+        with open(tmp_file_path, 'w') as tmp_file:
+            tmp_file.write(textfile)
+
+        os.replace(tmp_file_path, self.textfile_path)
+
+
+def _record_stage_outcome(spider, stats, stage_name, item, outcome, elapsed):
+    stats.inc_value(_get_stage_key(stage_name, "items/{outcome}".format(outcome=outcome)))
+    stats.inc_value(_get_stage_key(stage_name, 'seconds'), elapsed, start=0.0)
+    stats.max_value(_get_stage_key(stage_name, 'max_seconds'), elapsed)
+
+    if spider.crawler.settings.getbool('KBO_METRICS_ITEM_TIMINGS', False):
+        stage_timings = dict(item.get('stage_timings') or {})
+        stage_timings[stage_name] = round(elapsed, 3)
+        item['stage_timings'] = stage_timings
+
+
+def _get_stats(spider):
+    crawler = getattr(spider, 'crawler', None)
+
+    if crawler is None:
+        return None
+
+    return crawler.stats
+
+
+def _get_stage_key(stage_name, metric_name):
+    return "{prefix}{stage_name}/{metric_name}".format(
+        prefix=METRICS_STATS_PREFIX,
+        stage_name=stage_name,
+        metric_name=metric_name
+    )
+
+
+def _format_prometheus_labels(labels):
+    return ','.join(
+        "{name}=\"{value}\"".format(
+            name=name,
+            value=str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in sorted(labels.items())
+    )
+
+
+def _format_prometheus_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+
+    return str(value)
@@ -1,170 +1,562 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import concurrent.futures
 import datetime
+import errno
+import functools
+import http.client
+import itertools
 import os
 import pathlib
 import shutil
+import struct
+import subprocess
+import time
+import urllib.parse
+import urllib.request
 
-import ffmpeg
-from mutagen.mp4 import MP4
-from scrapy.exceptions import DropItem
-import youtube_dl
+from scrapy.exceptions import DropItem, NotSupported
+from twisted.internet import defer, error, protocol, threads
+from twisted.python.threadpool import ThreadPool
 
 from kbo.constants import (
     CONDENSED_GAME_CLIP_FILENAME_TEMPLATE,
     CONDENSED_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE,
     CONDENSED_GAME_CLIP_TITLE_TEMPLATE,
+    DEFAULT_DOWNLOAD_BACKFILL_AGE,
+    DEFAULT_DOWNLOAD_CONCURRENCY,
+    DEFAULT_DOWNLOAD_NUM_CONNECTIONS,
+    DEFAULT_DOWNLOAD_RETRY_TIMES,
+    DEFAULT_THUMBNAIL_BATCH_SIZE,
+    DEFAULT_THUMBNAIL_CONCURRENCY,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_ENGINES,
+    DOWNLOAD_ENGINE_SEGMENTED,
+    DOWNLOAD_ENGINE_YOUTUBE_DL,
+    DOWNLOAD_PART_FILE_SUFFIX,
+    DOWNLOAD_PART_FILE_SUFFIXES,
+    DOWNLOAD_SEGMENT_SIZE,
+    DOWNLOAD_TIMEOUT,
+    FFMPEG_EXECUTABLE,
+    FICLONE,
     FULL_GAME_CLIP_FILENAME_TEMPLATE,
     FULL_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE,
     FULL_GAME_CLIP_TITLE_TEMPLATE,
     GAME_CLIP_DATE_RELEASED_TEMPLATE,
     GAME_CLIP_SHOW_NAME,
     GAME_CLIP_THUMBNAIL_TIMESTAMP,
-    KBO_LEAGUE_TEAM_NAME_UNKNOWN,
     KST_TZINFO,
+    MOVE_COPY_BUFFER_SIZE,
+    MOVE_TMP_FILE_TEMPLATE,
+    MP4_TAG_PADDING,
     MUTAGEN_TAG_ARTIST_KEY,
     MUTAGEN_TAG_DATE_RELEASED_KEY,
     MUTAGEN_TAG_TITLE_KEY,
     MUTAGEN_TAG_TV_SHOW_KEY,
-    NAVER_TV_CHANNEL_PATHS,
     NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
     NAVER_TV_CLIP_TYPE_FULL_GAME,
-    NAVER_TV_CLIP_TYPE_UNKNOWN
+    NAVER_TV_CLIP_TYPE_UNKNOWN,
+    NAVER_TV_TARGET_CLIP_TYPES,
+    ORPHANED_PART_FILE_MIN_AGE,
+    THUMBNAIL_TIMEOUT,
+    TRANSFER_LEDGER_FILENAME,
+    TRANSFER_LEDGER_MAX_AGE
+)
+from kbo.directory_index import (
+    add_file,
+    clear_directory_indexes,
+    discard_file,
+    file_exists,
+    get_directory_index
+)
+from kbo.ledger import TransferLedger
+from kbo.metrics import instrument_stage, record_stage_processed_bytes
+from kbo.profiling import profile_stage
+from kbo.scheduler import (
+    DownloadScheduler,
+    TransferLimiter,
+    get_download_priority,
+    get_retry_backoff,
+    parse_hours
+)
+from kbo.stores import FullGameStore
+from kbo.validation import (
+    validate_channel_path,
+    validate_clip_date,
+    validate_clip_length,
+    validate_clip_type,
+    validate_team_names
 )
 
 
 class ClipValidationPipeline:
 
+    stage_name = 'validation'
+
+    @instrument_stage
+    @profile_stage
     def process_item(self, item, spider):
-        self._validate_clip_type(item, spider)
-        self._validate_clip_length(item, spider)
-        self._validate_channel_path(item)
-        self._validate_clip_date(item, spider)
-        self._validate_team_names(item, spider)
+        validate_clip_type(item, spider)
+        validate_clip_length(item, spider)
+        validate_channel_path(item)
+        validate_clip_date(item, spider)
+        validate_team_names(item, spider)
 
         return item
 
-    def _validate_clip_type(self, item, spider):
-        if item.get('clip_type') != spider.clip_type:
-            raise DropItem(
-                "Clip type ({clip_type}) does not match {target_clip_type}".format(
-                    clip_type=item.get('clip_type'),
-                    target_clip_type=spider.clip_type
-                )
-            )
 
-    def _validate_clip_length(self, item, spider):
-        if spider.min_clip_length is not None:
-            if item.get('length') < spider.min_clip_length:
-                raise DropItem(
-                    "Clip length ({clip_length} seconds) shorter than {target_min_clip_length} seconds".format(
-                        clip_length=item.get('length'),
-                        target_min_clip_length=spider.min_clip_length
-                    )
-                )
+class ClipStorePipeline:
 
-        if spider.max_clip_length is not None:
-            if item.get('length') > spider.max_clip_length:
-                raise DropItem(
-                    "Clip length ({clip_length} seconds) longer than {target_max_clip_length} seconds".format(
-                        clip_length=item.get('length'),
-                        target_max_clip_length=spider.max_clip_length
-                    )
-                )
+    stage_name = 'store'
+    _full_game_store = None
 
-    def _validate_channel_path(self, item):
-        if item.get('channel_path') not in NAVER_TV_CHANNEL_PATHS:
-            raise DropItem(
-                "Clip channel ({clip_channel_path}) is not a KBO League team channel".format(
-                    clip_channel_path=item.get('channel_path')
-                )
-            )
+    def open_spider(self, spider):
+        if self._should_store_clips(spider):
+            self._full_game_store = FullGameStore(spider.full_game_store_path)
 
-    def _validate_clip_date(self, item, spider):
-        if None in [item.get('year'), item.get('month'), item.get('day')]:
-            raise DropItem('Clip date unknown')
+    def close_spider(self, spider):
+        if self._full_game_store is not None:
+            self._full_game_store.close()
+            self._full_game_store = None
 
-        item_datetime = datetime.datetime(
-            year=item.get('year'),
-            month=item.get('month'),
-            day=item.get('day'),
-            tzinfo=KST_TZINFO
-        )
+    @instrument_stage
+    @profile_stage
+    def process_item(self, item, spider):
+        if self._full_game_store is not None and item.get('clip_type') == NAVER_TV_CLIP_TYPE_FULL_GAME:
+            self._full_game_store.add(item)
 
-        date_range_match = (
-            item_datetime >= spider.start_date and
-            item_datetime <= spider.end_date
-        )
+        return item
 
-        if date_range_match is False:
-            raise DropItem(
-                "Clip date ({clip_date}) not within target date range ({target_start_date} - {target_end_date})".format(
-                    clip_date=item_datetime.strftime('%x'),
-                    target_start_date=spider.start_date.strftime('%x'),
-                    target_end_date=spider.end_date.strftime('%x')
-                )
-            )
+    def _should_store_clips(self, spider):
+        if spider.full_game_store_path is None:
+            return False
 
-    def _validate_team_names(self, item, spider):
-        if item.get('home_team_name') == KBO_LEAGUE_TEAM_NAME_UNKNOWN:
-            raise DropItem('Home team name unknown')
+        if NAVER_TV_CLIP_TYPE_FULL_GAME not in NAVER_TV_TARGET_CLIP_TYPES[spider.clip_type]:
+            return False
 
-        if item.get('away_team_name') == KBO_LEAGUE_TEAM_NAME_UNKNOWN:
-            raise DropItem('Away team name unknown')
+        return True
 
-        team_name_match = (
-            spider.team_name is None or
-            spider.team_name in [
-                item.get('home_team_name'),
-                item.get('away_team_name')
-            ]
-        )
 
-        if team_name_match is False:
-            raise DropItem(
-                "Target team name {team_name} does not match clip team names (home: {home_team_name}, away: {away_team_name})".format(
-                    team_name=spider.team_name,
-                    home_team_name=item.get('home_team_name'),
-                    away_team_name=item.get('away_team_name')
-                )
+class ClipDownloadPipeline:
+
+    stage_name = 'download'
+    _download_scheduler = None
+    _thread_pool = None
+    _transfer_ledger = None
+
+    def __init__(self,
+                 download_concurrency=DEFAULT_DOWNLOAD_CONCURRENCY,
+                 download_engine=DOWNLOAD_ENGINE_YOUTUBE_DL,
+                 download_num_connections=DEFAULT_DOWNLOAD_NUM_CONNECTIONS,
+                 download_retry_times=DEFAULT_DOWNLOAD_RETRY_TIMES,
+                 thumbnail_during_download=False,
+                 thumbnail_keyframe_seek=False,
+                 max_bandwidth=0,
+                 max_connections_per_host=0,
+                 backfill_hours=None,
+                 backfill_age=DEFAULT_DOWNLOAD_BACKFILL_AGE):
+        if download_engine not in DOWNLOAD_ENGINES:
+            raise NotSupported('Invalid KBO_DOWNLOAD_ENGINE given')
+
+        self.download_concurrency = download_concurrency
+        self.download_engine = download_engine
+        self.download_num_connections = download_num_connections
+        self.download_retry_times = download_retry_times
+        self.thumbnail_during_download = thumbnail_during_download
+        self.thumbnail_keyframe_seek = thumbnail_keyframe_seek
+        self.backfill_hours = parse_hours(backfill_hours)
+        self.backfill_age = backfill_age
+        self._transfer_limiter = TransferLimiter(max_bandwidth, max_connections_per_host)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            download_concurrency=crawler.settings.getint(
+                'KBO_DOWNLOAD_CONCURRENCY',
+                DEFAULT_DOWNLOAD_CONCURRENCY
+            ),
+            download_engine=crawler.settings.get(
+                'KBO_DOWNLOAD_ENGINE',
+                DOWNLOAD_ENGINE_YOUTUBE_DL
+            ),
+            download_num_connections=crawler.settings.getint(
+                'KBO_DOWNLOAD_NUM_CONNECTIONS',
+                DEFAULT_DOWNLOAD_NUM_CONNECTIONS
+            ),
+            download_retry_times=crawler.settings.getint(
+                'KBO_DOWNLOAD_RETRY_TIMES',
+                DEFAULT_DOWNLOAD_RETRY_TIMES
+            ),
+            thumbnail_during_download=crawler.settings.getbool(
+                'KBO_THUMBNAIL_DURING_DOWNLOAD',
+                False
+            ),
+            thumbnail_keyframe_seek=crawler.settings.getbool(
+                'KBO_THUMBNAIL_KEYFRAME_SEEK',
+                False
+            ),
+            max_bandwidth=crawler.settings.getint(
+                'KBO_DOWNLOAD_MAX_BANDWIDTH',
+                0
+            ),
+            max_connections_per_host=crawler.settings.getint(
+                'KBO_DOWNLOAD_MAX_CONNECTIONS_PER_HOST',
+                0
+            ),
+            backfill_hours=crawler.settings.get(
+                'KBO_DOWNLOAD_BACKFILL_HOURS'
+            ),
+            backfill_age=crawler.settings.getint(
+                'KBO_DOWNLOAD_BACKFILL_AGE',
+                DEFAULT_DOWNLOAD_BACKFILL_AGE
             )
+        )
 
+    def open_spider(self, spider):
+        if spider.do_dry_run is False:
+            self._remove_orphaned_part_files(spider)
+            _open_directory_indexes(spider)
 
-class ClipDownloadPipeline:
+    def close_spider(self, spider):
+        if self._download_scheduler is not None:
+            self._download_scheduler.stop()
+            self._download_scheduler = None
+
+        if self._thread_pool is not None:
+            self._thread_pool.stop()
+            self._thread_pool = None
 
+        self._transfer_ledger = None
+        clear_directory_indexes()
+
+    @instrument_stage
+    @profile_stage
     def process_item(self, item, spider):
         if self._should_download_clip(item, spider):
-            self._download_clip(item, spider)
+            self._check_download_backoff(item, spider)
+
+            deferred = self._get_download_scheduler().submit(
+                get_download_priority(item),
+                self._is_backfill_clip(item),
+                self._download_clip,
+                item,
+                spider
+            )
+            deferred.addCallback(lambda _: record_stage_processed_bytes(
+                spider,
+                self.stage_name,
+                [_get_clip_file_path(item, spider.tmp_dir_path)]
+            ))
+            deferred.addCallback(lambda _: item)
+
+            return deferred
 
         return item
 
+    def _get_reactor(self):
+        from twisted.internet import reactor
+
+        return reactor
+
+    def _get_thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPool(
+                minthreads=0,
+                maxthreads=self.download_concurrency,
+                name=self.__class__.__name__
+            )
+            self._thread_pool.start()
+
+        return self._thread_pool
+
+    def _get_download_scheduler(self):
+        if self._download_scheduler is None:
+            self._download_scheduler = DownloadScheduler(
+                self._get_reactor(),
+                self._get_thread_pool(),
+                self.download_concurrency,
+                backfill_hours=self.backfill_hours
+            )
+
+        return self._download_scheduler
+
+    def _is_backfill_clip(self, item):
+        today = datetime.datetime.now(KST_TZINFO).date()
+        game_date = datetime.date(item.get('year'), item.get('month'), item.get('day'))
+
+        return (today - game_date).days > self.backfill_age
+
+    def _get_transfer_ledger(self, spider):
+        if self._transfer_ledger is None:
+            self._transfer_ledger = TransferLedger(
+                os.path.join(spider.tmp_dir_path, TRANSFER_LEDGER_FILENAME)
+            )
+
+        return self._transfer_ledger
+
+    def _remove_orphaned_part_files(self, spider):
+        transfer_ledger = self._get_transfer_ledger(spider)
+        transfer_ledger.remove_stale(TRANSFER_LEDGER_MAX_AGE)
+        ledger_file_paths = transfer_ledger.get_file_paths()
+        min_modified_at = time.time() - ORPHANED_PART_FILE_MIN_AGE
+
+        for dir_entry in os.scandir(spider.tmp_dir_path):
+            if not dir_entry.name.endswith(tuple(DOWNLOAD_PART_FILE_SUFFIXES)):
+                continue
+
+            # a recently written file may belong to a download of another crawl that is still running
+            if dir_entry.stat().st_mtime > min_modified_at:
+                continue
+
+            is_orphaned = not any(
+                dir_entry.path.startswith(file_path + '.')
+                for file_path in ledger_file_paths
+            )
+
+            if is_orphaned:
+                spider.logger.info(
+                    "Removing orphaned partial download {path}".format(
+                        path=dir_entry.path
+                    )
+                )
+                os.remove(dir_entry.path)
+
     def _should_download_clip(self, item, spider):
         if spider.do_dry_run is True:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.tmp_dir_path)) is True:
+        if file_exists(_get_clip_file_path(item, spider.tmp_dir_path)) is True:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.output_dir_path)) is True:
+        if file_exists(_get_clip_file_path(item, spider.output_dir_path)) is True:
             return False
 
         return True
 
+    def _check_download_backoff(self, item, spider):
+        transfer_ledger = self._get_transfer_ledger(spider)
+        retry_at = transfer_ledger.get_retry_at(item.get('clip_id'))
+
+        if retry_at is not None and time.time() < retry_at:
+            record = transfer_ledger.get(item.get('clip_id'))
+
+            raise DropItem(
+                "Clip download backing off until {retry_at} after {attempts} failed attempts: {last_error}".format(
+                    retry_at=datetime.datetime.fromtimestamp(retry_at, KST_TZINFO).strftime('%c'),
+                    attempts=record.get('attempts'),
+                    last_error=record.get('last_error')
+                )
+            )
+
     def _download_clip(self, item, spider):
+        import ffmpeg
+        import youtube_dl
+
+        transfer_ledger = self._get_transfer_ledger(spider)
+        num_attempts = 0
+
+        while True:
+            num_attempts = num_attempts + 1
+
+            try:
+                self._download_clip_attempt(item, spider)
+            except (youtube_dl.utils.DownloadError, OSError, ValueError, http.client.HTTPException, ffmpeg.Error) as e:
+                transfer_ledger.record_failure(item.get('clip_id'), e)
+
+                if num_attempts > self.download_retry_times:
+                    raise DropItem(
+                        "Could not download clip: {error}".format(error=e)
+                    )
+
+                backoff = get_retry_backoff(num_attempts)
+                spider.logger.warning(
+                    "Download of clip {clip_id} failed, retrying in {backoff} seconds: {error}".format(
+                        clip_id=item.get('clip_id'),
+                        backoff=backoff,
+                        error=e
+                    )
+                )
+                time.sleep(backoff)
+            else:
+                transfer_ledger.remove(item.get('clip_id'))
+                add_file(_get_clip_file_path(item, spider.tmp_dir_path))
+
+                return
+
+    def _download_clip_attempt(self, item, spider):
+        import youtube_dl
+
         ydl_options = {
             'logger': spider.logger,
             'outtmpl': _get_clip_file_path(
                 item,
                 spider.tmp_dir_path
-            )
+            ),
+            'continuedl': True,
+            'progress_hooks': [
+                self._get_youtube_dl_progress_hook(item, spider)
+            ]
         }
 
         with youtube_dl.YoutubeDL(ydl_options) as ydl:
-            ydl.download([item.get('url')])
+            clip_info = None
+            thumbnail_process = None
+
+            if self._should_extract_clip_info():
+                clip_info = ydl.extract_info(item.get('url'), download=False)
+
+            if self._should_create_thumbnail_during_download(item, spider):
+                thumbnail_process = self._start_thumbnail_during_download(item, spider, clip_info)
+
+            try:
+                if self.download_engine == DOWNLOAD_ENGINE_SEGMENTED:
+                    self._download_clip_segmented(item, spider, ydl, clip_info)
+                else:
+                    self._download_clip_youtube_dl(item, spider, ydl, clip_info)
+            finally:
+                if thumbnail_process is not None:
+                    self._finish_thumbnail_during_download(item, spider, thumbnail_process)
+
+    def _download_clip_youtube_dl(self, item, spider, ydl, clip_info=None):
+        self._get_transfer_ledger(spider).start_transfer(
+            item.get('clip_id'),
+            item.get('url'),
+            _get_clip_file_path(item, spider.tmp_dir_path)
+        )
+
+        with self._transfer_limiter.connection(*_get_clip_info_media_urls(clip_info or {'url': item.get('url')})):
+            if clip_info is None:
+                ydl.download([item.get('url')])
+            else:
+                ydl.process_info(clip_info)
+
+    def _should_extract_clip_info(self):
+        if self.download_engine == DOWNLOAD_ENGINE_SEGMENTED or self.thumbnail_during_download is True:
+            return True
+
+        # connections are limited per media host, which is only known once the clip info is extracted
+        if self._transfer_limiter.max_connections_per_host > 0:
+            return True
+
+        return False
+
+    def _download_clip_segmented(self, item, spider, ydl, clip_info):
+        try:
+            _download_clip_info_segmented(
+                clip_info,
+                _get_clip_file_path(item, spider.tmp_dir_path),
+                self.download_num_connections,
+                self._transfer_limiter,
+                self._get_transfer_ledger(spider),
+                item.get('clip_id')
+            )
+        except NotSupported as e:
+            spider.logger.warning(
+                "Segmented download of clip {clip_id} not supported, falling back to youtube_dl: {error}".format(
+                    clip_id=item.get('clip_id'),
+                    error=e
+                )
+            )
+            self._download_clip_youtube_dl(item, spider, ydl, clip_info)
+
+    def _should_create_thumbnail_during_download(self, item, spider):
+        if self.thumbnail_during_download is False:
+            return False
+
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)) is True:
+            return False
+
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.output_dir_path)) is True:
+            return False
+
+        return True
+
+    def _start_thumbnail_during_download(self, item, spider, clip_info):
+        try:
+            media_url, http_headers = _get_clip_info_video_url(clip_info)
+            ffmpeg_args = _get_thumbnail_ffmpeg_args(
+                [(media_url, _get_clip_thumbnail_file_path(item, spider.tmp_dir_path))],
+                self.thumbnail_keyframe_seek,
+                http_headers
+            )
+
+            return subprocess.Popen(
+                [FFMPEG_EXECUTABLE] + ffmpeg_args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
+            )
+        except (NotSupported, OSError) as e:
+            spider.logger.warning(
+                "Could not start thumbnail of clip {clip_id} during download: {error}".format(
+                    clip_id=item.get('clip_id'),
+                    error=e
+                )
+            )
+
+            return None
+
+    def _finish_thumbnail_during_download(self, item, spider, thumbnail_process):
+        try:
+            _, stderr = thumbnail_process.communicate(timeout=DOWNLOAD_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            thumbnail_process.kill()
+            _, stderr = thumbnail_process.communicate()
+
+        thumbnail_file_path = _get_clip_thumbnail_file_path(item, spider.tmp_dir_path)
+
+        if thumbnail_process.returncode == 0:
+            add_file(thumbnail_file_path)
+        else:
+            if os.path.exists(thumbnail_file_path) is True:
+                os.remove(thumbnail_file_path)
+
+            spider.logger.warning(
+                "Could not create thumbnail of clip {clip_id} during download: {ffmpeg_error}".format(
+                    clip_id=item.get('clip_id'),
+                    ffmpeg_error=stderr.decode()
+                )
+            )
+
+    def _get_youtube_dl_progress_hook(self, item, spider):
+        transfer_ledger = self._get_transfer_ledger(spider)
+        last_bytes_done = [0]
+        last_throttled_bytes_done = [None]
+
+        def progress_hook(progress):
+            bytes_done = progress.get('downloaded_bytes') or 0
+
+            # the first report of a resumed download includes the bytes of its partial file
+            if last_throttled_bytes_done[0] is not None and bytes_done > last_throttled_bytes_done[0]:
+                self._transfer_limiter.throttle(bytes_done - last_throttled_bytes_done[0])
+
+            last_throttled_bytes_done[0] = bytes_done
+
+            should_record = (
+                progress.get('status') != 'downloading' or
+                bytes_done - last_bytes_done[0] >= DOWNLOAD_SEGMENT_SIZE
+            )
+
+            if should_record:
+                transfer_ledger.set_bytes_done(item.get('clip_id'), bytes_done)
+                last_bytes_done[0] = bytes_done
+
+        return progress_hook
 
 
 class ClipTagPipeline:
 
+    stage_name = 'tag'
+
+    def open_spider(self, spider):
+        if spider.do_dry_run is False:
+            _open_directory_indexes(spider)
+
+    def close_spider(self, spider):
+        clear_directory_indexes()
+
+    @instrument_stage
+    @profile_stage
     def process_item(self, item, spider):
         if self._should_tag_clip(item, spider):
             self._tag_clip(item, spider)
@@ -175,25 +567,105 @@ class ClipTagPipeline:
         if spider.do_dry_run is True:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
+        if file_exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
             return False
 
         return True
 
     def _tag_clip(self, item, spider):
-        clip_file = MP4(_get_clip_file_path(item, spider.tmp_dir_path))
-        clip_file.tags[MUTAGEN_TAG_ARTIST_KEY] = GAME_CLIP_SHOW_NAME
-        clip_file.tags[MUTAGEN_TAG_TV_SHOW_KEY] = GAME_CLIP_SHOW_NAME
-        clip_file.tags[MUTAGEN_TAG_TITLE_KEY] = _get_clip_title(item)
-        clip_file.tags[MUTAGEN_TAG_DATE_RELEASED_KEY] = _get_clip_date_released(item)
-        clip_file.save()
+        from mutagen.mp4 import MP4
+
+        clip_file_path = _get_clip_file_path(item, spider.tmp_dir_path)
+        clip_tags = {
+            MUTAGEN_TAG_ARTIST_KEY: GAME_CLIP_SHOW_NAME,
+            MUTAGEN_TAG_TV_SHOW_KEY: GAME_CLIP_SHOW_NAME,
+            MUTAGEN_TAG_TITLE_KEY: _get_clip_title(item),
+            MUTAGEN_TAG_DATE_RELEASED_KEY: _get_clip_date_released(item)
+        }
+
+        clip_file = MP4(clip_file_path)
+
+        if clip_file.tags is None:
+            clip_file.add_tags()
+
+        is_tagged = all(
+            clip_file.tags.get(key) == [value]
+            for key, value in clip_tags.items()
+        )
+
+        if is_tagged is True:
+            return
+
+        clip_file.tags.update(clip_tags)
+
+        try:
+            clip_file.save(padding=_require_mp4_tag_padding)
+        except _Mp4TagPaddingExhausted:
+            # only shift the media data out of the way when the tags do not fit in place
+            if _relocate_mp4_moov_atom_to_end(clip_file_path) is True:
+                clip_file = MP4(clip_file_path)
+
+                if clip_file.tags is None:
+                    clip_file.add_tags()
+
+                clip_file.tags.update(clip_tags)
+
+            clip_file.save(padding=_get_mp4_tag_padding)
+
+        record_stage_processed_bytes(spider, self.stage_name, [clip_file_path])
 
 
 class ClipThumbnailPipeline:
 
+    stage_name = 'thumbnail'
+
+    def __init__(self,
+                 thumbnail_concurrency=DEFAULT_THUMBNAIL_CONCURRENCY,
+                 thumbnail_batch_size=DEFAULT_THUMBNAIL_BATCH_SIZE,
+                 thumbnail_keyframe_seek=False):
+        self.thumbnail_concurrency = thumbnail_concurrency
+        self.thumbnail_batch_size = thumbnail_batch_size
+        self.thumbnail_keyframe_seek = thumbnail_keyframe_seek
+        self._pending_thumbnails = []
+        self._num_running_batches = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            thumbnail_concurrency=crawler.settings.getint(
+                'KBO_THUMBNAIL_CONCURRENCY',
+                DEFAULT_THUMBNAIL_CONCURRENCY
+            ),
+            thumbnail_batch_size=crawler.settings.getint(
+                'KBO_THUMBNAIL_BATCH_SIZE',
+                DEFAULT_THUMBNAIL_BATCH_SIZE
+            ),
+            thumbnail_keyframe_seek=crawler.settings.getbool(
+                'KBO_THUMBNAIL_KEYFRAME_SEEK',
+                False
+            )
+        )
+
+    def open_spider(self, spider):
+        if spider.do_dry_run is False:
+            _open_directory_indexes(spider)
+
+    def close_spider(self, spider):
+        clear_directory_indexes()
+
+    @instrument_stage
+    @profile_stage
     def process_item(self, item, spider):
         if self._should_create_thumbnail(item, spider):
-            self._create_thumbnail(item, spider)
+            deferred = self._create_thumbnail(item, spider)
+            deferred.addCallback(lambda _: record_stage_processed_bytes(
+                spider,
+                self.stage_name,
+                [_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)]
+            ))
+            deferred.addCallback(lambda _: item)
+
+            return deferred
 
         return item
 
@@ -201,47 +673,196 @@ class ClipThumbnailPipeline:
         if spider.do_dry_run is True:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
+        if file_exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
             return False
 
-        if os.path.exists(_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)) is True:
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)) is True:
             return False
 
-        if os.path.exists(_get_clip_thumbnail_file_path(item, spider.output_dir_path)) is True:
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.output_dir_path)) is True:
             return False
 
         return True
 
     def _create_thumbnail(self, item, spider):
-        input_path = _get_clip_file_path(item, spider.tmp_dir_path)
-        output_path = _get_clip_thumbnail_file_path(item, spider.tmp_dir_path)
+        deferred = defer.Deferred()
 
+        self._pending_thumbnails.append((
+            _get_clip_file_path(item, spider.tmp_dir_path),
+            _get_clip_thumbnail_file_path(item, spider.tmp_dir_path),
+            deferred
+        ))
+        self._run_pending_thumbnails()
+
+        return deferred
+
+    def _run_pending_thumbnails(self):
+        while self._pending_thumbnails and self._num_running_batches < self.thumbnail_concurrency:
+            batch = self._pending_thumbnails[:self.thumbnail_batch_size]
+            del self._pending_thumbnails[:self.thumbnail_batch_size]
+
+            self._num_running_batches = self._num_running_batches + 1
+
+            batch_deferred = self._run_thumbnail_batch(batch)
+            batch_deferred.addBoth(self._on_thumbnail_batch_done)
+
+    def _on_thumbnail_batch_done(self, result):
+        self._num_running_batches = self._num_running_batches - 1
+        self._run_pending_thumbnails()
+
+        return result
+
+    @defer.inlineCallbacks
+    def _run_thumbnail_batch(self, batch):
         try:
-            ffmpeg_chain = ffmpeg.input(
-                input_path,
-                ss=GAME_CLIP_THUMBNAIL_TIMESTAMP
-            )
-            ffmpeg_chain = ffmpeg_chain.filter('scale', 640, -1)
-            ffmpeg_chain = ffmpeg_chain.output(output_path, vframes=1)
-            ffmpeg_chain = ffmpeg_chain.run(capture_stdout=True, capture_stderr=True)
-        except ffmpeg.Error as e:
-            raise DropItem(
-                "Could not create thumbnail: {ffmpeg_error}".format(
-                    ffmpeg_error=e.stderr.decode()
+            try:
+                _, stderr, exit_code = yield self._run_ffmpeg(
+                    _get_thumbnail_ffmpeg_args(
+                        [(input_path, output_path) for input_path, output_path, _ in batch],
+                        self.thumbnail_keyframe_seek
+                    )
                 )
-            )
+            except Exception as e:
+                for _, _, deferred in batch:
+                    deferred.errback(DropItem(
+                        "Could not create thumbnail: {error}".format(error=e)
+                    ))
+
+                return
+
+            if exit_code == 0:
+                for _, output_path, deferred in batch:
+                    add_file(output_path)
+                    deferred.callback(None)
+            elif len(batch) == 1:
+                _, _, deferred = batch[0]
+                deferred.errback(DropItem(
+                    "Could not create thumbnail: {ffmpeg_error}".format(
+                        ffmpeg_error=_get_ffmpeg_error(stderr, exit_code)
+                    )
+                ))
+            else:
+                for thumbnail in batch:
+                    yield self._run_thumbnail_batch([thumbnail])
+        finally:
+            # an item whose Deferred never fires would keep the crawl from finishing
+            for _, _, deferred in batch:
+                if deferred.called is False:
+                    deferred.errback(DropItem('Could not create thumbnail: FFmpeg batch did not finish'))
+
+    def _get_reactor(self):
+        from twisted.internet import reactor
+
+        return reactor
+
+    def _run_ffmpeg(self, args):
+        deferred = defer.Deferred()
+        reactor = self._get_reactor()
+
+        reactor.spawnProcess(
+            _FfmpegProcessProtocol(deferred, reactor, THUMBNAIL_TIMEOUT),
+            FFMPEG_EXECUTABLE,
+            [FFMPEG_EXECUTABLE] + args,
+            env=os.environ
+        )
+
+        return deferred
+
+
+class _FfmpegProcessProtocol(protocol.ProcessProtocol):
+
+    def __init__(self, deferred, reactor, timeout):
+        self.deferred = deferred
+        self._stdout = []
+        self._stderr = []
+        self._timeout_call = reactor.callLater(timeout, self._kill)
+
+    def outReceived(self, data):
+        self._stdout.append(data)
+
+    def errReceived(self, data):
+        self._stderr.append(data)
+
+    def processEnded(self, reason):
+        if self._timeout_call.active():
+            self._timeout_call.cancel()
+
+        exit_code = reason.value.exitCode
+
+        # like subprocess, a process killed by a signal (e.g. by the OOM killer) gets a negative exit code
+        if exit_code is None:
+            exit_code = -reason.value.signal
+
+        self.deferred.callback((b''.join(self._stdout), b''.join(self._stderr), exit_code))
+
+    def _kill(self):
+        try:
+            self.transport.signalProcess('KILL')
+        except error.ProcessExitedAlready:
+            pass
 
 
 class ClipMovePipeline:
 
+    stage_name = 'move'
+
+    def open_spider(self, spider):
+        if spider.do_dry_run is False:
+            _open_directory_indexes(spider)
+
+    def close_spider(self, spider):
+        clear_directory_indexes()
+
+    @instrument_stage
+    @profile_stage
     def process_item(self, item, spider):
-        if self._should_move_clip_file(item, spider):
+        should_move_clip_file = self._should_move_clip_file(item, spider)
+        should_move_clip_thumbnail_file = self._should_move_clip_thumbnail_file(item, spider)
+
+        if should_move_clip_file is False and should_move_clip_thumbnail_file is False:
+            return item
+
+        deferred = threads.deferToThread(
+            self._move_clip_files,
+            item,
+            spider,
+            should_move_clip_file,
+            should_move_clip_thumbnail_file
+        )
+        deferred.addCallback(lambda _: record_stage_processed_bytes(
+            spider,
+            self.stage_name,
+            self._get_moved_file_paths(item, spider, should_move_clip_file, should_move_clip_thumbnail_file)
+        ))
+        deferred.addCallback(lambda _: item)
+
+        return deferred
+
+    def _move_clip_files(self,
+                         item,
+                         spider,
+                         should_move_clip_file,
+                         should_move_clip_thumbnail_file):
+        if should_move_clip_file:
             self._move_clip_file(item, spider)
 
-        if self._should_move_clip_thumbnail_file(item, spider):
+        if should_move_clip_thumbnail_file:
             self._move_clip_thumbnail_file(item, spider)
 
-        return item
+    def _get_moved_file_paths(self,
+                              item,
+                              spider,
+                              should_move_clip_file,
+                              should_move_clip_thumbnail_file):
+        moved_file_paths = []
+
+        if should_move_clip_file:
+            moved_file_paths.append(_get_clip_file_path(item, spider.output_dir_path))
+
+        if should_move_clip_thumbnail_file:
+            moved_file_paths.append(_get_clip_thumbnail_file_path(item, spider.output_dir_path))
+
+        return moved_file_paths
 
     def _should_move_clip_file(self, item, spider):
         if spider.do_dry_run is True:
@@ -250,16 +871,16 @@ class ClipMovePipeline:
         if spider.tmp_dir_path == spider.output_dir_path:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
+        if file_exists(_get_clip_file_path(item, spider.tmp_dir_path)) is False:
             return False
 
-        if os.path.exists(_get_clip_file_path(item, spider.output_dir_path)) is True:
+        if file_exists(_get_clip_file_path(item, spider.output_dir_path)) is True:
             return False
 
         return True
 
     def _move_clip_file(self, item, spider):
-        shutil.move(
+        _move_indexed_file(
             _get_clip_file_path(item, spider.tmp_dir_path),
             _get_clip_file_path(item, spider.output_dir_path)
         )
@@ -271,55 +892,196 @@ class ClipMovePipeline:
         if spider.tmp_dir_path == spider.output_dir_path:
             return False
 
-        if os.path.exists(_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)) is False:
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.tmp_dir_path)) is False:
             return False
 
-        if os.path.exists(_get_clip_thumbnail_file_path(item, spider.output_dir_path)) is True:
+        if file_exists(_get_clip_thumbnail_file_path(item, spider.output_dir_path)) is True:
             return False
 
         return True
 
     def _move_clip_thumbnail_file(self, item, spider):
-        shutil.move(
+        _move_indexed_file(
             _get_clip_thumbnail_file_path(item, spider.tmp_dir_path),
             _get_clip_thumbnail_file_path(item, spider.output_dir_path)
         )
 
 
-def _get_clip_file_path(item, dir_path):
-    if item.get('clip_type') == NAVER_TV_CLIP_TYPE_FULL_GAME:
-        file_path = _get_full_game_clip_file_path(item, dir_path)
-    elif item.get('clip_type') == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
-        file_path = _get_condensed_game_clip_file_path(item, dir_path)
+def _open_directory_indexes(spider):
+    get_directory_index(spider.tmp_dir_path)
+    get_directory_index(spider.output_dir_path)
 
-    return file_path
 
+def _move_indexed_file(source_path, destination_path):
+    _move_file(source_path, destination_path)
+    discard_file(source_path)
+    add_file(destination_path)
 
-def _get_full_game_clip_file_path(item, dir_path):
-    return os.path.join(
-        dir_path,
-        FULL_GAME_CLIP_FILENAME_TEMPLATE.format(
-            clip_id=item.get('clip_id'),
-            home_team_name=item.get('home_team_name'),
-            away_team_name=item.get('away_team_name'),
-            year=item.get('year'),
-            month=item.get('month'),
-            day=item.get('day')
+
+def _move_file(source_path, destination_path):
+    destination_dir_path = os.path.dirname(destination_path)
+
+    if _is_same_file_system(source_path, destination_dir_path) is True:
+        os.rename(source_path, destination_path)
+        _fsync_dir(destination_dir_path)
+
+        return
+
+    tmp_destination_path = os.path.join(
+        destination_dir_path,
+        MOVE_TMP_FILE_TEMPLATE.format(
+            file_name=os.path.basename(destination_path)
         )
     )
 
+    try:
+        _copy_file(source_path, tmp_destination_path)
+        os.replace(tmp_destination_path, destination_path)
+    except BaseException:
+        if os.path.exists(tmp_destination_path) is True:
+            os.remove(tmp_destination_path)
+
+        raise
+
+    _fsync_dir(destination_dir_path)
+    os.remove(source_path)
+
+
+def _is_same_file_system(source_path, destination_dir_path):
+    return os.stat(source_path).st_dev == os.stat(destination_dir_path).st_dev
+
+
+def _copy_file(source_path, destination_path):
+    with open(source_path, 'rb') as source_file:
+        with open(destination_path, 'wb') as destination_file:
+            is_copied = (
+                _reflink_file(source_file, destination_file) or
+                _copy_file_range(source_file, destination_file)
+            )
+
+            if is_copied is False:
+                shutil.copyfileobj(source_file, destination_file, MOVE_COPY_BUFFER_SIZE)
+
+            destination_file.flush()
+            os.fsync(destination_file.fileno())
+
+    shutil.copystat(source_path, destination_path)
+
+
+def _reflink_file(source_file, destination_file):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    except OSError:
+        return False
+
+    return True
+
+
+def _copy_file_range(source_file, destination_file):
+    if hasattr(os, 'copy_file_range') is False:
+        return False
+
+    num_bytes_left = os.fstat(source_file.fileno()).st_size
+    offset = 0
+
+    while num_bytes_left > 0:
+        try:
+            num_bytes = os.copy_file_range(
+                source_file.fileno(),
+                destination_file.fileno(),
+                min(num_bytes_left, MOVE_COPY_BUFFER_SIZE),
+                offset,
+                offset
+            )
+        except OSError as e:
+            unsupported_errnos = [errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP]
+
+            if offset == 0 and e.errno in unsupported_errnos:
+                return False
+
+            raise
+
+        if num_bytes == 0:
+            break
+
+        offset = offset + num_bytes
+        num_bytes_left = num_bytes_left - num_bytes
+
+    return True
+
+
+def _fsync_dir(dir_path):
+    try:
+        dir_fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def _get_clip_file_path(item, dir_path):
+    clip_file_name, _ = _get_clip_file_names(item)
+
+    return os.path.join(dir_path, clip_file_name)
+
 
-def _get_condensed_game_clip_file_path(item, dir_path):
-    return os.path.join(
-        dir_path,
-        CONDENSED_GAME_CLIP_FILENAME_TEMPLATE.format(
-            clip_id=item.get('clip_id'),
-            home_team_name=item.get('home_team_name'),
-            away_team_name=item.get('away_team_name'),
-            year=item.get('year'),
-            month=item.get('month'),
-            day=item.get('day')
+def _get_clip_thumbnail_file_path(item, dir_path):
+    _, clip_thumbnail_file_name = _get_clip_file_names(item)
+
+    return os.path.join(dir_path, clip_thumbnail_file_name)
+
+
+def _get_clip_file_names(item):
+    return _get_clip_file_names_from_fields(
+        item.get('clip_type'),
+        item.get('clip_id'),
+        item.get('home_team_name'),
+        item.get('away_team_name'),
+        item.get('year'),
+        item.get('month'),
+        item.get('day')
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_clip_file_names_from_fields(clip_type,
+                                     clip_id,
+                                     home_team_name,
+                                     away_team_name,
+                                     year,
+                                     month,
+                                     day):
+    if clip_type == NAVER_TV_CLIP_TYPE_FULL_GAME:
+        file_name_templates = [
+            FULL_GAME_CLIP_FILENAME_TEMPLATE,
+            FULL_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE
+        ]
+    elif clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
+        file_name_templates = [
+            CONDENSED_GAME_CLIP_FILENAME_TEMPLATE,
+            CONDENSED_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE
+        ]
+
+    return tuple(
+        file_name_template.format(
+            clip_id=clip_id,
+            home_team_name=home_team_name,
+            away_team_name=away_team_name,
+            year=year,
+            month=month,
+            day=day
         )
+        for file_name_template in file_name_templates
     )
 
 
@@ -354,38 +1116,446 @@ def _get_clip_date_released(item):
     )
 
 
-def _get_clip_thumbnail_file_path(item, dir_path):
-    if item.get('clip_type') == NAVER_TV_CLIP_TYPE_FULL_GAME:
-        file_path = _get_full_game_clip_thumbnail_file_path(item, dir_path)
-    elif item.get('clip_type') == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
-        file_path = _get_condensed_game_clip_thumbnail_file_path(item, dir_path)
+def _get_ffmpeg_error(stderr, exit_code):
+    if exit_code < 0:
+        return "FFmpeg was killed by signal {signal_number}".format(signal_number=-exit_code)
+
+    return stderr.decode()
 
-    return file_path
 
+def _get_thumbnail_ffmpeg_args(thumbnails, keyframe_seek, http_headers=None):
+    import ffmpeg
 
-def _get_full_game_clip_thumbnail_file_path(item, dir_path):
-    return os.path.join(
-        dir_path,
-        FULL_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE.format(
-            clip_id=item.get('clip_id'),
-            home_team_name=item.get('home_team_name'),
-            away_team_name=item.get('away_team_name'),
-            year=item.get('year'),
-            month=item.get('month'),
-            day=item.get('day')
+    input_kwargs = {'ss': GAME_CLIP_THUMBNAIL_TIMESTAMP}
+
+    if keyframe_seek is True:
+        input_kwargs['skip_frame'] = 'nokey'
+        input_kwargs['noaccurate_seek'] = None
+
+    if http_headers:
+        input_kwargs['headers'] = ''.join(
+            "{name}: {value}\r\n".format(name=name, value=value)
+            for name, value in http_headers.items()
         )
-    )
 
+    ffmpeg_outputs = []
+
+    for input_path, output_path in thumbnails:
+        ffmpeg_chain = ffmpeg.input(input_path, **input_kwargs)
+        ffmpeg_chain = ffmpeg_chain.filter('scale', 640, -1)
+        ffmpeg_chain = ffmpeg_chain.output(output_path, vframes=1)
+        ffmpeg_outputs.append(ffmpeg_chain)
+
+    return ffmpeg.merge_outputs(*ffmpeg_outputs).overwrite_output().get_args()
+
+
+class _Mp4TagPaddingExhausted(Exception):
+    pass
+
+
+def _require_mp4_tag_padding(padding_info):
+    # mutagen asks for the padding before it writes anything, so this aborts the save untouched
+    if padding_info.padding < 0:
+        raise _Mp4TagPaddingExhausted()
+
+    return padding_info.padding
+
+
+def _get_mp4_tag_padding(padding_info):
+    if padding_info.padding >= 0:
+        return padding_info.padding
+
+    return MP4_TAG_PADDING
+
+
+def _relocate_mp4_moov_atom_to_end(file_path):
+    atoms = _get_mp4_top_level_atoms(file_path)
+    atom_types = [atom_type for atom_type, _, _ in atoms]
+
+    if b'moov' not in atom_types or atom_types[-1] == b'moov':
+        return False
+
+    _, moov_offset, moov_size = atoms[atom_types.index(b'moov')]
+
+    with open(file_path, 'r+b') as f:
+        f.seek(moov_offset)
+        moov_data = f.read(moov_size)
+
+        f.seek(0, os.SEEK_END)
+        f.write(moov_data)
+        f.flush()
+        os.fsync(f.fileno())
+
+        f.seek(moov_offset + 4)
+        f.write(b'free')
+
+    return True
+
+
+def _get_mp4_top_level_atoms(file_path):
+    atoms = []
+    file_size = os.path.getsize(file_path)
+
+    with open(file_path, 'rb') as f:
+        offset = 0
+
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            size, atom_type = struct.unpack('>I4s', f.read(8))
+
+            if size == 1:
+                size, = struct.unpack('>Q', f.read(8))
+
+            if size < 8:
+                break
+
+            atoms.append((atom_type, offset, size))
+            offset = offset + size
+
+    return atoms
+
+
+def _get_clip_info_video_url(clip_info):
+    for format_info in clip_info.get('requested_formats') or [clip_info]:
+        if format_info.get('vcodec') != 'none':
+            return format_info.get('url'), format_info.get('http_headers', {})
 
-def _get_condensed_game_clip_thumbnail_file_path(item, dir_path):
-    return os.path.join(
-        dir_path,
-        CONDENSED_GAME_CLIP_THUMBNAIL_FILENAME_TEMPLATE.format(
-            clip_id=item.get('clip_id'),
-            home_team_name=item.get('home_team_name'),
-            away_team_name=item.get('away_team_name'),
-            year=item.get('year'),
-            month=item.get('month'),
-            day=item.get('day')
+    raise NotSupported('Clip has no video format')
+
+
+def _get_clip_info_media_urls(clip_info):
+    return [
+        format_info.get('url')
+        for format_info in clip_info.get('requested_formats') or [clip_info]
+    ]
+
+
+def _download_clip_info_segmented(clip_info,
+                                  file_path,
+                                  num_connections,
+                                  transfer_limiter,
+                                  transfer_ledger,
+                                  clip_id):
+    if clip_info.get('requested_formats'):
+        raise NotSupported('Clips with separate audio and video formats are not supported')
+
+    protocol = clip_info.get('protocol')
+    http_headers = clip_info.get('http_headers', {})
+    part_file_path = file_path + DOWNLOAD_PART_FILE_SUFFIX
+    has_progress = [False]
+
+    def start_transfer(content_length):
+        can_resume = (
+            os.path.exists(part_file_path) is True and
+            os.path.getsize(part_file_path) == content_length
         )
-    )
+        segments_done = transfer_ledger.start_transfer(
+            clip_id,
+            clip_info.get('url'),
+            file_path,
+            content_length,
+            can_resume
+        )
+
+        if can_resume is False:
+            _preallocate_file(part_file_path, content_length)
+
+        has_progress[0] = len(segments_done) > 0
+
+        return segments_done
+
+    def start_appended_transfer():
+        record = transfer_ledger.get(clip_id) or {}
+        segments_done = set(record.get('segments_done', []))
+        num_segments_done = 0
+
+        while num_segments_done in segments_done:
+            num_segments_done = num_segments_done + 1
+
+        bytes_done = record.get('bytes_done', 0)
+        can_resume = (
+            num_segments_done > 0 and
+            record.get('file_path') == file_path and
+            record.get('content_length') is None and
+            os.path.exists(part_file_path) is True and
+            os.path.getsize(part_file_path) >= bytes_done
+        )
+        transfer_ledger.start_transfer(
+            clip_id,
+            clip_info.get('url'),
+            file_path,
+            None,
+            can_resume
+        )
+
+        if can_resume is False:
+            num_segments_done = 0
+            bytes_done = 0
+
+        # anything after the last recorded segment was written without being recorded
+        with open(part_file_path, 'ab') as f:
+            f.truncate(bytes_done)
+
+        has_progress[0] = num_segments_done > 0
+
+        return num_segments_done
+
+    def on_segment_done(offset, length):
+        transfer_ledger.add_progress(clip_id, length, offset)
+        has_progress[0] = True
+
+    try:
+        if protocol in ['http', 'https']:
+            _download_progressive_segmented(
+                clip_info.get('url'),
+                http_headers,
+                part_file_path,
+                num_connections,
+                transfer_limiter,
+                start_transfer,
+                on_segment_done
+            )
+        elif protocol in ['m3u8', 'm3u8_native']:
+            _download_hls_segmented(
+                clip_info.get('url'),
+                http_headers,
+                part_file_path,
+                num_connections,
+                transfer_limiter,
+                start_appended_transfer,
+                on_segment_done
+            )
+            _remux_hls_part_file(part_file_path)
+        else:
+            raise NotSupported(
+                "Protocol ({protocol}) is not supported".format(
+                    protocol=protocol
+                )
+            )
+    except NotSupported as e:
+        # recorded segments are kept for the next attempt, instead of starting over with youtube_dl
+        if has_progress[0] is True:
+            raise ValueError(
+                "Segmented download interrupted: {error}".format(error=e)
+            )
+
+        if os.path.exists(part_file_path) is True:
+            os.remove(part_file_path)
+
+        raise
+
+    os.replace(part_file_path, file_path)
+
+
+def _download_progressive_segmented(url,
+                                    http_headers,
+                                    part_file_path,
+                                    num_connections,
+                                    transfer_limiter,
+                                    start_transfer,
+                                    on_segment_done):
+    content_length = _get_ranged_content_length(url, http_headers)
+    segments_done = start_transfer(content_length)
+    segments = [
+        (url, start, min(start + DOWNLOAD_SEGMENT_SIZE, content_length) - start, start)
+        for start in range(0, content_length, DOWNLOAD_SEGMENT_SIZE)
+        if start not in segments_done
+    ]
+
+    _download_segments(segments, http_headers, part_file_path, num_connections, transfer_limiter, on_segment_done)
+
+
+def _download_hls_segmented(url,
+                            http_headers,
+                            part_file_path,
+                            num_connections,
+                            transfer_limiter,
+                            start_appended_transfer,
+                            on_segment_done):
+    segment_urls = _get_hls_segment_urls(url, http_headers)
+    num_segments_done = start_appended_transfer()
+    segment_indexes = iter(range(num_segments_done, len(segment_urls)))
+
+    # segment lengths are only known once downloaded, so segments are fetched ahead and appended in playlist order
+    with open(part_file_path, 'ab') as f, concurrent.futures.ThreadPoolExecutor(num_connections) as executor:
+        futures = collections.deque(
+            (segment_index, executor.submit(_read_segment, segment_urls[segment_index], http_headers, transfer_limiter))
+            for segment_index in itertools.islice(segment_indexes, num_connections * 2)
+        )
+
+        try:
+            while futures:
+                segment_index, future = futures.popleft()
+                segment = future.result()
+
+                f.write(segment)
+                f.flush()
+                on_segment_done(segment_index, len(segment))
+
+                for next_segment_index in itertools.islice(segment_indexes, 1):
+                    futures.append((
+                        next_segment_index,
+                        executor.submit(_read_segment, segment_urls[next_segment_index], http_headers, transfer_limiter)
+                    ))
+        except BaseException:
+            for _, future in futures:
+                future.cancel()
+
+            raise
+
+
+def _remux_hls_part_file(part_file_path):
+    import ffmpeg
+
+    ts_file_path = part_file_path + '.ts'
+    os.replace(part_file_path, ts_file_path)
+
+    try:
+        (
+            ffmpeg.input(ts_file_path)
+                  .output(part_file_path, c='copy', f='mp4', **{'bsf:a': 'aac_adtstoasc'})
+                  .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
+        )
+    finally:
+        os.remove(ts_file_path)
+
+
+def _get_hls_segment_urls(url, http_headers):
+    with _open_url(url, http_headers) as response:
+        playlist = response.read().decode('utf-8')
+
+    unsupported_tags = ['#EXT-X-STREAM-INF', '#EXT-X-BYTERANGE', '#EXT-X-MAP']
+
+    segment_urls = []
+
+    for line in playlist.splitlines():
+        line = line.strip()
+
+        if any(line.startswith(tag) for tag in unsupported_tags):
+            raise NotSupported("HLS playlist tag ({tag}) is not supported".format(tag=line))
+
+        if line.startswith('#EXT-X-KEY') and 'METHOD=NONE' not in line:
+            raise NotSupported('Encrypted HLS playlists are not supported')
+
+        if line and not line.startswith('#'):
+            segment_urls.append(urllib.parse.urljoin(url, line))
+
+    if not segment_urls:
+        raise NotSupported('HLS playlist has no segments')
+
+    return segment_urls
+
+
+def _get_ranged_content_length(url, http_headers):
+    with _open_url(url, http_headers, byte_range=(0, 0)) as response:
+        content_range = response.headers.get('Content-Range')
+
+        if response.status != 206 or content_range is None:
+            raise NotSupported('Server does not support byte ranges')
+
+    return int(content_range.rsplit('/', 1)[1])
+
+
+def _preallocate_file(file_path, size):
+    with open(file_path, 'wb') as f:
+        if hasattr(os, 'posix_fallocate') and size > 0:
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            f.truncate(size)
+
+
+def _download_segments(segments,
+                       http_headers,
+                       part_file_path,
+                       num_connections,
+                       transfer_limiter,
+                       on_segment_done):
+    with concurrent.futures.ThreadPoolExecutor(num_connections) as executor:
+        futures = [
+            executor.submit(
+                _download_segment,
+                segment_url,
+                http_headers,
+                part_file_path,
+                offset,
+                length,
+                range_start,
+                transfer_limiter
+            )
+            for segment_url, offset, length, range_start in segments
+            if length > 0
+        ]
+
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                on_segment_done(*future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+
+            raise
+
+
+def _download_segment(url, http_headers, part_file_path, offset, length, range_start, transfer_limiter):
+    byte_range = None
+
+    if range_start is not None:
+        byte_range = (range_start, range_start + length - 1)
+
+    num_bytes = 0
+
+    with transfer_limiter.connection(url), _open_url(url, http_headers, byte_range=byte_range) as response:
+        if byte_range is not None and response.status != 206:
+            raise NotSupported('Server ignored byte range request')
+
+        with open(part_file_path, 'r+b') as f:
+            f.seek(offset)
+
+            while True:
+                chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+
+                if not chunk:
+                    break
+
+                f.write(chunk)
+                num_bytes = num_bytes + len(chunk)
+                transfer_limiter.throttle(len(chunk))
+
+    if num_bytes != length:
+        raise ValueError(
+            "Segment at byte {offset} incomplete ({num_bytes} of {length} bytes)".format(
+                offset=offset,
+                num_bytes=num_bytes,
+                length=length
+            )
+        )
+
+    return offset, length
+
+
+def _read_segment(url, http_headers, transfer_limiter):
+    chunks = []
+
+    with transfer_limiter.connection(url), _open_url(url, http_headers) as response:
+        while True:
+            chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+
+            if not chunk:
+                break
+
+            chunks.append(chunk)
+            transfer_limiter.throttle(len(chunk))
+
+    return b''.join(chunks)
+
+
+def _open_url(url, http_headers, byte_range=None, method='GET'):
+    request = urllib.request.Request(url, headers=http_headers, method=method)
+
+    if byte_range is not None:
+        request.add_header('Range', "bytes={start}-{end}".format(
+            start=byte_range[0],
+            end=byte_range[1]
+        ))
+
+    return urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT)
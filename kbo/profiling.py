@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import cProfile
+import datetime
+import functools
+import inspect
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer
+
+from kbo import signals as kbo_signals
+from kbo.constants import (
+    DEFAULT_PROFILE_TOP_N,
+    KST_TZINFO,
+    PROFILE_FILENAME_TEMPLATE,
+    PROFILE_SUMMARY_FILENAME_TEMPLATE
+)
+
+
+# time.thread_time is only available on Python >= 3.7
+_get_cpu_time = getattr(time, 'thread_time', time.process_time)
+
+
+def profile_callback(callback):
+    target_name = callback.__qualname__
+
+    @functools.wraps(callback)
+    def wrapper(self, *args, **kwargs):
+        return _run_profiled(self, target_name, callback, self, *args, **kwargs)
+
+    return wrapper
+
+
+def profile_stage(process_item):
+    target_name = process_item.__qualname__
+
+    @functools.wraps(process_item)
+    def wrapper(self, item, spider):
+        return _run_profiled(spider, target_name, process_item, self, item, spider)
+
+    return wrapper
+
+
+class CrawlProfiler:
+
+    def __init__(self, dir_path, top_n=DEFAULT_PROFILE_TOP_N, trace_memory=False):
+        self.dir_path = dir_path
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self._profile = cProfile.Profile()
+        self._depth = 0
+        self._samples = {}
+        self._started_at = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        dir_path = crawler.settings.get('KBO_PROFILE_DIR_PATH')
+
+        if not dir_path:
+            raise NotConfigured
+
+        if os.path.isdir(dir_path) is False:
+            raise NotConfigured('Invalid KBO_PROFILE_DIR_PATH given')
+
+        profiler = cls(
+            dir_path,
+            top_n=crawler.settings.getint('KBO_PROFILE_TOP_N', DEFAULT_PROFILE_TOP_N),
+            trace_memory=crawler.settings.getbool('KBO_PROFILE_TRACEMALLOC', False)
+        )
+        crawler.signals.connect(profiler.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(profiler.watch_polled, signal=kbo_signals.watch_polled)
+        crawler.signals.connect(profiler.spider_closed, signal=signals.spider_closed)
+
+        return profiler
+
+    def spider_opened(self, spider):
+        self._started_at = datetime.datetime.now(KST_TZINFO)
+        spider.kbo_profiler = self
+
+        if self.trace_memory is True:
+            tracemalloc.start()
+
+    def watch_polled(self, spider):
+        # a watching spider may run for weeks, so the profile so far is written after every poll
+        self._write_profile(spider)
+
+    def spider_closed(self, spider, reason):
+        spider.kbo_profiler = None
+        snapshot = None
+
+        if self.trace_memory is True:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        summary = self._write_profile(spider, snapshot)
+
+        spider.logger.info("Profile summary ({reason}):\n{summary}".format(reason=reason, summary=summary))
+
+    def _write_profile(self, spider, snapshot=None):
+        file_name_fields = {
+            'spider_name': spider.name,
+            'clip_type': spider.clip_type,
+            'started_at': self._started_at.strftime('%Y%m%dT%H%M%S'),
+            'pid': os.getpid()
+        }
+        summary = self.get_summary(snapshot)
+
+        if self._samples:
+            self._profile.dump_stats(os.path.join(
+                self.dir_path,
+                PROFILE_FILENAME_TEMPLATE.format(**file_name_fields)
+            ))
+
+        with open(os.path.join(self.dir_path, PROFILE_SUMMARY_FILENAME_TEMPLATE.format(**file_name_fields)), 'w') as f:
+            f.write(summary)
+
+        return summary
+
+    @contextlib.contextmanager
+    def sample(self, target_name, is_call=True):
+        # nested targets are timed on their own, but only the outermost one toggles cProfile
+        is_outermost = self._depth == 0
+        self._depth = self._depth + 1
+
+        if self.trace_memory is True:
+            allocated_before, _ = tracemalloc.get_traced_memory()
+
+        wall_started_at = time.perf_counter()
+        cpu_started_at = _get_cpu_time()
+
+        if is_outermost:
+            self._profile.enable()
+
+        try:
+            yield
+        finally:
+            if is_outermost:
+                self._profile.disable()
+
+            self._depth = self._depth - 1
+
+            sample = self._samples.setdefault(target_name, {
+                'calls': 0,
+                'wall_seconds': 0.0,
+                'cpu_seconds': 0.0,
+                'allocated_bytes': 0
+            })
+            sample['calls'] = sample['calls'] + (1 if is_call else 0)
+            sample['wall_seconds'] = sample['wall_seconds'] + time.perf_counter() - wall_started_at
+            sample['cpu_seconds'] = sample['cpu_seconds'] + _get_cpu_time() - cpu_started_at
+
+            if self.trace_memory is True:
+                allocated_after, _ = tracemalloc.get_traced_memory()
+                sample['allocated_bytes'] = sample['allocated_bytes'] + allocated_after - allocated_before
+
+    def add_wall_seconds(self, target_name, wall_seconds):
+        sample = self._samples.get(target_name)
+
+        if sample is not None:
+            sample['wall_seconds'] = sample['wall_seconds'] + wall_seconds
+
+    def get_samples(self):
+        return self._samples
+
+    def get_summary(self, snapshot=None):
+        lines = [
+            "{target:<48} {calls:>8} {wall:>10} {cpu:>10} {per_call:>12} {allocated:>14}".format(
+                target='target',
+                calls='calls',
+                wall='wall s',
+                cpu='cpu s',
+                per_call='wall ms/call',
+                allocated='net alloc KiB'
+            )
+        ]
+        samples = sorted(
+            self._samples.items(),
+            key=lambda target_sample: target_sample[1]['wall_seconds'],
+            reverse=True
+        )
+
+        for target_name, sample in samples[:self.top_n]:
+            lines.append(
+                "{target:<48} {calls:>8} {wall:>10.3f} {cpu:>10.3f} {per_call:>12.3f} {allocated:>14}".format(
+                    target=target_name,
+                    calls=sample['calls'],
+                    wall=sample['wall_seconds'],
+                    cpu=sample['cpu_seconds'],
+                    per_call=sample['wall_seconds'] / max(sample['calls'], 1) * 1000,
+                    allocated="{:.1f}".format(sample['allocated_bytes'] / 1024) if self.trace_memory else '-'
+                )
+            )
+
+        if self._samples:
+            stream = io.StringIO()
+            pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(self.top_n)
+            lines.append('')
+            lines.append("Top {top_n} functions by cumulative time:".format(top_n=self.top_n))
+            lines.append(stream.getvalue().strip('\n'))
+
+        if snapshot is not None:
+            lines.append('')
+            lines.append("Top {top_n} allocations still held at close:".format(top_n=self.top_n))
+            lines.extend(
+                str(statistic)
+                for statistic in snapshot.statistics('lineno')[:self.top_n]
+            )
+
+        return '\n'.join(lines) + '\n'
+
+
+def _run_profiled(spider, target_name, func, *args, **kwargs):
+    profiler = getattr(spider, 'kbo_profiler', None)
+
+    if profiler is None:
+        return func(*args, **kwargs)
+
+    with profiler.sample(target_name):
+        result = func(*args, **kwargs)
+
+    if inspect.isgenerator(result):
+        return _profile_generator(profiler, target_name, result)
+
+    if isinstance(result, defer.Deferred):
+        return _profile_deferred(profiler, target_name, result)
+
+    return result
+
+
+def _profile_generator(profiler, target_name, generator):
+    # spider callbacks are generators, so their work happens while Scrapy iterates over them
+    while True:
+        with profiler.sample(target_name, is_call=False):
+            try:
+                value = next(generator)
+            except StopIteration:
+                return
+
+        yield value
+
+
+def _profile_deferred(profiler, target_name, deferred):
+    # stages that hand their work to a thread pool or FFmpeg are timed until it finishes, but off the reactor thread
+    # that work is neither in cProfile nor in the CPU time
+    started_at = time.perf_counter()
+
+    def add_wall_seconds(result):
+        profiler.add_wall_seconds(target_name, time.perf_counter() - started_at)
+
+        return result
+
+    deferred.addBoth(add_wall_seconds)
+
+    return deferred
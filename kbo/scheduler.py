@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import datetime
+import heapq
+import itertools
+import threading
+import time
+import urllib.parse
+
+from scrapy.exceptions import NotSupported
+from twisted.internet import defer, threads
+
+from kbo.constants import (
+    DOWNLOAD_RETRY_BACKOFF,
+    DOWNLOAD_RETRY_BACKOFF_MAX,
+    DOWNLOAD_SCHEDULER_WAKEUP_INTERVAL,
+    KST_TZINFO,
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME
+)
+
+
+class DownloadScheduler:
+
+    def __init__(self, reactor, thread_pool, max_concurrency, backfill_hours=None):
+        self.reactor = reactor
+        self.thread_pool = thread_pool
+        self.max_concurrency = max_concurrency
+        self.backfill_hours = backfill_hours
+        self._queue = []
+        self._sequence = itertools.count()
+        self._num_running = 0
+        self._wakeup_call = None
+
+    def submit(self, priority, is_backfill, f, *args, **kwargs):
+        deferred = defer.Deferred()
+
+        heapq.heappush(self._queue, (priority, next(self._sequence), is_backfill, f, args, kwargs, deferred))
+        self._run_pending()
+
+        return deferred
+
+    def stop(self):
+        if self._wakeup_call is not None and self._wakeup_call.active():
+            self._wakeup_call.cancel()
+
+        self._wakeup_call = None
+
+    def get_num_pending(self):
+        return len(self._queue)
+
+    def _run_pending(self):
+        held_jobs = []
+        can_run_backfill = (
+            self.backfill_hours is None or
+            is_within_hours(datetime.datetime.now(KST_TZINFO), self.backfill_hours)
+        )
+
+        while self._queue and self._num_running < self.max_concurrency:
+            job = heapq.heappop(self._queue)
+            _, _, is_backfill, f, args, kwargs, deferred = job
+
+            if is_backfill is True and can_run_backfill is False:
+                held_jobs.append(job)
+                continue
+
+            self._num_running = self._num_running + 1
+
+            job_deferred = threads.deferToThreadPool(self.reactor, self.thread_pool, f, *args, **kwargs)
+            job_deferred.addBoth(self._on_job_done)
+            job_deferred.chainDeferred(deferred)
+
+        for job in held_jobs:
+            heapq.heappush(self._queue, job)
+
+        if held_jobs and self._wakeup_call is None:
+            self._wakeup_call = self.reactor.callLater(DOWNLOAD_SCHEDULER_WAKEUP_INTERVAL, self._wake_up)
+
+    def _on_job_done(self, result):
+        self._num_running = self._num_running - 1
+        self._run_pending()
+
+        return result
+
+    def _wake_up(self):
+        self._wakeup_call = None
+        self._run_pending()
+
+
+class TransferLimiter:
+
+    def __init__(self, max_bandwidth=0, max_connections_per_host=0):
+        self.max_bandwidth = max_bandwidth
+        self.max_connections_per_host = max_connections_per_host
+        self._lock = threading.Lock()
+        self._host_semaphores = {}
+        self._tokens = float(max_bandwidth)
+        self._refilled_at = time.monotonic()
+
+    @contextlib.contextmanager
+    def connection(self, *urls):
+        if self.max_connections_per_host <= 0:
+            yield
+            return
+
+        host_semaphores = []
+
+        with self._lock:
+            for host in sorted(set(urllib.parse.urlparse(url).netloc for url in urls)):
+                if host not in self._host_semaphores:
+                    self._host_semaphores[host] = threading.BoundedSemaphore(self.max_connections_per_host)
+
+                host_semaphores.append(self._host_semaphores[host])
+
+        # hosts are always acquired in the same order, so transfers using several hosts cannot deadlock
+        with contextlib.ExitStack() as stack:
+            for host_semaphore in host_semaphores:
+                stack.enter_context(host_semaphore)
+
+            yield
+
+    def throttle(self, num_bytes):
+        if self.max_bandwidth <= 0:
+            return
+
+        # the bucket goes into debt, and each caller sleeps off its own share of it
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.max_bandwidth,
+                self._tokens + (now - self._refilled_at) * self.max_bandwidth
+            )
+            self._refilled_at = now
+            self._tokens = self._tokens - num_bytes
+            wait = -self._tokens / self.max_bandwidth
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+def get_download_priority(item):
+    game_date = datetime.date(item.get('year'), item.get('month'), item.get('day'))
+
+    # newest games first, then condensed games (smaller, and watched first) before full games
+    return (
+        -game_date.toordinal(),
+        0 if item.get('clip_type') == NAVER_TV_CLIP_TYPE_CONDENSED_GAME else 1,
+        str(item.get('clip_id'))
+    )
+
+
+def get_retry_backoff(num_attempts, backoff=DOWNLOAD_RETRY_BACKOFF, max_backoff=DOWNLOAD_RETRY_BACKOFF_MAX):
+    return min(backoff * 2 ** (num_attempts - 1), max_backoff)
+
+
+def is_within_hours(now, hours):
+    start_hour, end_hour = hours
+
+    if start_hour <= end_hour:
+        return start_hour <= now.hour < end_hour
+
+    return now.hour >= start_hour or now.hour < end_hour
+
+
+def parse_hours(hours):
+    if hours is None or hours == '':
+        return None
+
+    try:
+        start_hour, end_hour = (int(hour) for hour in str(hours).split('-'))
+    except ValueError:
+        raise NotSupported("Invalid hours given ({hours}), expected e.g. '2-8'".format(hours=hours))
+
+    if not (0 <= start_hour <= 23 and 0 <= end_hour <= 23):
+        raise NotSupported("Invalid hours given ({hours}), expected e.g. '2-8'".format(hours=hours))
+
+    return start_hour, end_hour
@@ -4,11 +4,13 @@ BOT_NAME = 'kbo'
 
 SPIDER_MODULES = ['kbo.spiders']
 NEWSPIDER_MODULE = 'kbo.spiders'
+COMMANDS_MODULE = 'kbo.commands'
 
 ROBOTSTXT_OBEY = False
 
 ITEM_PIPELINES = {
     'kbo.pipelines.ClipValidationPipeline': 100,
+    'kbo.pipelines.ClipStorePipeline': 150,
     'kbo.pipelines.ClipDownloadPipeline': 200,
     'kbo.pipelines.ClipTagPipeline': 300,
     'kbo.pipelines.ClipThumbnailPipeline': 400,
@@ -16,3 +18,40 @@ ITEM_PIPELINES = {
 }
 
 COOKIES_ENABLED = False
+
+DOWNLOADER_MIDDLEWARES = {
+    'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': None,
+    'kbo.httpcache.NaverTvHttpCacheMiddleware': 900
+}
+
+EXTENSIONS = {
+    'kbo.metrics.PrometheusTextfileExporter': 500,
+    'kbo.profiling.CrawlProfiler': 510
+}
+
+HTTPCACHE_ENABLED = False
+HTTPCACHE_STORAGE = 'kbo.httpcache.NaverTvCacheStorage'
+
+KBO_DOWNLOAD_CONCURRENCY = 4
+KBO_DOWNLOAD_ENGINE = 'youtube_dl'
+KBO_DOWNLOAD_NUM_CONNECTIONS = 8
+KBO_DOWNLOAD_MAX_BANDWIDTH = 0
+KBO_DOWNLOAD_MAX_CONNECTIONS_PER_HOST = 0
+KBO_DOWNLOAD_BACKFILL_HOURS = None
+KBO_DOWNLOAD_BACKFILL_AGE = 2
+KBO_THUMBNAIL_CONCURRENCY = 2
+KBO_THUMBNAIL_BATCH_SIZE = 4
+KBO_THUMBNAIL_KEYFRAME_SEEK = False
+KBO_THUMBNAIL_DURING_DOWNLOAD = False
+KBO_HTTPCACHE_SEARCH_TTL = 3600
+KBO_HTTPCACHE_CLIP_TTL = 0
+KBO_HTTPCACHE_REPLAY = False
+KBO_METRICS_TEXTFILE_PATH = None
+KBO_METRICS_ITEM_TIMINGS = False
+KBO_PROFILE_DIR_PATH = None
+KBO_PROFILE_TOP_N = 20
+KBO_PROFILE_TRACEMALLOC = False
+KBO_WATCH_PEAK_INTERVAL = 30
+KBO_WATCH_INTERVAL = 300
+KBO_WATCH_OFF_PEAK_INTERVAL = 1800
+KBO_WATCH_RETRY_TIMES = 6
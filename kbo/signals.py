@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+# sent by a watching spider at the end of each poll, with the spider as argument
+watch_polled = object()
@@ -3,29 +3,62 @@
 import csv
 import datetime
 import os
+import time
 import urllib
 
-import dateparser
 import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, DropItem
 
+from kbo import signals as kbo_signals
 from kbo.constants import (
+    DEFAULT_MAX_CLIP_LENGTHS,
+    DEFAULT_MIN_CLIP_LENGTHS,
+    DEFAULT_WATCH_INTERVAL,
+    DEFAULT_WATCH_OFF_PEAK_INTERVAL,
+    DEFAULT_WATCH_PEAK_INTERVAL,
+    DEFAULT_WATCH_RETRY_TIMES,
     KBO_LEAGUE_TEAM_NAMES_LONG,
     KBO_LEAGUE_TEAM_NAME_SHORT_TO_LONG,
     KBO_LEAGUE_TEAM_NAME_UNKNOWN,
     KST_TZINFO,
     NAVER_TV_CHANNEL_PATH_TO_KBO_LEAGUE_TEAM_NAME_LONG,
-    NAVER_TV_CLIP_CONDENSED_GAME_TITLE_REGEX,
-    NAVER_TV_CLIP_FULL_GAME_TITLE_REGEX,
+    NAVER_TV_CLIP_DATE_REGEX,
+    NAVER_TV_CLIP_TITLE_REGEX,
     NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
     NAVER_TV_CLIP_TYPE_FULL_GAME,
     NAVER_TV_CLIP_TYPE_UNKNOWN,
     NAVER_TV_NETLOC,
     NAVER_TV_SCHEME,
     NAVER_TV_SEARCH_CLIP_CONDENSED_GAME_QUERY,
     NAVER_TV_SEARCH_CLIP_FULL_GAME_QUERY,
-    NAVER_TV_SEARCH_CLIP_PATH
+    NAVER_TV_SEARCH_CLIP_PATH,
+    NAVER_TV_SEARCH_RESULTS_XPATH,
+    NAVER_TV_SEARCH_RESULT_CHANNEL_URL_XPATH,
+    NAVER_TV_SEARCH_RESULT_CLIP_LENGTH_XPATH,
+    NAVER_TV_SEARCH_RESULT_CLIP_LINK_XPATH,
+    NAVER_TV_TARGET_CLIP_TYPES,
+    TRANSFER_LEDGER_FILENAME,
+    WATCH_OFF_PEAK_HOURS,
+    WATCH_PEAK_HOURS,
+    WATCH_RETRY_BACKOFF,
+    WATCH_RETRY_BACKOFF_MAX,
+    WATCH_RETRY_DROP_REASONS
 )
+from kbo.directory_index import clear_directory_indexes
 from kbo.items import NaverTvClip
+from kbo.ledger import TransferLedger
+from kbo.profiling import profile_callback
+from kbo.scheduler import get_retry_backoff, is_within_hours
+from kbo.stores import ClipMetadataStore, FullGameStore
+from kbo.validation import (
+    validate_channel_path,
+    validate_clip_length,
+    validate_clip_type,
+    validate_home_team_name,
+    validate_team_names
+)
 
 
 class NaverTvSpider(scrapy.Spider):
@@ -33,8 +66,16 @@ class NaverTvSpider(scrapy.Spider):
     name = 'naver_tv'
     allowed_domains = [NAVER_TV_NETLOC]
 
+    _backfill = None
+    _clip_metadata_store = None
     _full_game_feed = None
     _num_pages = None
+    _pending_condensed_game_clips = None
+    _seen_clip_ids = None
+    _clip_retries = None
+    _transfer_ledger = None
+    _poll_call = None
+    _num_new_clips = 0
 
     clip_type = None
     team_name = None
@@ -44,9 +85,14 @@ class NaverTvSpider(scrapy.Spider):
     max_clip_length = None
     max_num_pages = None
     do_dry_run = None
+    do_stop_at_start_date = None
+    do_backfill = None
+    do_watch = None
     output_dir_path = None
     tmp_dir_path = None
     full_game_feed_path = None
+    full_game_store_path = None
+    clip_metadata_store_path = None
 
     def __init__(self,
                  clip_type=None,
@@ -59,7 +105,12 @@ class NaverTvSpider(scrapy.Spider):
                  output_dir_path=None,
                  tmp_dir_path=None,
                  full_game_feed_path=None,
+                 full_game_store_path=None,
+                 clip_metadata_store_path=None,
                  do_dry_run=None,
+                 do_stop_at_start_date=None,
+                 do_backfill=None,
+                 do_watch=None,
                  *args,
                  **kwargs):
         super(NaverTvSpider, self).__init__(*args, **kwargs)
@@ -72,18 +123,60 @@ class NaverTvSpider(scrapy.Spider):
         self.max_clip_length = self._parse_max_clip_length(max_clip_length)
         self.max_num_pages = self._parse_max_num_pages(max_num_pages)
         self.do_dry_run = self._parse_do_dry_run(do_dry_run)
+        self.do_stop_at_start_date = self._parse_do_stop_at_start_date(do_stop_at_start_date)
+        self.do_backfill = self._parse_do_backfill(do_backfill)
+        self.do_watch = self._parse_do_watch(do_watch)
         self.output_dir_path = self._parse_output_dir_path(output_dir_path)
         self.tmp_dir_path = self._parse_tmp_dir_path(tmp_dir_path)
+        self.full_game_store_path = self._parse_full_game_store_path(full_game_store_path)
         self.full_game_feed_path = self._parse_full_game_feed_path(full_game_feed_path)
+        self.clip_metadata_store_path = self._parse_clip_metadata_store_path(clip_metadata_store_path)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(NaverTvSpider, cls).from_crawler(crawler, *args, **kwargs)
+
+        if spider.do_watch is True:
+            crawler.signals.connect(spider._spider_opened, signal=signals.spider_opened)
+            crawler.signals.connect(spider._spider_idle, signal=signals.spider_idle)
+            crawler.signals.connect(spider._item_dropped, signal=signals.item_dropped)
+
+        return spider
 
     def start_requests(self):
-        yield scrapy.Request(
-            url=self._get_naver_tv_search_clip_url(1),
-            callback=self._parse_search_clip_response
-        )
+        if self.do_backfill is True:
+            yield scrapy.Request(
+                url=self._get_naver_tv_search_clip_url(1),
+                callback=self._parse_backfill_response
+            )
+            return
+
+        for search_clip_type in NAVER_TV_TARGET_CLIP_TYPES[self.clip_type]:
+            yield self._get_search_page_request(1, search_clip_type=search_clip_type)
+
+    def closed(self, reason):
+        if self._poll_call is not None and self._poll_call.active():
+            self._poll_call.cancel()
+
+        self._poll_call = None
+
+        if self._clip_metadata_store is not None:
+            self._clip_metadata_store.close()
+            self._clip_metadata_store = None
+
+        for parsed_clips in (self._pending_condensed_game_clips or {}).values():
+            for parsed_clip in parsed_clips:
+                self.logger.warning(
+                    "Could not resolve away team of condensed game {url}: no full game found for {home_team_name} on {clip_date}".format(
+                        url=parsed_clip.get('url'),
+                        home_team_name=parsed_clip.get('home_team_name'),
+                        clip_date=self._get_clip_date(parsed_clip).strftime('%x')
+                    )
+                )
+                self._inc_stats_value('kbo/condensed_game/unresolved')
 
     def _parse_clip_type(self, clip_type):
-        if clip_type not in [NAVER_TV_CLIP_TYPE_FULL_GAME, NAVER_TV_CLIP_TYPE_CONDENSED_GAME]:
+        if clip_type not in NAVER_TV_TARGET_CLIP_TYPES:
             raise scrapy.exceptions.NotSupported('Invalid clip_type given')
 
         return clip_type
@@ -116,19 +209,13 @@ class NaverTvSpider(scrapy.Spider):
         if min_clip_length:
             return int(min_clip_length)
 
-        if self.clip_type == NAVER_TV_CLIP_TYPE_FULL_GAME:
-            return 3600
-
-        return None
+        return DEFAULT_MIN_CLIP_LENGTHS.get(self.clip_type)
 
     def _parse_max_clip_length(self, max_clip_length):
         if max_clip_length:
             return int(max_clip_length)
 
-        if self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
-            return 3600
-
-        return None
+        return DEFAULT_MAX_CLIP_LENGTHS.get(self.clip_type)
 
     def _parse_max_num_pages(self, max_num_pages):
         if max_num_pages:
@@ -143,6 +230,32 @@ class NaverTvSpider(scrapy.Spider):
 
         return False
 
+    def _parse_do_stop_at_start_date(self, do_stop_at_start_date):
+        if do_stop_at_start_date:
+            if str(do_stop_at_start_date).lower() in ['1', 'true']:
+                return True
+
+        return False
+
+    def _parse_do_backfill(self, do_backfill):
+        if do_backfill:
+            if str(do_backfill).lower() in ['1', 'true']:
+                if self.clip_type == NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME:
+                    raise scrapy.exceptions.NotSupported(
+                        'Invalid do_backfill given (not supported for clip_type full_and_condensed_game)'
+                    )
+
+                return True
+
+        return False
+
+    def _parse_do_watch(self, do_watch):
+        if do_watch:
+            if str(do_watch).lower() in ['1', 'true']:
+                return True
+
+        return False
+
     def _parse_output_dir_path(self, output_dir_path):
         if self.do_dry_run is False:
             if output_dir_path is None or os.path.exists(output_dir_path) is False:
@@ -161,8 +274,25 @@ class NaverTvSpider(scrapy.Spider):
 
         return tmp_dir_path
 
-    def _parse_full_game_feed_path(self, full_game_feed_path):
+    def _parse_full_game_store_path(self, full_game_store_path):
+        if full_game_store_path is None:
+            return None
+
         if self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
+            if os.path.exists(full_game_store_path) is False:
+                raise scrapy.exceptions.NotSupported(
+                    'Invalid full_game_store_path given (does not exist)'
+                )
+
+        if os.path.isdir(os.path.dirname(os.path.abspath(full_game_store_path))) is False:
+            raise scrapy.exceptions.NotSupported(
+                'Invalid full_game_store_path given (parent directory does not exist)'
+            )
+
+        return full_game_store_path
+
+    def _parse_full_game_feed_path(self, full_game_feed_path):
+        if self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME and self.full_game_store_path is None:
             if full_game_feed_path is None or os.path.exists(full_game_feed_path) is False:
                 raise scrapy.exceptions.NotSupported(
                     'Invalid full_game_feed_path given (does not exist)'
@@ -170,48 +300,618 @@ class NaverTvSpider(scrapy.Spider):
 
         return full_game_feed_path
 
-    def _parse_search_clip_response(self, response):
+    def _parse_clip_metadata_store_path(self, clip_metadata_store_path):
+        if clip_metadata_store_path is not None:
+            if os.path.isdir(os.path.dirname(os.path.abspath(clip_metadata_store_path))) is False:
+                raise scrapy.exceptions.NotSupported(
+                    'Invalid clip_metadata_store_path given (parent directory does not exist)'
+                )
+
+        return clip_metadata_store_path
+
+    @profile_callback
+    def _parse_search_clip_response(self, response, do_paginate=True, search_clip_type=None):
+        if search_clip_type is None:
+            search_clip_type = self.clip_type
+
         search_results = self._get_search_results(response)
+        page_number = self._get_current_page_number(self._get_paging(response))
+        parsed_clips = [
+            parsed_clip
+            for parsed_clip in map(self._parse_search_result, search_results)
+            if self._prefilter_clip(parsed_clip) and self._is_new_clip(parsed_clip)
+        ]
 
-        for search_result in search_results:
-            parsed_clip = self._parse_search_result(search_result)
+        self._increment_num_pages(search_clip_type)
+        next_page_number = None
+
+        if do_paginate is True and self.do_stop_at_start_date is True:
+            next_page_number = self._get_next_page_number(response, search_clip_type)
+
+        search_page = self._get_search_page(next_page_number, len(parsed_clips), search_clip_type)
+
+        for parsed_clip in parsed_clips:
+            clip_metadata = self._get_clip_metadata(parsed_clip)
+
+            if clip_metadata is not None:
+                self._set_clip_date(
+                    parsed_clip,
+                    self._get_clip_metadata_date(clip_metadata)
+                )
+
+                yield from self._get_resolved_clips(parsed_clip)
+                yield from self._finish_search_page_clip(search_page, parsed_clip)
+                continue
 
             yield scrapy.Request(
                 url=parsed_clip.get('url'),
                 callback=self._parse_clip_response,
-                cb_kwargs={'parsed_clip': parsed_clip}
+                errback=self._handle_clip_error,
+                cb_kwargs={'parsed_clip': parsed_clip, 'search_page': search_page},
+                priority=-page_number,
+                dont_filter=True
+            )
+
+        if search_page is not None:
+            if len(parsed_clips) == 0:
+                yield from self._get_next_search_page_requests(search_page)
+        elif do_paginate is True and self.do_stop_at_start_date is False:
+            yield from self._get_remaining_search_page_requests(response, search_clip_type)
+
+    @profile_callback
+    def _parse_clip_response(self, response, parsed_clip, search_page=None):
+        clip_date_text = self._get_clip_date_text(response)
+        clip_date_parsed = self._parse_date_text(clip_date_text)
+
+        if clip_date_parsed:
+            self._set_clip_date(parsed_clip, clip_date_parsed)
+            self._add_clip_metadata(parsed_clip)
+
+        yield from self._get_resolved_clips(parsed_clip)
+        yield from self._finish_search_page_clip(search_page, parsed_clip)
+
+    def _prefilter_clip(self, parsed_clip):
+        validators = [
+            ('clip_type', lambda: validate_clip_type(parsed_clip, self)),
+            ('clip_length', lambda: validate_clip_length(parsed_clip, self)),
+            ('channel_path', lambda: validate_channel_path(parsed_clip)),
+            ('team_names', lambda: self._prefilter_team_names(parsed_clip))
+        ]
+
+        for rule_name, validate in validators:
+            try:
+                validate()
+            except DropItem as e:
+                self.logger.debug(
+                    "Pre-filtered clip {url}: {reason}".format(
+                        url=parsed_clip.get('url'),
+                        reason=e
+                    )
+                )
+                self._inc_stats_value('kbo/prefilter/dropped')
+                self._inc_stats_value(
+                    "kbo/prefilter/dropped/{rule_name}".format(rule_name=rule_name)
+                )
+
+                return False
+
+        self._inc_stats_value('kbo/prefilter/passed')
+
+        return True
+
+    def _prefilter_team_names(self, parsed_clip):
+        # the away team of a condensed game is only known once its clip date is parsed
+        if parsed_clip.get('away_team_name') is None:
+            validate_home_team_name(parsed_clip)
+        else:
+            validate_team_names(parsed_clip, self)
+
+    def _is_new_clip(self, parsed_clip):
+        if self._seen_clip_ids is None:
+            self._seen_clip_ids = set()
+
+        # a clip shifted onto the next page by new uploads is only requested and counted once
+        if parsed_clip.get('clip_id') in self._seen_clip_ids:
+            return False
+
+        clip_retry = (self._clip_retries or {}).get(parsed_clip.get('clip_id'))
+
+        if clip_retry is not None and time.time() < clip_retry['retry_at']:
+            return False
+
+        self._seen_clip_ids.add(parsed_clip.get('clip_id'))
+
+        if clip_retry is None:
+            self._num_new_clips = self._num_new_clips + 1
+
+        return True
+
+    def _retry_clip(self, clip, error):
+        if self._clip_retries is None:
+            self._clip_retries = {}
+
+        clip_retry = self._clip_retries.setdefault(clip.get('clip_id'), {'attempts': 0, 'retry_at': None})
+        clip_retry['attempts'] = clip_retry['attempts'] + 1
+
+        # the clip stays seen, so later polls skip it
+        if clip_retry['attempts'] > self.settings.getint('KBO_WATCH_RETRY_TIMES', DEFAULT_WATCH_RETRY_TIMES):
+            self.logger.warning(
+                "Giving up on clip {url} after {attempts} failed attempts: {error}".format(
+                    url=clip.get('url'),
+                    attempts=clip_retry['attempts'],
+                    error=error
+                )
+            )
+            self._inc_stats_value('kbo/watch/retries_exhausted')
+            return
+
+        # a failed download is not retried before its backoff in the transfer ledger has expired
+        clip_retry['retry_at'] = max(
+            time.time() + get_retry_backoff(clip_retry['attempts'], WATCH_RETRY_BACKOFF, WATCH_RETRY_BACKOFF_MAX),
+            self._get_transfer_retry_at(clip.get('clip_id')) or 0
+        )
+
+        # a later poll requests the clip again, without counting it as a new upload
+        if self._seen_clip_ids is not None:
+            self._seen_clip_ids.discard(clip.get('clip_id'))
+
+        self.logger.info(
+            "Retrying clip {url} after {retry_at}: {error}".format(
+                url=clip.get('url'),
+                retry_at=datetime.datetime.fromtimestamp(clip_retry['retry_at'], KST_TZINFO).strftime('%c'),
+                error=error
             )
+        )
+
+    def _get_transfer_retry_at(self, clip_id):
+        if self.do_dry_run is True:
+            return None
+
+        if self._transfer_ledger is None:
+            self._transfer_ledger = TransferLedger(os.path.join(self.tmp_dir_path, TRANSFER_LEDGER_FILENAME))
+
+        return self._transfer_ledger.get_retry_at(clip_id)
+
+    def _item_dropped(self, item, exception):
+        if self._should_retry_dropped_clip(exception):
+            self._retry_clip(item, exception)
+
+    def _should_retry_dropped_clip(self, exception):
+        # e.g. a failed download, or a condensed game whose full game may be stored by the next poll
+        return str(exception).startswith(WATCH_RETRY_DROP_REASONS)
+
+    def _spider_opened(self, spider):
+        self._schedule_poll()
+
+    def _spider_idle(self):
+        # the spider is not idle while items are downloading, so polls are scheduled on their own
+        raise DontCloseSpider
+
+    def _schedule_poll(self):
+        poll_interval = self._get_poll_interval(datetime.datetime.now(KST_TZINFO))
+        self._num_new_clips = 0
+        self._poll_call = self._get_reactor().callLater(poll_interval, self._poll)
+
+        self.logger.debug(
+            "Polling for new clips in {poll_interval} seconds".format(poll_interval=poll_interval)
+        )
 
-        self._increment_num_pages()
-        next_page_number = self._get_next_page_number(response)
+    def _poll(self):
+        self._inc_stats_value('kbo/watch/polls')
+        # files may have been added or removed by hand, or by another crawl, since the directories were scanned
+        clear_directory_indexes()
+
+        try:
+            for request in self._get_poll_requests():
+                self._crawl_request(request)
+        finally:
+            self._schedule_poll()
+            self.crawler.signals.send_catch_log(signal=kbo_signals.watch_polled, spider=self)
+
+    def _get_poll_interval(self, now):
+        # new clips tend to come in batches, e.g. the full and condensed games of a series
+        if self._num_new_clips > 0 or is_within_hours(now, WATCH_PEAK_HOURS):
+            return self.settings.getint('KBO_WATCH_PEAK_INTERVAL', DEFAULT_WATCH_PEAK_INTERVAL)
+
+        if is_within_hours(now, WATCH_OFF_PEAK_HOURS):
+            return self.settings.getint('KBO_WATCH_OFF_PEAK_INTERVAL', DEFAULT_WATCH_OFF_PEAK_INTERVAL)
+
+        return self.settings.getint('KBO_WATCH_INTERVAL', DEFAULT_WATCH_INTERVAL)
+
+    def _get_poll_requests(self):
+        self._roll_date_range(datetime.datetime.now(KST_TZINFO))
+
+        if self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
+            # pick up the full games stored by another crawl since the last poll
+            self._full_game_feed = None
+
+        for search_clip_type in NAVER_TV_TARGET_CLIP_TYPES[self.clip_type]:
+            yield self._get_search_page_request(
+                1,
+                do_paginate=False,
+                search_clip_type=search_clip_type
+            ).replace(dont_filter=True)
+
+    def _roll_date_range(self, now):
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if today > self.end_date:
+            self.start_date = self.start_date + (today - self.end_date)
+            self.end_date = today
+
+    def _get_reactor(self):
+        from twisted.internet import reactor
+
+        return reactor
+
+    def _crawl_request(self, request):
+        try:
+            self.crawler.engine.crawl(request)
+        except TypeError:
+            # Scrapy versions before 2.6 also require the spider
+            self.crawler.engine.crawl(request, self)
+
+    def _inc_stats_value(self, key):
+        if getattr(self, 'crawler', None) is not None:
+            self.crawler.stats.inc_value(key)
+
+    def _parse_backfill_response(self, response):
+        last_page_number = self._get_last_page_number(self._get_paging(response))
+
+        self._backfill = {
+            'low_page_number': 1,
+            'high_page_number': last_page_number,
+            'last_page_number': last_page_number,
+            'first_page_number': None,
+            'matching_page_number': None,
+            'clip_dates_by_page_number': {}
+        }
+
+        yield from self._get_next_backfill_requests()
+
+    def _parse_backfill_probe_response(self, response, page_number):
+        search_results = self._get_search_results(response)
+        probe_clips = {}
+
+        for search_result in search_results[:1] + search_results[-1:]:
+            parsed_clip = self._parse_search_result(search_result)
+            probe_clips[parsed_clip.get('clip_id')] = parsed_clip
+
+        search_page = {
+            'next_page_number': None,
+            'num_pending_clips': len(probe_clips),
+            'clip_dates': [],
+            'backfill_page_number': page_number
+        }
+
+        if len(probe_clips) == 0:
+            yield from self._finish_backfill_probe(search_page)
+            return
+
+        for parsed_clip in probe_clips.values():
+            clip_metadata = self._get_clip_metadata(parsed_clip)
+
+            if clip_metadata is not None:
+                self._set_clip_date(
+                    parsed_clip,
+                    self._get_clip_metadata_date(clip_metadata)
+                )
+
+                yield from self._finish_search_page_clip(search_page, parsed_clip)
+                continue
 
-        if next_page_number:
             yield scrapy.Request(
-                self._get_naver_tv_search_clip_url(next_page_number),
-                callback=self._parse_search_clip_response
+                url=parsed_clip.get('url'),
+                callback=self._parse_backfill_clip_response,
+                errback=self._handle_clip_error,
+                cb_kwargs={'parsed_clip': parsed_clip, 'search_page': search_page},
+                dont_filter=True
             )
 
-    def _parse_clip_response(self, response, parsed_clip):
+    def _parse_backfill_clip_response(self, response, parsed_clip, search_page):
         clip_date_text = self._get_clip_date_text(response)
         clip_date_parsed = self._parse_date_text(clip_date_text)
 
         if clip_date_parsed:
-            parsed_clip['year'] = clip_date_parsed.year
-            parsed_clip['month'] = clip_date_parsed.month
-            parsed_clip['day'] = clip_date_parsed.day
-
-            if self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
-                parsed_clip['away_team_name'] = self._get_away_team_name_from_full_game_feed(
-                    parsed_clip.get('home_team_name'),
-                    clip_date_parsed
+            self._set_clip_date(parsed_clip, clip_date_parsed)
+            self._add_clip_metadata(parsed_clip)
+
+        yield from self._finish_search_page_clip(search_page, parsed_clip)
+
+    def _handle_clip_error(self, failure):
+        self.logger.error(
+            "Could not fetch clip page {url}: {error}".format(
+                url=failure.request.url,
+                error=failure.value
+            )
+        )
+
+        if self.do_watch is True:
+            self._retry_clip(failure.request.cb_kwargs.get('parsed_clip'), failure.value)
+
+        yield from self._finish_search_page_clip(
+            failure.request.cb_kwargs.get('search_page'),
+            failure.request.cb_kwargs.get('parsed_clip')
+        )
+
+    def _get_remaining_search_page_requests(self, search_clip_response, search_clip_type):
+        paging = self._get_paging(search_clip_response)
+        current_page_number = self._get_current_page_number(paging)
+        last_page_number = min(
+            self._get_last_page_number(paging),
+            current_page_number + self.max_num_pages - 1
+        )
+
+        for page_number in range(current_page_number + 1, last_page_number + 1):
+            yield self._get_search_page_request(
+                page_number,
+                do_paginate=False,
+                search_clip_type=search_clip_type
+            )
+
+    def _get_search_page(self, next_page_number, num_search_results, search_clip_type):
+        if self.do_stop_at_start_date is False or next_page_number is None:
+            return None
+
+        return {
+            'next_page_number': next_page_number,
+            'num_pending_clips': num_search_results,
+            'clip_dates': [],
+            'search_clip_type': search_clip_type
+        }
+
+    def _finish_search_page_clip(self, search_page, parsed_clip):
+        if search_page is None:
+            return
+
+        search_page['clip_dates'].append(self._get_clip_date(parsed_clip))
+        search_page['num_pending_clips'] = search_page['num_pending_clips'] - 1
+
+        if search_page['num_pending_clips'] == 0:
+            if 'backfill_page_number' in search_page:
+                yield from self._finish_backfill_probe(search_page)
+            else:
+                yield from self._get_next_search_page_requests(search_page)
+
+    def _finish_backfill_probe(self, search_page):
+        self._backfill['clip_dates_by_page_number'][search_page['backfill_page_number']] = search_page['clip_dates']
+
+        yield from self._get_next_backfill_requests()
+
+    def _get_next_backfill_requests(self):
+        backfill = self._backfill
+
+        while backfill['low_page_number'] <= backfill['high_page_number']:
+            page_number = (backfill['low_page_number'] + backfill['high_page_number']) // 2
+            clip_dates = backfill['clip_dates_by_page_number'].get(page_number)
+
+            if clip_dates is None:
+                yield scrapy.Request(
+                    self._get_naver_tv_search_clip_url(page_number),
+                    callback=self._parse_backfill_probe_response,
+                    cb_kwargs={'page_number': page_number},
+                    dont_filter=True
                 )
+                return
+
+            if backfill['first_page_number'] is None:
+                if self._has_clips_until_end_date(clip_dates):
+                    backfill['matching_page_number'] = page_number
+                    backfill['high_page_number'] = page_number - 1
+                else:
+                    backfill['low_page_number'] = page_number + 1
+            else:
+                if self._has_clips_from_start_date(clip_dates):
+                    backfill['matching_page_number'] = page_number
+                    backfill['low_page_number'] = page_number + 1
+                else:
+                    backfill['high_page_number'] = page_number - 1
+
+        if backfill['matching_page_number'] is None:
+            self.logger.info(
+                "No search result pages within target date range ({start_date} - {end_date})".format(
+                    start_date=self.start_date.strftime('%x'),
+                    end_date=self.end_date.strftime('%x')
+                )
+            )
+            return
 
-        yield parsed_clip
+        if backfill['first_page_number'] is None:
+            backfill['first_page_number'] = backfill['matching_page_number']
+            backfill['matching_page_number'] = None
+            backfill['low_page_number'] = backfill['first_page_number']
+            backfill['high_page_number'] = backfill['last_page_number']
+
+            yield from self._get_next_backfill_requests()
+            return
+
+        first_page_number = backfill['first_page_number']
+        last_page_number = min(
+            backfill['matching_page_number'],
+            first_page_number + self.max_num_pages - 1
+        )
+
+        self.logger.info(
+            "Backfilling search result pages {first_page_number} - {last_page_number}".format(
+                first_page_number=first_page_number,
+                last_page_number=last_page_number
+            )
+        )
+
+        # the first search page was already requested to start the backfill
+        for page_number in range(first_page_number, last_page_number + 1):
+            yield self._get_search_page_request(page_number, do_paginate=False).replace(dont_filter=True)
 
-    def _get_naver_tv_search_clip_url(self, page_number):
+    def _has_clips_until_end_date(self, clip_dates):
+        if len(clip_dates) == 0 or None in clip_dates:
+            return True
+
+        return min(clip_dates) <= self.end_date
+
+    def _has_clips_from_start_date(self, clip_dates):
+        if None in clip_dates:
+            return True
+
+        return len(clip_dates) > 0 and max(clip_dates) >= self.start_date
+
+    def _get_next_search_page_requests(self, search_page):
+        if search_page['next_page_number'] is None:
+            return
+
+        if self._is_search_page_before_start_date(search_page):
+            self.logger.info(
+                "Stopping pagination before page {page_number}: all clips are older than {start_date}".format(
+                    page_number=search_page['next_page_number'],
+                    start_date=self.start_date.strftime('%x')
+                )
+            )
+            return
+
+        yield self._get_search_page_request(
+            search_page['next_page_number'],
+            search_clip_type=search_page['search_clip_type']
+        )
+
+    def _is_search_page_before_start_date(self, search_page):
+        clip_dates = search_page['clip_dates']
+
+        if len(clip_dates) == 0:
+            return False
+
+        return all(
+            clip_date is not None and clip_date < self.start_date
+            for clip_date in clip_dates
+        )
+
+    def _get_search_page_request(self, page_number, do_paginate=True, search_clip_type=None):
+        if search_clip_type is None:
+            search_clip_type = self.clip_type
+
+        return scrapy.Request(
+            self._get_naver_tv_search_clip_url(page_number, search_clip_type),
+            callback=self._parse_search_clip_response,
+            cb_kwargs={'do_paginate': do_paginate, 'search_clip_type': search_clip_type},
+            priority=-page_number
+        )
+
+    def _set_clip_date(self, parsed_clip, clip_date_parsed):
+        parsed_clip['year'] = clip_date_parsed.year
+        parsed_clip['month'] = clip_date_parsed.month
+        parsed_clip['day'] = clip_date_parsed.day
+
+        if self._should_resolve_away_team_name(parsed_clip):
+            parsed_clip['away_team_name'] = self._get_away_team_name_from_full_game_feed(
+                parsed_clip.get('home_team_name'),
+                clip_date_parsed
+            )
+
+    def _should_resolve_away_team_name(self, parsed_clip):
         if self.clip_type == NAVER_TV_CLIP_TYPE_FULL_GAME:
+            return False
+
+        return parsed_clip.get('clip_type') == NAVER_TV_CLIP_TYPE_CONDENSED_GAME
+
+    def _get_resolved_clips(self, parsed_clip):
+        if self.clip_type != NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME:
+            yield parsed_clip
+            return
+
+        clip_date = self._get_clip_date(parsed_clip)
+
+        if clip_date is None:
+            yield parsed_clip
+            return
+
+        full_game_feed_key = self._get_full_game_feed_key(
+            parsed_clip.get('home_team_name'),
+            clip_date.year,
+            clip_date.month,
+            clip_date.day
+        )
+
+        if parsed_clip.get('clip_type') == NAVER_TV_CLIP_TYPE_FULL_GAME:
+            self._get_full_game_feed().setdefault(full_game_feed_key, []).append(dict(parsed_clip))
+
+            yield parsed_clip
+
+            for pending_clip in self._get_pending_condensed_game_clips().pop(full_game_feed_key, []):
+                pending_clip['away_team_name'] = self._get_away_team_name_from_full_game_feed(
+                    pending_clip.get('home_team_name'),
+                    clip_date
+                )
+
+                yield pending_clip
+
+            return
+
+        # the full game of a condensed game is usually uploaded first, but may not have been crawled yet
+        if len(self._get_full_game_feed_matches(parsed_clip.get('home_team_name'), clip_date)) == 0:
+            self._get_pending_condensed_game_clips().setdefault(full_game_feed_key, []).append(parsed_clip)
+            return
+
+        yield parsed_clip
+
+    def _get_pending_condensed_game_clips(self):
+        if self._pending_condensed_game_clips is None:
+            self._pending_condensed_game_clips = {}
+
+        return self._pending_condensed_game_clips
+
+    def _get_clip_date(self, parsed_clip):
+        if None in [parsed_clip.get('year'), parsed_clip.get('month'), parsed_clip.get('day')]:
+            return None
+
+        return datetime.datetime(
+            year=parsed_clip.get('year'),
+            month=parsed_clip.get('month'),
+            day=parsed_clip.get('day'),
+            tzinfo=KST_TZINFO
+        )
+
+    def _get_clip_metadata_date(self, clip_metadata):
+        return datetime.datetime(
+            year=clip_metadata['year'],
+            month=clip_metadata['month'],
+            day=clip_metadata['day'],
+            tzinfo=KST_TZINFO
+        )
+
+    def _get_clip_metadata(self, parsed_clip):
+        clip_metadata_store = self._get_clip_metadata_store()
+
+        if clip_metadata_store is None:
+            return None
+
+        return clip_metadata_store.get(parsed_clip.get('clip_id'))
+
+    def _add_clip_metadata(self, parsed_clip):
+        clip_metadata_store = self._get_clip_metadata_store()
+
+        if clip_metadata_store is None:
+            return
+
+        clip_metadata_store.add(
+            parsed_clip.get('clip_id'),
+            parsed_clip.get('year'),
+            parsed_clip.get('month'),
+            parsed_clip.get('day'),
+            length=parsed_clip.get('length'),
+            channel_path=parsed_clip.get('channel_path')
+        )
+
+    def _get_clip_metadata_store(self):
+        if self._clip_metadata_store is None and self.clip_metadata_store_path is not None:
+            self._clip_metadata_store = ClipMetadataStore(self.clip_metadata_store_path)
+
+        return self._clip_metadata_store
+
+    def _get_naver_tv_search_clip_url(self, page_number, search_clip_type=None):
+        if search_clip_type is None:
+            search_clip_type = self.clip_type
+
+        if search_clip_type == NAVER_TV_CLIP_TYPE_FULL_GAME:
             query = NAVER_TV_SEARCH_CLIP_FULL_GAME_QUERY.copy()
-        elif self.clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
+        elif search_clip_type == NAVER_TV_CLIP_TYPE_CONDENSED_GAME:
             query = NAVER_TV_SEARCH_CLIP_CONDENSED_GAME_QUERY.copy()
 
         query['page'] = page_number
@@ -229,29 +929,24 @@ class NaverTvSpider(scrapy.Spider):
         ))
 
     def _parse_search_result(self, search_result):
-        if self._is_full_game_search_result(search_result):
-            return self._parse_full_game_search_result(search_result)
+        clip_title_parsed = NAVER_TV_CLIP_TITLE_REGEX.fullmatch(
+            self._get_clip_title_text(search_result) or ''
+        )
 
-        if self._is_condensed_game_search_result(search_result):
-            return self._parse_condensed_game_search_result(search_result)
+        if clip_title_parsed is None:
+            return self._parse_unknown_search_result(search_result)
 
-        return self._parse_unknown_search_result(search_result)
+        if clip_title_parsed.group('home_team_name') is not None:
+            return self._parse_full_game_search_result(search_result, clip_title_parsed)
 
-    def _is_full_game_search_result(self, search_result):
-        return NAVER_TV_CLIP_FULL_GAME_TITLE_REGEX.fullmatch(
-            self._get_clip_title_text(search_result)
-        )
+        return self._parse_condensed_game_search_result(search_result)
 
-    def _parse_full_game_search_result(self, search_result):
+    def _parse_full_game_search_result(self, search_result, clip_title_parsed):
         clip_url_text = self._get_clip_url_text(search_result)
-        clip_title_text = self._get_clip_title_text(search_result)
         clip_length_text = self._get_clip_length_text(search_result)
         channel_url_text = self._get_channel_url_text(search_result)
 
         clip_url_parsed = urllib.parse.urlparse(clip_url_text)
-        clip_title_parsed = NAVER_TV_CLIP_FULL_GAME_TITLE_REGEX.match(
-            clip_title_text
-        )
         clip_length_parsed = self._get_clip_length_parsed(clip_length_text)
         channel_url_parsed = urllib.parse.urlparse(channel_url_text)
 
@@ -276,11 +971,6 @@ class NaverTvSpider(scrapy.Spider):
             away_team_name=away_team_name
         )
 
-    def _is_condensed_game_search_result(self, search_result):
-        return NAVER_TV_CLIP_CONDENSED_GAME_TITLE_REGEX.fullmatch(
-            self._get_clip_title_text(search_result)
-        )
-
     def _parse_condensed_game_search_result(self, search_result):
         clip_url_text = self._get_clip_url_text(search_result)
         clip_length_text = self._get_clip_length_text(search_result)
@@ -308,7 +998,6 @@ class NaverTvSpider(scrapy.Spider):
 
     def _parse_unknown_search_result(self, search_result):
         clip_url_text = self._get_clip_url_text(search_result)
-        clip_title_text = self._get_clip_title_text(search_result)
         clip_length_text = self._get_clip_length_text(search_result)
         channel_url_text = self._get_channel_url_text(search_result)
 
@@ -332,6 +1021,13 @@ class NaverTvSpider(scrapy.Spider):
         )
 
     def _parse_date_text(self, date_text):
+        parsed_datetime = self._parse_date_text_fast(date_text)
+
+        if parsed_datetime is not None:
+            return parsed_datetime
+
+        import dateparser
+
         parsed_datetime = dateparser.parse(date_text)
 
         if parsed_datetime is not None:
@@ -341,47 +1037,62 @@ class NaverTvSpider(scrapy.Spider):
 
         return parsed_datetime
 
+    def _parse_date_text_fast(self, date_text):
+        if isinstance(date_text, str) is False:
+            return None
+
+        date_text_parsed = NAVER_TV_CLIP_DATE_REGEX.match(date_text)
+
+        if date_text_parsed is None:
+            return None
+
+        try:
+            return datetime.datetime(
+                year=int(date_text_parsed.group('year')),
+                month=int(date_text_parsed.group('month')),
+                day=int(date_text_parsed.group('day')),
+                tzinfo=KST_TZINFO
+            )
+        except ValueError:
+            return None
+
     def _get_search_results(self, search_clip_response):
-        return (
-            search_clip_response.css('div#clip_list')
-                                .css('div.thl')
-                                .css('div.thl_a')
-        )
+        search_results = []
+
+        for search_result_element in NAVER_TV_SEARCH_RESULTS_XPATH(search_clip_response.selector.root):
+            clip_link_elements = NAVER_TV_SEARCH_RESULT_CLIP_LINK_XPATH(search_result_element)
+            clip_length_texts = NAVER_TV_SEARCH_RESULT_CLIP_LENGTH_XPATH(search_result_element)
+            channel_url_texts = NAVER_TV_SEARCH_RESULT_CHANNEL_URL_XPATH(search_result_element)
+
+            search_results.append({
+                'clip_length_text': str(clip_length_texts[0]) if clip_length_texts else None,
+                'clip_title_text': self._get_first_attribute(clip_link_elements, 'title'),
+                'clip_url_text': self._get_first_attribute(clip_link_elements, 'href'),
+                'channel_url_text': str(channel_url_texts[0]) if channel_url_texts else None
+            })
+
+        return search_results
+
+    def _get_first_attribute(self, elements, attribute_name):
+        for element in elements:
+            attribute_value = element.get(attribute_name)
+
+            if attribute_value is not None:
+                return attribute_value
+
+        return None
 
     def _get_clip_length_text(self, search_result):
-        return (
-            search_result.css('a.cds_thm')
-                         .css('span.tm_b::text')
-                         .get()
-        )
+        return search_result['clip_length_text']
 
     def _get_clip_title_text(self, search_result):
-        return (
-            search_result.css('div.inner')
-                         .css('dl')
-                         .css('dt')
-                         .css('a::attr(title)')
-                         .get()
-        )
+        return search_result['clip_title_text']
 
     def _get_clip_url_text(self, search_result):
-        return (
-            search_result.css('div.inner')
-                         .css('dl')
-                         .css('dt')
-                         .css('a::attr(href)')
-                         .get()
-        )
+        return search_result['clip_url_text']
 
     def _get_channel_url_text(self, search_result):
-        return (
-            search_result.css('div.inner')
-                         .css('dl')
-                         .css('dd')
-                         .css('span.ch_txt')
-                         .css('a::attr(href)')
-                         .get()
-        )
+        return search_result['channel_url_text']
 
     def _get_clip_date_text(self, clip_response):
         return (
@@ -427,34 +1138,73 @@ class NaverTvSpider(scrapy.Spider):
     def _get_away_team_name_from_full_game_feed(self,
                                                 home_team_name,
                                                 clip_date_parsed):
-        for row in self._get_full_game_feed():
-            is_match = (
-                row['home_team_name'] == home_team_name and
-                int(row['year']) == clip_date_parsed.year and
-                int(row['month']) == clip_date_parsed.month and
-                int(row['day']) == clip_date_parsed.day
-            )
+        away_team_names = set(
+            row['away_team_name']
+            for row in self._get_full_game_feed_matches(home_team_name, clip_date_parsed)
+        )
 
-            if is_match:
-                return row['away_team_name']
+        if len(away_team_names) == 1:
+            return away_team_names.pop()
 
         return KBO_LEAGUE_TEAM_NAME_UNKNOWN
 
+    def _get_full_game_feed_matches(self, home_team_name, clip_date_parsed):
+        return self._get_full_game_feed().get(
+            self._get_full_game_feed_key(
+                home_team_name,
+                clip_date_parsed.year,
+                clip_date_parsed.month,
+                clip_date_parsed.day
+            ),
+            []
+        )
+
+    def _get_full_game_feed_key(self, home_team_name, year, month, day):
+        return (home_team_name, int(year), int(month), int(day))
+
     def _get_full_game_feed(self):
         if self._full_game_feed is None:
-            with open(self.full_game_feed_path) as csv_file:
-                csv_reader = csv.DictReader(csv_file)
-                self._full_game_feed = [row for row in csv_reader]
+            self._full_game_feed = {}
+
+            for row in self._get_full_game_feed_rows():
+                if not (row.get('year') and row.get('month') and row.get('day')):
+                    continue
+
+                key = self._get_full_game_feed_key(
+                    row['home_team_name'],
+                    row['year'],
+                    row['month'],
+                    row['day']
+                )
+                self._full_game_feed.setdefault(key, []).append(row)
 
         return self._full_game_feed
 
-    def _increment_num_pages(self):
+    def _get_full_game_feed_rows(self):
+        if self.full_game_store_path is not None:
+            full_game_store = FullGameStore(self.full_game_store_path)
+
+            try:
+                return full_game_store.get_by_date_range(
+                    self.start_date,
+                    self.end_date
+                )
+            finally:
+                full_game_store.close()
+
+        if self.full_game_feed_path is not None:
+            with open(self.full_game_feed_path) as csv_file:
+                return list(csv.DictReader(csv_file))
+
+        return []
+
+    def _increment_num_pages(self, search_clip_type):
         if self._num_pages is None:
-            self._num_pages = 0
+            self._num_pages = {}
 
-        self._num_pages = self._num_pages + 1
+        self._num_pages[search_clip_type] = self._num_pages.get(search_clip_type, 0) + 1
 
-    def _get_next_page_number(self, search_clip_response):
+    def _get_next_page_number(self, search_clip_response, search_clip_type):
         paging = self._get_paging(search_clip_response)
         current_page_number = self._get_current_page_number(paging)
         last_page_number = self._get_last_page_number(paging)
@@ -462,7 +1212,7 @@ class NaverTvSpider(scrapy.Spider):
         if current_page_number == last_page_number:
             return None
 
-        if self._num_pages == self.max_num_pages:
+        if self._num_pages.get(search_clip_type) == self.max_num_pages:
             return None
 
         return current_page_number + 1
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import sqlite3
+import threading
+
+from kbo.constants import NAVER_TV_CLIP_TYPE_FULL_GAME
+
+
+class FullGameStore:
+
+    _fields = [
+        'clip_id',
+        'clip_type',
+        'url',
+        'length',
+        'channel_path',
+        'home_team_name',
+        'away_team_name',
+        'year',
+        'month',
+        'day'
+    ]
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def add(self, item):
+        return self.add_many([item]) == 1
+
+    def add_many(self, items):
+        rows = [self._get_row(item) for item in items]
+
+        with self._lock, self._connection:
+            total_changes_before = self._connection.total_changes
+            self._connection.executemany(
+                '''
+                INSERT OR IGNORE INTO full_games (
+                    clip_id,
+                    clip_type,
+                    url,
+                    length,
+                    channel_path,
+                    home_team_name,
+                    away_team_name,
+                    year,
+                    month,
+                    day,
+                    game_date
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                rows
+            )
+
+            return self._connection.total_changes - total_changes_before
+
+    def import_csv(self, csv_file_path):
+        with open(csv_file_path) as csv_file:
+            csv_reader = csv.DictReader(csv_file)
+
+            return self.add_many(
+                row for row in csv_reader
+                if row.get('clip_type', NAVER_TV_CLIP_TYPE_FULL_GAME) == NAVER_TV_CLIP_TYPE_FULL_GAME and
+                row.get('year') and row.get('month') and row.get('day')
+            )
+
+    def get_by_date_range(self, start_date, end_date):
+        with self._lock:
+            cursor = self._connection.execute(
+                '''
+                SELECT * FROM full_games
+                WHERE game_date BETWEEN ? AND ?
+                ORDER BY game_date, clip_id
+                ''',
+                (
+                    start_date.strftime('%Y-%m-%d'),
+                    end_date.strftime('%Y-%m-%d')
+                )
+            )
+
+            return [
+                {field: row[field] for field in self._fields}
+                for row in cursor
+            ]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _create_schema(self):
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS full_games (
+                    clip_id TEXT PRIMARY KEY,
+                    clip_type TEXT NOT NULL,
+                    url TEXT,
+                    length INTEGER,
+                    channel_path TEXT,
+                    home_team_name TEXT NOT NULL,
+                    away_team_name TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
+                    game_date TEXT NOT NULL
+                )
+                '''
+            )
+            self._connection.execute(
+                '''
+                CREATE INDEX IF NOT EXISTS full_games_game_date
+                ON full_games (game_date, home_team_name)
+                '''
+            )
+
+    def _get_row(self, item):
+        year = int(item.get('year'))
+        month = int(item.get('month'))
+        day = int(item.get('day'))
+        length = item.get('length')
+
+        return (
+            str(item.get('clip_id')),
+            item.get('clip_type', NAVER_TV_CLIP_TYPE_FULL_GAME),
+            item.get('url'),
+            int(length) if length not in [None, ''] else None,
+            item.get('channel_path'),
+            item.get('home_team_name'),
+            item.get('away_team_name'),
+            year,
+            month,
+            day,
+            "{year}-{month:02d}-{day:02d}".format(year=year, month=month, day=day)
+        )
+
+
+class ClipMetadataStore:
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def get(self, clip_id):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT * FROM clip_metadata WHERE clip_id = ?',
+                (str(clip_id),)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            'clip_id': row['clip_id'],
+            'length': row['length'],
+            'channel_path': row['channel_path'],
+            'year': row['year'],
+            'month': row['month'],
+            'day': row['day']
+        }
+
+    def add(self, clip_id, year, month, day, length=None, channel_path=None):
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''
+                INSERT OR REPLACE INTO clip_metadata (
+                    clip_id,
+                    length,
+                    channel_path,
+                    year,
+                    month,
+                    day
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (str(clip_id), length, channel_path, year, month, day)
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _create_schema(self):
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS clip_metadata (
+                    clip_id TEXT PRIMARY KEY,
+                    length INTEGER,
+                    channel_path TEXT,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    day INTEGER NOT NULL
+                )
+                '''
+            )
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+
+from scrapy.exceptions import DropItem
+
+from kbo.constants import (
+    DEFAULT_MAX_CLIP_LENGTHS,
+    DEFAULT_MIN_CLIP_LENGTHS,
+    KBO_LEAGUE_TEAM_NAME_UNKNOWN,
+    KST_TZINFO,
+    NAVER_TV_CHANNEL_PATHS,
+    NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+    NAVER_TV_TARGET_CLIP_TYPES
+)
+
+
+def validate_clip_type(item, spider):
+    if item.get('clip_type') not in NAVER_TV_TARGET_CLIP_TYPES[spider.clip_type]:
+        raise DropItem(
+            "Clip type ({clip_type}) does not match {target_clip_type}".format(
+                clip_type=item.get('clip_type'),
+                target_clip_type=spider.clip_type
+            )
+        )
+
+
+def validate_clip_length(item, spider):
+    min_clip_length = _get_min_clip_length(item, spider)
+    max_clip_length = _get_max_clip_length(item, spider)
+
+    if min_clip_length is not None:
+        if item.get('length') < min_clip_length:
+            raise DropItem(
+                "Clip length ({clip_length} seconds) shorter than {target_min_clip_length} seconds".format(
+                    clip_length=item.get('length'),
+                    target_min_clip_length=min_clip_length
+                )
+            )
+
+    if max_clip_length is not None:
+        if item.get('length') > max_clip_length:
+            raise DropItem(
+                "Clip length ({clip_length} seconds) longer than {target_max_clip_length} seconds".format(
+                    clip_length=item.get('length'),
+                    target_max_clip_length=max_clip_length
+                )
+            )
+
+
+def validate_channel_path(item):
+    if item.get('channel_path') not in NAVER_TV_CHANNEL_PATHS:
+        raise DropItem(
+            "Clip channel ({clip_channel_path}) is not a KBO League team channel".format(
+                clip_channel_path=item.get('channel_path')
+            )
+        )
+
+
+def validate_clip_date(item, spider):
+    if None in [item.get('year'), item.get('month'), item.get('day')]:
+        raise DropItem('Clip date unknown')
+
+    item_datetime = datetime.datetime(
+        year=item.get('year'),
+        month=item.get('month'),
+        day=item.get('day'),
+        tzinfo=KST_TZINFO
+    )
+
+    date_range_match = (
+        item_datetime >= spider.start_date and
+        item_datetime <= spider.end_date
+    )
+
+    if date_range_match is False:
+        raise DropItem(
+            "Clip date ({clip_date}) not within target date range ({target_start_date} - {target_end_date})".format(
+                clip_date=item_datetime.strftime('%x'),
+                target_start_date=spider.start_date.strftime('%x'),
+                target_end_date=spider.end_date.strftime('%x')
+            )
+        )
+
+
+def validate_home_team_name(item):
+    if item.get('home_team_name') == KBO_LEAGUE_TEAM_NAME_UNKNOWN:
+        raise DropItem('Home team name unknown')
+
+
+def validate_team_names(item, spider):
+    validate_home_team_name(item)
+
+    if item.get('away_team_name') == KBO_LEAGUE_TEAM_NAME_UNKNOWN:
+        raise DropItem('Away team name unknown')
+
+    team_name_match = (
+        spider.team_name is None or
+        spider.team_name in [
+            item.get('home_team_name'),
+            item.get('away_team_name')
+        ]
+    )
+
+    if team_name_match is False:
+        raise DropItem(
+            "Target team name {team_name} does not match clip team names (home: {home_team_name}, away: {away_team_name})".format(
+                team_name=spider.team_name,
+                home_team_name=item.get('home_team_name'),
+                away_team_name=item.get('away_team_name')
+            )
+        )
+
+
+def _get_min_clip_length(item, spider):
+    # a crawl of both clip types falls back to the default of each clip's own type
+    if spider.min_clip_length is None and spider.clip_type == NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME:
+        return DEFAULT_MIN_CLIP_LENGTHS.get(item.get('clip_type'))
+
+    return spider.min_clip_length
+
+
+def _get_max_clip_length(item, spider):
+    if spider.max_clip_length is None and spider.clip_type == NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME:
+        return DEFAULT_MAX_CLIP_LENGTHS.get(item.get('clip_type'))
+
+    return spider.max_clip_length
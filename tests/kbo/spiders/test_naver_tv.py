@@ -1,15 +1,103 @@
 # -*- coding: utf-8 -*-
 
+import csv
 import datetime
+import os
+import subprocess
+import sys
 import tempfile
+import urllib.parse
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
 
+import dateparser
+import scrapy
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.exceptions import DropItem
+from scrapy.utils.test import get_crawler
+from twisted.internet import task
+
+from kbo import signals as kbo_signals
 from kbo.constants import (
+    DEFAULT_WATCH_OFF_PEAK_INTERVAL,
+    KBO_LEAGUE_TEAM_NAME_UNKNOWN,
     KST_TZINFO,
     NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
-    NAVER_TV_CLIP_TYPE_FULL_GAME
+    NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_GAME,
+    NAVER_TV_CLIP_TYPE_UNKNOWN,
+    NAVER_TV_SEARCH_CLIP_CONDENSED_GAME_QUERY,
+    WATCH_RETRY_BACKOFF,
+    WATCH_RETRY_BACKOFF_MAX
 )
+from kbo.directory_index import clear_directory_indexes, file_exists, get_directory_index
 from kbo.spiders.naver_tv import NaverTvSpider
+from kbo.stores import FullGameStore
+
+
+def _get_search_clip_response(page_number,
+                              last_page_number,
+                              clip_ids=(13820293,),
+                              clip_title='NC-SK 풀영상',
+                              clip_length_text='4:23:33'):
+    search_results = ''.join(
+        '''
+            <div class="thl"><div class="thl_a">
+                <a class="cds_thm"><span class="tm_b">{clip_length_text}</span></a>
+                <div class="inner"><dl>
+                    <dt><a href="/v/{clip_id}" title="{clip_title}"></a></dt>
+                    <dd><span class="ch_txt"><a href="/wyvernsvod"></a></span></dd>
+                </dl></div>
+            </div></div>
+        '''.format(clip_id=clip_id, clip_title=clip_title, clip_length_text=clip_length_text)
+        for clip_id in clip_ids
+    )
+
+    return scrapy.http.HtmlResponse(
+        url="https://tv.naver.com/search/clip?page={page_number}".format(page_number=page_number),
+        body='''
+            <div id="clip_list">{search_results}</div>
+            <div id="clipPaging"><div class="paging_wrap">
+                <strong class="page"><span class="num">{page_number}</span></strong>
+                <a class="next_end" data-page="{last_page_number}"></a>
+            </div></div>
+        '''.format(
+            search_results=search_results,
+            page_number=page_number,
+            last_page_number=last_page_number
+        ),
+        encoding='utf-8'
+    )
+
+
+def _get_clip_response(date_text, clip_id=13820293):
+    return scrapy.http.HtmlResponse(
+        url="https://tv.naver.com/v/{clip_id}".format(clip_id=clip_id),
+        body='''
+            <div id="clipInfoArea"><div class="watch_title"><div class="title_info">
+                <div class="title_info"><span class="date">{date_text}</span></div>
+            </div></div></div>
+        '''.format(date_text=date_text),
+        encoding='utf-8'
+    )
+
+
+def _run_requests(requests, get_response):
+    pending_requests = list(requests)
+    requested_urls = []
+    items = []
+
+    while pending_requests:
+        request = pending_requests.pop(0)
+        requested_urls.append(request.url)
+
+        for result in request.callback(get_response(request.url), **request.cb_kwargs):
+            if isinstance(result, scrapy.Request):
+                pending_requests.append(result)
+            else:
+                items.append(result)
+
+    return requested_urls, items
 
 
 class NaverTvSpiderTestCase(TestCase):
@@ -216,3 +304,720 @@ class NaverTvSpiderTestCase(TestCase):
         self.assertFalse(sixth_spider.do_dry_run)
         self.assertFalse(seventh_spider.do_dry_run)
         self.assertFalse(eighth_spider.do_dry_run)
+
+    def test_gets_away_team_name_from_full_game_feed(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as full_game_feed_file:
+            csv_writer = csv.DictWriter(
+                full_game_feed_file,
+                ['clip_id', 'home_team_name', 'away_team_name', 'year', 'month', 'day']
+            )
+            csv_writer.writeheader()
+            csv_writer.writerows([
+                {'clip_id': 1, 'home_team_name': 'SK Wyverns', 'away_team_name': 'NC Dinos', 'year': 2020, 'month': 5, 'day': 16},
+                {'clip_id': 2, 'home_team_name': 'KT Wiz', 'away_team_name': 'LG Twins', 'year': 2020, 'month': 5, 'day': 16},
+                {'clip_id': 3, 'home_team_name': 'KT Wiz', 'away_team_name': 'LG Twins', 'year': 2020, 'month': 5, 'day': 16},
+                {'clip_id': 4, 'home_team_name': 'Kia Tigers', 'away_team_name': 'Hanwha Eagles', 'year': 2020, 'month': 5, 'day': 17},
+                {'clip_id': 5, 'home_team_name': 'Kia Tigers', 'away_team_name': 'Lotte Giants', 'year': 2020, 'month': 5, 'day': 17}
+            ])
+            full_game_feed_file.flush()
+
+            spider = NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                full_game_feed_path=full_game_feed_file.name,
+                do_dry_run=True
+            )
+
+            single_game_away_team_name = spider._get_away_team_name_from_full_game_feed(
+                'SK Wyverns',
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO)
+            )
+            doubleheader_away_team_name = spider._get_away_team_name_from_full_game_feed(
+                'KT Wiz',
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO)
+            )
+            ambiguous_away_team_name = spider._get_away_team_name_from_full_game_feed(
+                'Kia Tigers',
+                datetime.datetime(2020, 5, 17, tzinfo=KST_TZINFO)
+            )
+            missing_away_team_name = spider._get_away_team_name_from_full_game_feed(
+                'SK Wyverns',
+                datetime.datetime(2020, 5, 17, tzinfo=KST_TZINFO)
+            )
+            doubleheader_matches = spider._get_full_game_feed_matches(
+                'KT Wiz',
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO)
+            )
+
+        self.assertEqual('NC Dinos', single_game_away_team_name)
+        self.assertEqual('LG Twins', doubleheader_away_team_name)
+        self.assertEqual(KBO_LEAGUE_TEAM_NAME_UNKNOWN, ambiguous_away_team_name)
+        self.assertEqual(KBO_LEAGUE_TEAM_NAME_UNKNOWN, missing_away_team_name)
+        self.assertEqual(['2', '3'], [row['clip_id'] for row in doubleheader_matches])
+
+    def test_sets_full_game_store_path(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            full_game_store_path = os.path.join(tmp_dir_path, 'full_games.db')
+
+            full_game_spider = NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                full_game_store_path=full_game_store_path,
+                do_dry_run=True
+            )
+
+            with self.assertRaises(scrapy.exceptions.NotSupported):
+                NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                    full_game_store_path=full_game_store_path,
+                    do_dry_run=True
+                )
+
+            FullGameStore(full_game_store_path).close()
+
+            condensed_game_spider = NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                full_game_store_path=full_game_store_path,
+                do_dry_run=True
+            )
+
+        self.assertEqual(full_game_store_path, full_game_spider.full_game_store_path)
+        self.assertEqual(full_game_store_path, condensed_game_spider.full_game_store_path)
+        self.assertIsNone(condensed_game_spider.full_game_feed_path)
+
+    def test_resolves_condensed_games_from_full_games_found_in_same_crawl(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+            start_date='2020-05-16',
+            end_date='2020-05-16',
+            do_dry_run=True
+        )
+
+        def get_response(url):
+            if url.startswith('https://tv.naver.com/v/'):
+                return _get_clip_response('2020.05.16.', clip_id=int(url.rsplit('/', 1)[1]))
+
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)['query'][0]
+
+            if query == NAVER_TV_SEARCH_CLIP_CONDENSED_GAME_QUERY['query']:
+                return _get_search_clip_response(
+                    1,
+                    1,
+                    clip_ids=(13820411,),
+                    clip_title='[전체HL] NC vs SK',
+                    clip_length_text='9:51'
+                )
+
+            return _get_search_clip_response(1, 1)
+
+        start_requests = list(spider.start_requests())
+        # crawl the condensed game first, so it has to wait for its full game
+        requested_urls, items = _run_requests(reversed(start_requests), get_response)
+
+        self.assertEqual(
+            [NAVER_TV_CLIP_TYPE_FULL_GAME, NAVER_TV_CLIP_TYPE_CONDENSED_GAME],
+            [request.cb_kwargs['search_clip_type'] for request in start_requests]
+        )
+        self.assertEqual(
+            [
+                ('13820293', NAVER_TV_CLIP_TYPE_FULL_GAME, 'NC Dinos'),
+                ('13820411', NAVER_TV_CLIP_TYPE_CONDENSED_GAME, 'NC Dinos')
+            ],
+            [(item['clip_id'], item['clip_type'], item['away_team_name']) for item in items]
+        )
+
+    def test_logs_condensed_games_without_full_game_when_closed(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+            start_date='2020-05-16',
+            end_date='2020-05-16',
+            do_dry_run=True
+        )
+        search_clip_response = _get_search_clip_response(
+            1,
+            1,
+            clip_ids=(13820411,),
+            clip_title='[전체HL] NC vs SK',
+            clip_length_text='9:51'
+        )
+
+        clip_request = list(spider._parse_search_clip_response(
+            search_clip_response,
+            search_clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME
+        ))[0]
+        items = list(clip_request.callback(
+            _get_clip_response('2020.05.16.', clip_id=13820411),
+            **clip_request.cb_kwargs
+        ))
+
+        with self.assertLogs('naver_tv', level='WARNING') as logs:
+            spider.closed('finished')
+
+        self.assertEqual([], items)
+        self.assertIn('https://tv.naver.com/v/13820411', logs.output[0])
+
+    def test_does_not_support_backfill_for_full_and_condensed_game_clip_type(self):
+        with self.assertRaises(scrapy.exceptions.NotSupported):
+            NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+                do_backfill='true',
+                do_dry_run=True
+            )
+
+    def test_polls_first_search_result_pages_while_busy_in_watch_mode(self):
+        crawler = get_crawler(NaverTvSpider, {
+            'KBO_WATCH_PEAK_INTERVAL': 30,
+            'KBO_WATCH_INTERVAL': 30,
+            'KBO_WATCH_OFF_PEAK_INTERVAL': 30
+        })
+        spider = NaverTvSpider.from_crawler(
+            crawler,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+            do_watch='true',
+            do_dry_run=True
+        )
+        crawler.engine = MagicMock()
+        clock = task.Clock()
+
+        with patch.object(spider, '_get_reactor', return_value=clock):
+            spider._spider_opened(spider)
+            clock.advance(29)
+
+            self.assertEqual(0, crawler.engine.crawl.call_count)
+
+            clock.advance(1)
+
+        poll_requests = [call.args[0] for call in crawler.engine.crawl.call_args_list]
+
+        with self.assertRaises(scrapy.exceptions.DontCloseSpider):
+            spider._spider_idle()
+
+        spider.closed('finished')
+
+        self.assertEqual(
+            [NAVER_TV_CLIP_TYPE_FULL_GAME, NAVER_TV_CLIP_TYPE_CONDENSED_GAME],
+            [request.cb_kwargs['search_clip_type'] for request in poll_requests]
+        )
+        self.assertEqual([False, False], [request.cb_kwargs['do_paginate'] for request in poll_requests])
+        self.assertEqual([True, True], [request.dont_filter for request in poll_requests])
+        self.assertEqual(1, crawler.stats.get_value('kbo/watch/polls'))
+        self.assertEqual([], clock.getDelayedCalls())
+
+    def test_rescans_directories_and_signals_each_poll_in_watch_mode(self):
+        spider = NaverTvSpider.from_crawler(
+            get_crawler(NaverTvSpider),
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_watch='true',
+            do_dry_run=True
+        )
+        spider.crawler.engine = MagicMock()
+        polled_spiders = []
+
+        def watch_polled(spider):
+            polled_spiders.append(spider)
+
+        spider.crawler.signals.connect(watch_polled, signal=kbo_signals.watch_polled)
+        clock = task.Clock()
+
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            file_path = os.path.join(tmp_dir_path, 'clip.mp4')
+            get_directory_index(tmp_dir_path)
+
+            with open(file_path, 'wb'):
+                pass
+
+            with patch.object(spider, '_get_reactor', return_value=clock):
+                spider._spider_opened(spider)
+                clock.advance(DEFAULT_WATCH_OFF_PEAK_INTERVAL)
+
+            does_file_exist = file_exists(file_path)
+            spider.closed('finished')
+            clear_directory_indexes()
+
+        self.assertTrue(does_file_exist)
+        self.assertEqual([spider], polled_spiders)
+
+    def test_skips_clips_seen_by_previous_polls_in_watch_mode(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_watch='true',
+            do_dry_run=True
+        )
+
+        first_poll_results = list(spider._parse_search_clip_response(
+            _get_search_clip_response(1, 1, clip_ids=(13820293,)),
+            do_paginate=False
+        ))
+        second_poll_results = list(spider._parse_search_clip_response(
+            _get_search_clip_response(1, 1, clip_ids=(13820294, 13820293)),
+            do_paginate=False
+        ))
+
+        self.assertEqual(['https://tv.naver.com/v/13820293'], [result.url for result in first_poll_results])
+        self.assertEqual(['https://tv.naver.com/v/13820294'], [result.url for result in second_poll_results])
+
+    def test_retries_clips_dropped_for_reasons_that_may_go_away_in_watch_mode(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as full_game_feed_file:
+            spider = NaverTvSpider.from_crawler(
+                get_crawler(NaverTvSpider),
+                clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                start_date='2020-05-14',
+                end_date='2020-05-16',
+                full_game_feed_path=full_game_feed_file.name,
+                do_watch='true',
+                do_dry_run=True
+            )
+
+        search_clip_response = _get_search_clip_response(
+            1,
+            1,
+            clip_ids=(13820411, 13820412, 13820413),
+            clip_title='[전체HL] NC vs SK',
+            clip_length_text='9:51'
+        )
+
+        with patch('time.time', return_value=1589612400):
+            first_poll_results = list(spider._parse_search_clip_response(search_clip_response, do_paginate=False))
+            unresolved_clip, old_clip, failed_clip = [
+                dict(result.cb_kwargs['parsed_clip'])
+                for result in first_poll_results
+            ]
+            failure = MagicMock()
+            failure.request = first_poll_results[2]
+
+            spider._item_dropped(unresolved_clip, DropItem('Away team name unknown'))
+            spider._item_dropped(
+                old_clip,
+                DropItem('Clip date (05/01/20) not within target date range (05/14/20 - 05/16/20)')
+            )
+            list(spider._handle_clip_error(failure))
+            spider._num_new_clips = 0
+            second_poll_results = list(spider._parse_search_clip_response(search_clip_response, do_paginate=False))
+
+        with patch('time.time', return_value=1589612400 + WATCH_RETRY_BACKOFF):
+            third_poll_results = list(spider._parse_search_clip_response(search_clip_response, do_paginate=False))
+
+        self.assertEqual(3, len(first_poll_results))
+        self.assertEqual([], second_poll_results)
+        self.assertEqual(
+            ['https://tv.naver.com/v/13820411', 'https://tv.naver.com/v/13820413'],
+            [result.url for result in third_poll_results]
+        )
+        self.assertEqual(0, spider._num_new_clips)
+
+    def test_gives_up_on_clips_that_keep_being_dropped_in_watch_mode(self):
+        spider = NaverTvSpider.from_crawler(
+            get_crawler(NaverTvSpider, {'KBO_WATCH_RETRY_TIMES': 2}),
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_watch='true',
+            do_dry_run=True
+        )
+        search_clip_response = _get_search_clip_response(1, 1)
+        results_by_poll = []
+
+        with self.assertLogs('naver_tv', level='WARNING') as logs:
+            for poll_number in range(4):
+                with patch('time.time', return_value=1589612400 + poll_number * WATCH_RETRY_BACKOFF_MAX):
+                    results = list(spider._parse_search_clip_response(search_clip_response, do_paginate=False))
+                    results_by_poll.append(len(results))
+
+                    for result in results:
+                        spider._item_dropped(
+                            result.cb_kwargs['parsed_clip'],
+                            DropItem('Could not download clip: HTTP Error 503: Service Unavailable')
+                        )
+
+        self.assertEqual([1, 1, 1, 0], results_by_poll)
+        self.assertEqual(1, spider.crawler.stats.get_value('kbo/watch/retries_exhausted'))
+        self.assertIn('after 3 failed attempts', logs.output[0])
+
+    def test_polls_more_often_after_games_end_in_watch_mode(self):
+        crawler = get_crawler(NaverTvSpider, {
+            'KBO_WATCH_PEAK_INTERVAL': 30,
+            'KBO_WATCH_INTERVAL': 300,
+            'KBO_WATCH_OFF_PEAK_INTERVAL': 1800
+        })
+        spider = NaverTvSpider.from_crawler(
+            crawler,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_watch='true',
+            do_dry_run=True
+        )
+
+        poll_intervals = [
+            spider._get_poll_interval(datetime.datetime(2020, 5, 16, hour, tzinfo=KST_TZINFO))
+            for hour in [22, 1, 6, 14]
+        ]
+        spider._num_new_clips = 1
+        poll_interval_after_new_clips = spider._get_poll_interval(
+            datetime.datetime(2020, 5, 16, 14, tzinfo=KST_TZINFO)
+        )
+
+        self.assertEqual([30, 30, 1800, 300], poll_intervals)
+        self.assertEqual(30, poll_interval_after_new_clips)
+
+    def test_rolls_date_range_forward_in_watch_mode(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            start_date='2020-05-14',
+            end_date='2020-05-16',
+            do_watch='true',
+            do_dry_run=True
+        )
+
+        spider._roll_date_range(datetime.datetime(2020, 5, 18, 9, 30, tzinfo=KST_TZINFO))
+
+        self.assertEqual(datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO), spider.start_date)
+        self.assertEqual(datetime.datetime(2020, 5, 18, tzinfo=KST_TZINFO), spider.end_date)
+
+    def test_skips_clip_requests_for_clips_in_clip_metadata_store(self):
+        search_clip_response = _get_search_clip_response(1, 1)
+        clip_response = _get_clip_response('2020.05.16.')
+
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            first_spider, second_spider = (
+                NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    clip_metadata_store_path=os.path.join(tmp_dir_path, 'clip_metadata.db'),
+                    do_dry_run=True
+                )
+                for _ in range(2)
+            )
+
+            first_results = list(first_spider._parse_search_clip_response(search_clip_response))
+            clip_items = list(first_spider._parse_clip_response(
+                clip_response,
+                **first_results[0].cb_kwargs
+            ))
+            first_spider.closed('finished')
+            second_results = list(second_spider._parse_search_clip_response(search_clip_response))
+            second_spider.closed('finished')
+
+        self.assertIsInstance(first_results[0], scrapy.Request)
+        self.assertEqual(clip_items, second_results)
+        self.assertEqual(
+            (2020, 5, 16),
+            (second_results[0]['year'], second_results[0]['month'], second_results[0]['day'])
+        )
+
+    def test_stops_paging_when_clips_are_older_than_start_date(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            start_date='2020-05-16',
+            end_date='2020-05-18',
+            max_num_pages=5,
+            do_stop_at_start_date=True,
+            do_dry_run=True
+        )
+
+        first_clip_request = list(spider._parse_search_clip_response(
+            _get_search_clip_response(1, 3)
+        ))[0]
+        first_results = list(spider._parse_clip_response(
+            _get_clip_response('2020.05.16.'),
+            **first_clip_request.cb_kwargs
+        ))
+        second_clip_request = list(spider._parse_search_clip_response(
+            _get_search_clip_response(2, 3, clip_ids=(13820294,))
+        ))[0]
+        second_results = list(spider._parse_clip_response(
+            _get_clip_response('2020.05.15.', 13820294),
+            **second_clip_request.cb_kwargs
+        ))
+
+        self.assertEqual(2, len(first_results))
+        self.assertIn('page=2', first_results[1].url)
+        self.assertEqual(1, len(second_results))
+
+    def test_backfills_only_search_result_pages_within_date_range(self):
+        last_page_number = 200
+        newest_clip_date = datetime.date(2020, 9, 30)
+
+        def get_response(url):
+            url_parsed = urllib.parse.urlparse(url)
+
+            if url_parsed.path.startswith('/v/'):
+                clip_id = int(url_parsed.path.replace('/v/', ''))
+                clip_date = newest_clip_date - datetime.timedelta(days=clip_id - 1000)
+
+                return _get_clip_response(clip_date.strftime('%Y.%m.%d.'), clip_id)
+
+            page_number = int(urllib.parse.parse_qs(url_parsed.query)['page'][0])
+
+            return _get_search_clip_response(
+                page_number,
+                last_page_number,
+                [1000 + (page_number - 1) * 2, 1000 + (page_number - 1) * 2 + 1]
+            )
+
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            start_date='2020-09-10',
+            end_date='2020-09-13',
+            max_num_pages=5,
+            do_backfill=True,
+            do_dry_run=True
+        )
+
+        requested_urls, items = _run_requests(spider.start_requests(), get_response)
+
+        requested_page_numbers = [
+            int(urllib.parse.parse_qs(urllib.parse.urlparse(url).query)['page'][0])
+            for url in requested_urls
+            if '/search/' in url
+        ]
+        item_dates = set(
+            datetime.date(item['year'], item['month'], item['day'])
+            for item in items
+        )
+
+        self.assertLess(len(requested_page_numbers), 25)
+        self.assertEqual([9, 10, 11], requested_page_numbers[-3:])
+        self.assertTrue(
+            set(datetime.date(2020, 9, day) for day in range(10, 14)).issubset(item_dates)
+        )
+
+    def test_keeps_paging_when_clips_shift_onto_next_page(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            start_date='2020-05-16',
+            end_date='2020-05-18',
+            max_num_pages=5,
+            do_stop_at_start_date=True,
+            do_dry_run=True
+        )
+
+        first_clip_request = list(spider._parse_search_clip_response(
+            _get_search_clip_response(1, 3, clip_ids=(13820293,))
+        ))[0]
+        second_results = list(spider._parse_search_clip_response(
+            _get_search_clip_response(2, 3, clip_ids=(13820293, 13820293))
+        ))
+
+        self.assertTrue(first_clip_request.dont_filter)
+        self.assertEqual(1, len(second_results))
+        self.assertIn('page=3', second_results[0].url)
+
+    def test_backfills_first_search_result_page_already_requested_for_backfill(self):
+        def get_response(url):
+            url_parsed = urllib.parse.urlparse(url)
+
+            if url_parsed.path.startswith('/v/'):
+                return _get_clip_response('2020.09.30.', int(url_parsed.path.replace('/v/', '')))
+
+            page_number = int(urllib.parse.parse_qs(url_parsed.query)['page'][0])
+
+            return _get_search_clip_response(page_number, 3, [1000 + page_number])
+
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            start_date='2020-09-30',
+            end_date='2020-09-30',
+            max_num_pages=1,
+            do_backfill=True,
+            do_dry_run=True
+        )
+        dupe_filter = RFPDupeFilter()
+        pending_requests = list(spider.start_requests())
+        search_page_urls = []
+
+        while pending_requests:
+            request = pending_requests.pop(0)
+
+            if request.dont_filter is False and dupe_filter.request_seen(request):
+                continue
+
+            if request.callback == spider._parse_search_clip_response:
+                search_page_urls.append(request.url)
+
+            for result in request.callback(get_response(request.url), **request.cb_kwargs):
+                if isinstance(result, scrapy.Request):
+                    pending_requests.append(result)
+
+        self.assertEqual(1, len(search_page_urls))
+        self.assertIn('page=1', search_page_urls[0])
+
+    def test_requests_remaining_search_result_pages_at_once(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            max_num_pages=3,
+            do_dry_run=True
+        )
+
+        first_results = list(spider._parse_search_clip_response(
+            _get_search_clip_response(1, 5)
+        ))
+        second_results = list(spider._parse_search_clip_response(
+            _get_search_clip_response(2, 5, clip_ids=(13820294,)),
+            **first_results[1].cb_kwargs
+        ))
+
+        self.assertEqual(3, len(first_results))
+        self.assertEqual(-1, first_results[0].priority)
+        self.assertIn('page=2', first_results[1].url)
+        self.assertEqual(-2, first_results[1].priority)
+        self.assertIn('page=3', first_results[2].url)
+        self.assertEqual(-3, first_results[2].priority)
+        self.assertEqual(1, len(second_results))
+        self.assertEqual(-2, second_results[0].priority)
+
+    def test_prefilters_search_results_before_requesting_clip_pages(self):
+        search_result_template = '''
+            <div class="thl"><div class="thl_a">
+                <a class="cds_thm"><span class="tm_b">{length}</span></a>
+                <div class="inner"><dl>
+                    <dt><a href="/v/{clip_id}" title="{title}"></a></dt>
+                    <dd><span class="ch_txt"><a href="{channel_path}"></a></span></dd>
+                </dl></div>
+            </div></div>
+        '''
+        search_results = [
+            {'clip_id': 1, 'title': 'NC-SK 풀영상', 'channel_path': '/wyvernsvod', 'length': '4:23:33'},
+            {'clip_id': 2, 'title': '[하이라이트] NC vs SK', 'channel_path': '/wyvernsvod', 'length': '2:13'},
+            {'clip_id': 3, 'title': 'NC-SK 풀영상', 'channel_path': '/kbo', 'length': '4:23:33'},
+            {'clip_id': 4, 'title': 'NC-SK 풀영상', 'channel_path': '/wyvernsvod', 'length': '23:33'},
+            {'clip_id': 5, 'title': '두산-LG 풀영상', 'channel_path': '/twinsvod', 'length': '3:23:33'}
+        ]
+        search_clip_response = scrapy.http.HtmlResponse(
+            url='https://tv.naver.com/search/clip?page=1',
+            body='''
+                <div id="clip_list">{search_results}</div>
+                <div id="clipPaging"><div class="paging_wrap">
+                    <strong class="page"><span class="num">1</span></strong>
+                    <a class="next_end" data-page="1"></a>
+                </div></div>
+            '''.format(
+                search_results=''.join(
+                    search_result_template.format(**search_result)
+                    for search_result in search_results
+                )
+            ),
+            encoding='utf-8'
+        )
+        crawler = get_crawler(NaverTvSpider)
+        spider = NaverTvSpider.from_crawler(
+            crawler,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            team_name='SK Wyverns',
+            do_dry_run=True
+        )
+
+        results = list(spider._parse_search_clip_response(search_clip_response))
+
+        self.assertEqual(['https://tv.naver.com/v/1'], [result.url for result in results])
+        self.assertEqual(1, crawler.stats.get_value('kbo/prefilter/passed'))
+        self.assertEqual(4, crawler.stats.get_value('kbo/prefilter/dropped'))
+        self.assertEqual(1, crawler.stats.get_value('kbo/prefilter/dropped/clip_type'))
+        self.assertEqual(1, crawler.stats.get_value('kbo/prefilter/dropped/channel_path'))
+        self.assertEqual(1, crawler.stats.get_value('kbo/prefilter/dropped/clip_length'))
+        self.assertEqual(1, crawler.stats.get_value('kbo/prefilter/dropped/team_names'))
+
+    def test_parses_date_text_without_dateparser_for_known_formats(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_dry_run=True
+        )
+
+        with patch('dateparser.parse', wraps=dateparser.parse) as dateparser_parse:
+            known_format_dates = [
+                spider._parse_date_text(date_text)
+                for date_text in ['2020.05.16.', ' 2020.5.6. ', '2020-05-16', '2020/05/16']
+            ]
+
+            self.assertEqual(0, dateparser_parse.call_count)
+
+            relative_date = spider._parse_date_text('3일 전')
+            invalid_date = spider._parse_date_text('2020.13.40.')
+
+            self.assertEqual(2, dateparser_parse.call_count)
+
+        self.assertEqual(
+            [
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 5, 6, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO)
+            ],
+            known_format_dates
+        )
+        self.assertEqual(KST_TZINFO, relative_date.tzinfo)
+        self.assertIsNone(invalid_date)
+
+    def test_does_not_import_dateparser_when_constructed(self):
+        loaded_modules = subprocess.check_output([
+            sys.executable,
+            '-c',
+            'import sys; from kbo.spiders.naver_tv import NaverTvSpider; '
+            'NaverTvSpider(clip_type="full_game", start_date="2020-05-16", do_dry_run=True); '
+            'print(" ".join(sorted(sys.modules)))'
+        ]).decode().split()
+
+        self.assertNotIn('dateparser', loaded_modules)
+
+    def test_extracts_search_results_from_saved_search_page(self):
+        fixture_path = os.path.join(
+            os.path.dirname(__file__),
+            'fixtures',
+            'naver_tv_search_clip.html'
+        )
+
+        with open(fixture_path, 'rb') as f:
+            search_clip_response = scrapy.http.HtmlResponse(
+                url='https://tv.naver.com/search/clip?page=1',
+                body=f.read(),
+                encoding='utf-8'
+            )
+
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_dry_run=True
+        )
+
+        search_results = spider._get_search_results(search_clip_response)
+        parsed_clips = [
+            spider._parse_search_result(search_result)
+            for search_result in search_results
+        ]
+
+        self.assertEqual(20, len(search_results))
+        self.assertEqual(
+            {
+                'clip_length_text': '4:23:33',
+                'clip_title_text': 'NC-SK 풀영상',
+                'clip_url_text': '/v/13820293',
+                'channel_url_text': '/wyvernsvod'
+            },
+            search_results[0]
+        )
+        self.assertEqual(
+            {
+                'clip_id': '13820293',
+                'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME,
+                'url': 'https://tv.naver.com/v/13820293',
+                'length': 15813,
+                'channel_path': '/wyvernsvod',
+                'home_team_name': 'SK Wyverns',
+                'away_team_name': 'NC Dinos'
+            },
+            dict(parsed_clips[0])
+        )
+        self.assertEqual(
+            {
+                'clip_id': '13820411',
+                'clip_type': NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                'url': 'https://tv.naver.com/v/13820411',
+                'length': 591,
+                'channel_path': '/wyvernsvod',
+                'home_team_name': 'SK Wyverns'
+            },
+            dict(parsed_clips[1])
+        )
+        self.assertEqual(
+            [10, 6, 4],
+            [
+                [parsed_clip['clip_type'] for parsed_clip in parsed_clips].count(clip_type)
+                for clip_type in [
+                    NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                    NAVER_TV_CLIP_TYPE_UNKNOWN
+                ]
+            ]
+        )
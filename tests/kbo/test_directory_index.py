@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import os
+import pathlib
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from kbo.directory_index import (
+    DirectoryIndex,
+    add_file,
+    clear_directory_indexes,
+    discard_file,
+    file_exists,
+    get_directory_index
+)
+
+
+class DirectoryIndexTestCase(TestCase):
+
+    def tearDown(self):
+        clear_directory_indexes()
+
+    def test_indexes_existing_files(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            pathlib.Path(dir_path, 'clip.mp4').touch()
+            directory_index = DirectoryIndex(dir_path)
+
+        self.assertTrue(directory_index.exists(os.path.join(dir_path, 'clip.mp4')))
+        self.assertFalse(directory_index.exists(os.path.join(dir_path, 'clip.jpg')))
+
+    def test_answers_from_snapshot_without_stat_calls(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            pathlib.Path(dir_path, 'clip.mp4').touch()
+            get_directory_index(dir_path)
+
+            with patch('os.stat', side_effect=AssertionError('stat called')):
+                clip_exists = file_exists(os.path.join(dir_path, 'clip.mp4'))
+
+        self.assertTrue(clip_exists)
+
+    def test_tracks_added_and_discarded_files(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            file_path = os.path.join(dir_path, 'clip.mp4')
+            get_directory_index(dir_path)
+
+            add_file(file_path)
+            exists_after_add = file_exists(file_path)
+            discard_file(file_path)
+            exists_after_discard = file_exists(file_path)
+
+        self.assertTrue(exists_after_add)
+        self.assertFalse(exists_after_discard)
+
+    def test_rescans_after_clear(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            file_path = os.path.join(dir_path, 'clip.mp4')
+            get_directory_index(dir_path)
+            pathlib.Path(file_path).touch()
+
+            exists_before_clear = file_exists(file_path)
+            clear_directory_indexes()
+            exists_after_clear = file_exists(file_path)
+
+        self.assertFalse(exists_before_clear)
+        self.assertTrue(exists_after_clear)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import scrapy
+from scrapy.exceptions import IgnoreRequest
+from scrapy.utils.test import get_crawler
+
+from kbo.constants import NAVER_TV_CLIP_TYPE_FULL_GAME
+from kbo.httpcache import (
+    NaverTvCacheStorage,
+    NaverTvHttpCacheMiddleware,
+    get_normalized_url
+)
+from kbo.spiders.naver_tv import NaverTvSpider
+
+
+def _get_crawler_and_spider(settings):
+    crawler = get_crawler(NaverTvSpider, settings)
+    spider = NaverTvSpider.from_crawler(
+        crawler,
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        do_dry_run=True
+    )
+    crawler.spider = spider
+
+    return crawler, spider
+
+
+def _store_response(storage, spider, url):
+    request = scrapy.Request(url)
+    response = scrapy.http.HtmlResponse(url=url, body=b'<html></html>')
+    storage.store_response(spider, request, response)
+
+
+class NaverTvCacheStorageTestCase(TestCase):
+
+    def test_normalizes_urls(self):
+        self.assertEqual(
+            'https://tv.naver.com/v/13820293',
+            get_normalized_url('http://tv.naver.com/v/13820293?query=%ED%92%80&plClips=false#comment')
+        )
+        self.assertEqual(
+            get_normalized_url('https://tv.naver.com/search/clip?query=a&sort=date&page=2'),
+            get_normalized_url('https://tv.naver.com/search/clip?page=2&sort=date&query=a')
+        )
+
+    def test_retrieves_clip_pages_by_normalized_url(self):
+        with tempfile.TemporaryDirectory() as cache_dir_path:
+            crawler, spider = _get_crawler_and_spider({'HTTPCACHE_DIR': cache_dir_path})
+            storage = NaverTvCacheStorage(crawler.settings)
+            storage.open_spider(spider)
+
+            _store_response(storage, spider, 'https://tv.naver.com/v/13820293?query=a')
+            response = storage.retrieve_response(
+                spider,
+                scrapy.Request('https://tv.naver.com/v/13820293?query=b')
+            )
+
+        self.assertIsNotNone(response)
+        self.assertEqual(b'<html></html>', response.body)
+
+    def test_expires_pages_by_page_type_ttl(self):
+        search_url = 'https://tv.naver.com/search/clip?page=1'
+        clip_url = 'https://tv.naver.com/v/13820293'
+
+        with tempfile.TemporaryDirectory() as cache_dir_path:
+            crawler, spider = _get_crawler_and_spider({
+                'HTTPCACHE_DIR': cache_dir_path,
+                'KBO_HTTPCACHE_SEARCH_TTL': 3600,
+                'KBO_HTTPCACHE_CLIP_TTL': 0
+            })
+            storage = NaverTvCacheStorage(crawler.settings)
+            replay_storage = NaverTvCacheStorage(
+                get_crawler(NaverTvSpider, {
+                    'HTTPCACHE_DIR': cache_dir_path,
+                    'KBO_HTTPCACHE_REPLAY': True
+                }).settings
+            )
+            storage.open_spider(spider)
+            replay_storage.open_spider(spider)
+
+            _store_response(storage, spider, search_url)
+            _store_response(storage, spider, clip_url)
+
+            with patch('time.time', return_value=time.time() + 7200):
+                search_response = storage.retrieve_response(spider, scrapy.Request(search_url))
+                clip_response = storage.retrieve_response(spider, scrapy.Request(clip_url))
+                replay_search_response = replay_storage.retrieve_response(spider, scrapy.Request(search_url))
+
+        self.assertIsNone(search_response)
+        self.assertIsNotNone(clip_response)
+        self.assertIsNotNone(replay_search_response)
+
+
+class NaverTvHttpCacheMiddlewareTestCase(TestCase):
+
+    def test_ignores_requests_missing_from_cache_when_replaying(self):
+        with tempfile.TemporaryDirectory() as cache_dir_path:
+            crawler, spider = _get_crawler_and_spider({
+                'HTTPCACHE_DIR': cache_dir_path,
+                'HTTPCACHE_STORAGE': 'kbo.httpcache.NaverTvCacheStorage',
+                'KBO_HTTPCACHE_REPLAY': True
+            })
+            middleware = NaverTvHttpCacheMiddleware.from_crawler(crawler)
+            middleware.spider_opened(spider)
+            _store_response(middleware.storage, spider, 'https://tv.naver.com/v/13820293')
+
+            cached_response = middleware.process_request(
+                scrapy.Request('https://tv.naver.com/v/13820293?query=a'),
+                spider
+            )
+
+            with self.assertRaises(IgnoreRequest):
+                middleware.process_request(
+                    scrapy.Request('https://tv.naver.com/v/13875922'),
+                    spider
+                )
+
+        self.assertEqual(b'<html></html>', cached_response.body)
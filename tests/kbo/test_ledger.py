@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from kbo.ledger import TransferLedger
+
+
+class TransferLedgerTestCase(TestCase):
+
+    def test_persists_records_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            file_path = os.path.join(tmp_dir_path, 'ledger.json')
+            first_ledger = TransferLedger(file_path)
+            first_ledger.start_transfer(
+                13820293,
+                'https://example.com/clip.mp4',
+                '/tmp/clip.mp4',
+                2000
+            )
+            first_ledger.add_progress(13820293, 1000, 0)
+            first_ledger.record_failure(13820293, 'Connection reset')
+
+            record = TransferLedger(file_path).get(13820293)
+
+        self.assertEqual('https://example.com/clip.mp4', record['source_url'])
+        self.assertEqual('/tmp/clip.mp4', record['file_path'])
+        self.assertEqual(2000, record['content_length'])
+        self.assertEqual(1000, record['bytes_done'])
+        self.assertEqual([0], record['segments_done'])
+        self.assertEqual(1, record['attempts'])
+        self.assertEqual('Connection reset', record['last_error'])
+
+    def test_merges_records_saved_by_other_instances(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            file_path = os.path.join(tmp_dir_path, 'ledger.json')
+            first_ledger = TransferLedger(file_path)
+            second_ledger = TransferLedger(file_path)
+
+            first_ledger.start_transfer(1, 'https://example.com/1.mp4', '/tmp/1.mp4')
+            second_ledger.start_transfer(2, 'https://example.com/2.mp4', '/tmp/2.mp4')
+            first_ledger.add_progress(1, 1000)
+
+            file_paths = TransferLedger(file_path).get_file_paths()
+
+        self.assertEqual(['/tmp/1.mp4', '/tmp/2.mp4'], sorted(file_paths))
+
+    def test_gets_retry_time_from_failed_attempts(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            ledger = TransferLedger(os.path.join(tmp_dir_path, 'ledger.json'))
+            ledger.start_transfer(13820293, 'https://example.com/clip.mp4', '/tmp/clip.mp4')
+            retry_at_before_failures = ledger.get_retry_at(13820293)
+
+            with patch('time.time', return_value=1589612400):
+                ledger.record_failure(13820293, 'Connection reset')
+                ledger.record_failure(13820293, 'Connection reset')
+
+            retry_at = ledger.get_retry_at(13820293)
+            unknown_retry_at = ledger.get_retry_at(13820294)
+
+        self.assertIsNone(retry_at_before_failures)
+        self.assertIsNone(unknown_retry_at)
+        self.assertEqual(1589612400 + 20, retry_at)
+
+    def test_resets_progress_when_transfer_cannot_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            ledger = TransferLedger(os.path.join(tmp_dir_path, 'ledger.json'))
+            ledger.start_transfer(13820293, 'https://example.com/a.mp4', '/tmp/clip.mp4', 2000)
+            ledger.add_progress(13820293, 1000, 0)
+
+            same_length_segments_done = ledger.start_transfer(
+                13820293,
+                'https://example.com/b.mp4',
+                '/tmp/clip.mp4',
+                2000
+            )
+            other_length_segments_done = ledger.start_transfer(
+                13820293,
+                'https://example.com/c.mp4',
+                '/tmp/clip.mp4',
+                3000
+            )
+
+        self.assertEqual([0], same_length_segments_done)
+        self.assertEqual([], other_length_segments_done)
+
+    def test_removes_stale_records(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            ledger = TransferLedger(os.path.join(tmp_dir_path, 'ledger.json'))
+
+            with patch('time.time', return_value=1000):
+                ledger.start_transfer(1, 'https://example.com/1.mp4', '/tmp/1.mp4')
+
+            with patch('time.time', return_value=5000):
+                ledger.start_transfer(2, 'https://example.com/2.mp4', '/tmp/2.mp4')
+                ledger.remove_stale(2000)
+
+            record = ledger.get(1)
+            file_paths = ledger.get_file_paths()
+
+        self.assertIsNone(record)
+        self.assertEqual(['/tmp/2.mp4'], file_paths)
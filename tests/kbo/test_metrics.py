@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+from unittest import TestCase
+
+from scrapy.exceptions import DropItem
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from kbo import signals as kbo_signals
+from kbo.constants import NAVER_TV_CLIP_TYPE_FULL_GAME
+from kbo.items import NaverTvClip
+from kbo.metrics import PrometheusTextfileExporter, instrument_stage
+from kbo.pipelines import ClipValidationPipeline
+from kbo.spiders.naver_tv import NaverTvSpider
+
+
+def _get_item(**kwargs):
+    fields = {
+        'clip_id': 13820293,
+        'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME,
+        'url': 'https://tv.naver.com/v/13820293',
+        'length': 15813,
+        'channel_path': '/wyvernsvod',
+        'home_team_name': 'SK Wyverns',
+        'away_team_name': 'NC Dinos',
+        'year': 2020,
+        'month': 5,
+        'day': 16
+    }
+    fields.update(kwargs)
+
+    return NaverTvClip(**fields)
+
+
+def _get_spider(settings=None):
+    crawler = get_crawler(NaverTvSpider, settings)
+
+    return NaverTvSpider.from_crawler(
+        crawler,
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        start_date='2020-05-16',
+        end_date='2020-05-16',
+        do_dry_run=True
+    )
+
+
+class _DeferredPipeline:
+
+    stage_name = 'download'
+
+    def __init__(self):
+        self.deferred = defer.Deferred()
+
+    @instrument_stage
+    def process_item(self, item, spider):
+        self.deferred.addCallback(lambda _: item)
+
+        return self.deferred
+
+
+class InstrumentStageTestCase(TestCase):
+
+    def test_records_stage_outcomes_in_stats(self):
+        spider = _get_spider()
+        pipeline = ClipValidationPipeline()
+
+        pipeline.process_item(_get_item(), spider)
+
+        with self.assertRaises(DropItem):
+            pipeline.process_item(_get_item(day=17), spider)
+
+        stats = spider.crawler.stats
+
+        self.assertEqual(1, stats.get_value('kbo/pipeline/validation/items/ok'))
+        self.assertEqual(1, stats.get_value('kbo/pipeline/validation/items/dropped'))
+        self.assertIsNone(stats.get_value('kbo/pipeline/validation/items/error'))
+        self.assertGreater(stats.get_value('kbo/pipeline/validation/seconds'), 0)
+        self.assertEqual(0, stats.get_value('kbo/pipeline/validation/in_flight'))
+
+    def test_records_deferred_stages_once_fired(self):
+        spider = _get_spider({'KBO_METRICS_ITEM_TIMINGS': True})
+        first_pipeline = _DeferredPipeline()
+        second_pipeline = _DeferredPipeline()
+        stats = spider.crawler.stats
+
+        first_pipeline.process_item(_get_item(), spider)
+        second_pipeline.process_item(_get_item(clip_id=13820294), spider)
+
+        self.assertIsNone(stats.get_value('kbo/pipeline/download/items/ok'))
+        self.assertEqual(2, stats.get_value('kbo/pipeline/download/max_in_flight'))
+
+        first_pipeline.deferred.callback(None)
+        second_pipeline.deferred.errback(DropItem('Could not download clip'))
+        second_pipeline.deferred.addErrback(lambda failure: None)
+
+        self.assertEqual(1, stats.get_value('kbo/pipeline/download/items/ok'))
+        self.assertEqual(1, stats.get_value('kbo/pipeline/download/items/dropped'))
+        self.assertEqual(['download'], list(first_pipeline.deferred.result['stage_timings']))
+
+    def test_skips_item_timings_by_default(self):
+        spider = _get_spider()
+        item = _get_item()
+
+        ClipValidationPipeline().process_item(item, spider)
+
+        self.assertNotIn('stage_timings', item)
+
+
+class PrometheusTextfileExporterTestCase(TestCase):
+
+    def test_writes_stage_metrics_when_spider_closed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            textfile_path = os.path.join(tmp_dir_path, 'kbo.prom')
+            spider = _get_spider({'KBO_METRICS_TEXTFILE_PATH': textfile_path})
+            exporter = PrometheusTextfileExporter.from_crawler(spider.crawler)
+
+            ClipValidationPipeline().process_item(_get_item(), spider)
+            spider.crawler.stats.set_value('kbo/pipeline/download/processed_bytes', 1048576)
+            exporter.spider_closed(spider, 'finished')
+
+            with open(textfile_path) as textfile:
+                lines = textfile.read().splitlines()
+
+            self.assertEqual(['kbo.prom'], os.listdir(tmp_dir_path))
+
+        self.assertIn(
+            'kbo_pipeline_stage_items{clip_type="full_game",outcome="ok",spider="naver_tv",stage="validation"} 1',
+            lines
+        )
+        self.assertIn(
+            'kbo_pipeline_stage_processed_bytes{clip_type="full_game",spider="naver_tv",stage="download"} 1048576',
+            lines
+        )
+        self.assertEqual('# EOF', lines[-1])
+
+    def test_writes_stage_metrics_after_each_poll_in_watch_mode(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            textfile_path = os.path.join(tmp_dir_path, 'kbo.prom')
+            spider = _get_spider({'KBO_METRICS_TEXTFILE_PATH': textfile_path})
+            # signal receivers are only weakly referenced, so the exporter is kept alive until the signal is sent
+            exporter = PrometheusTextfileExporter.from_crawler(spider.crawler)
+
+            ClipValidationPipeline().process_item(_get_item(), spider)
+            spider.crawler.signals.send_catch_log(signal=kbo_signals.watch_polled, spider=spider)
+
+            with open(textfile_path) as textfile:
+                lines = textfile.read().splitlines()
+
+        self.assertIn(
+            'kbo_pipeline_stage_items{clip_type="full_game",outcome="ok",spider="naver_tv",stage="validation"} 1',
+            lines
+        )
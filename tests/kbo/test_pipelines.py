@@ -1,20 +1,36 @@
 # -*- coding: utf-8 -*-
 
+import datetime
+import http.server
 import os
+import pathlib
+import struct
+import subprocess
+import sys
 import tempfile
+import threading
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import scrapy
+from scrapy.utils.test import get_crawler
+from mutagen.mp4 import MP4
+from twisted.internet import defer, error, task
+from twisted.python import failure
 
+import kbo.pipelines
 from kbo.constants import (
     KBO_LEAGUE_TEAM_NAME_UNKNOWN,
+    KST_TZINFO,
     NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
     NAVER_TV_CLIP_TYPE_FULL_GAME
 )
 from kbo.items import NaverTvClip
+from kbo.ledger import TransferLedger
 from kbo.pipelines import (
    ClipValidationPipeline,
+   ClipStorePipeline,
    ClipDownloadPipeline,
    ClipTagPipeline,
    ClipThumbnailPipeline,
@@ -23,6 +39,107 @@ from kbo.pipelines import (
 from kbo.spiders.naver_tv import NaverTvSpider
 
 
+class _RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    content = bytes(range(256)) * 40
+    requested_ranges = []
+    truncated_ranges = []
+
+    def do_GET(self):
+        byte_range = self.headers.get('Range')
+        self.requested_ranges.append(byte_range)
+
+        if byte_range is None:
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(self.content)))
+            self.end_headers()
+            self.wfile.write(self.content)
+            return
+
+        start, end = byte_range.replace('bytes=', '').split('-')
+        body = self.content[int(start):int(end) + 1]
+
+        self.send_response(206)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header(
+            'Content-Range',
+            "bytes {start}-{end}/{length}".format(
+                start=start,
+                end=end,
+                length=len(self.content)
+            )
+        )
+        self.end_headers()
+
+        if byte_range in self.truncated_ranges:
+            self.truncated_ranges.remove(byte_range)
+            body = body[:len(body) // 2]
+
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _HlsRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    segments = [bytes([segment_index]) * (100 + segment_index) for segment_index in range(5)]
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(('GET', self.path))
+
+        if self.path == '/clip.m3u8':
+            body = '\n'.join(
+                ['#EXTM3U'] +
+                ["#EXTINF:5.0,\nsegment{segment_index}.ts".format(segment_index=segment_index) for segment_index in range(len(self.segments))] +
+                ['#EXT-X-ENDLIST']
+            ).encode('utf-8')
+        else:
+            body = self.segments[int(self.path.replace('/segment', '').replace('.ts', ''))]
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.requests.append(('HEAD', self.path))
+        self.send_response(405)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _create_mp4_file(file_path, mdat_data):
+    def atom(atom_type, data):
+        return struct.pack('>I4s', 8 + len(data), atom_type) + data
+
+    with open(file_path, 'wb') as f:
+        f.write(atom(b'ftyp', b'isom' + bytes(4) + b'isommp41'))
+        f.write(atom(b'moov', atom(b'mvhd', bytes(12) + struct.pack('>II', 1000, 10000) + bytes(80))))
+        f.write(atom(b'mdat', mdat_data))
+
+
+def _defer_to_thread_pool_synchronously(reactor, thread_pool, f, *args, **kwargs):
+    return defer.maybeDeferred(f, *args, **kwargs)
+
+
+class PipelinesModuleTestCase(TestCase):
+
+    def test_does_not_import_media_dependencies_when_loaded(self):
+        loaded_modules = subprocess.check_output([
+            sys.executable,
+            '-c',
+            'import sys, kbo.pipelines; print(" ".join(sorted(sys.modules)))'
+        ]).decode().split()
+
+        self.assertNotIn('youtube_dl', loaded_modules)
+        self.assertNotIn('ffmpeg', loaded_modules)
+        self.assertNotIn('mutagen', loaded_modules)
+
+
 class ClipValidationPipelineTestCase(TestCase):
 
     def test_returns_item_when_processed(self):
@@ -124,6 +241,46 @@ class ClipValidationPipelineTestCase(TestCase):
         with self.assertRaisesRegex(scrapy.exceptions.DropItem, '^Clip length'):
             pipeline.process_item(item, spider)
 
+    def test_uses_clip_length_defaults_of_each_clip_type_for_full_and_condensed_game_crawls(self):
+        full_game_item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=591,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        condensed_game_item = NaverTvClip(
+            clip_id=13820411,
+            clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+            url='https://tv.naver.com/v/13820411',
+            length=591,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_AND_CONDENSED_GAME,
+            start_date='2020-05-16',
+            end_date='2020-05-16',
+            do_dry_run=True
+        )
+        pipeline = ClipValidationPipeline()
+
+        result = pipeline.process_item(condensed_game_item, spider)
+
+        self.assertEqual(condensed_game_item, result)
+
+        with self.assertRaisesRegex(scrapy.exceptions.DropItem, '^Clip length'):
+            pipeline.process_item(full_game_item, spider)
+
     def test_raises_drop_item_when_channel_path_is_invalid(self):
         item = NaverTvClip(
             clip_id=13820293,
@@ -294,6 +451,63 @@ class ClipValidationPipelineTestCase(TestCase):
             pipeline.process_item(item, spider)
 
 
+class ClipStorePipelineTestCase(TestCase):
+
+    def test_stores_full_game_clips_for_condensed_game_crawls(self):
+        item = NaverTvClip(
+            clip_id='13820293',
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            full_game_store_path = os.path.join(tmp_dir_path, 'full_games.db')
+            full_game_spider = NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                start_date='2020-05-16',
+                end_date='2020-05-16',
+                full_game_store_path=full_game_store_path,
+                do_dry_run=True
+            )
+            pipeline = ClipStorePipeline()
+            pipeline.open_spider(full_game_spider)
+            result = pipeline.process_item(item, full_game_spider)
+            pipeline.close_spider(full_game_spider)
+
+            condensed_game_spider = NaverTvSpider(
+                clip_type=NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+                start_date='2020-05-16',
+                end_date='2020-05-16',
+                full_game_store_path=full_game_store_path,
+                do_dry_run=True
+            )
+            away_team_name = condensed_game_spider._get_away_team_name_from_full_game_feed(
+                'SK Wyverns',
+                condensed_game_spider.start_date
+            )
+
+        self.assertEqual(item, result)
+        self.assertEqual('NC Dinos', away_team_name)
+
+    def test_skips_storing_clips_without_full_game_store_path(self):
+        spider = NaverTvSpider(
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            do_dry_run=True
+        )
+        pipeline = ClipStorePipeline()
+
+        pipeline.open_spider(spider)
+
+        self.assertIsNone(pipeline._full_game_store)
+
+
 class ClipDownloadPipelineTestCase(TestCase):
 
     def test_returns_item_when_processed(self):
@@ -319,12 +533,18 @@ class ClipDownloadPipelineTestCase(TestCase):
                     tmp_dir_path=tmp_dir_path
                 )
                 pipeline = ClipDownloadPipeline()
+                results = []
 
                 with patch('youtube_dl.YoutubeDL') as youtube_dl_mock:
-                    result = pipeline.process_item(item, spider)
+                    with patch('twisted.internet.threads.deferToThreadPool', _defer_to_thread_pool_synchronously):
+                        deferred = pipeline.process_item(item, spider)
+                        deferred.addCallback(results.append)
+
+                pipeline.close_spider(spider)
 
         args, _ = youtube_dl_mock.call_args
-        self.assertEqual(item, result)
+        self.assertIsInstance(deferred, defer.Deferred)
+        self.assertEqual([item], results)
         self.assertEqual(
             os.path.join(
                 tmp_dir_path,
@@ -333,6 +553,534 @@ class ClipDownloadPipelineTestCase(TestCase):
             args[0]['outtmpl']
         )
 
+    def test_sets_download_concurrency_from_settings(self):
+        crawler = get_crawler(
+            NaverTvSpider,
+            {'KBO_DOWNLOAD_CONCURRENCY': 10}
+        )
+
+        pipeline = ClipDownloadPipeline.from_crawler(crawler)
+
+        self.assertEqual(10, pipeline.download_concurrency)
+
+    def test_sets_download_limits_from_settings(self):
+        crawler = get_crawler(
+            NaverTvSpider,
+            {
+                'KBO_DOWNLOAD_MAX_BANDWIDTH': 5000000,
+                'KBO_DOWNLOAD_MAX_CONNECTIONS_PER_HOST': 6,
+                'KBO_DOWNLOAD_BACKFILL_HOURS': '2-8',
+                'KBO_DOWNLOAD_BACKFILL_AGE': 7
+            }
+        )
+
+        pipeline = ClipDownloadPipeline.from_crawler(crawler)
+        today = datetime.datetime.now(KST_TZINFO)
+        last_week = today - datetime.timedelta(days=8)
+
+        self.assertEqual(5000000, pipeline._transfer_limiter.max_bandwidth)
+        self.assertEqual(6, pipeline._transfer_limiter.max_connections_per_host)
+        self.assertEqual((2, 8), pipeline.backfill_hours)
+        self.assertFalse(pipeline._is_backfill_clip({'year': today.year, 'month': today.month, 'day': today.day}))
+        self.assertTrue(pipeline._is_backfill_clip({'year': last_week.year, 'month': last_week.month, 'day': last_week.day}))
+
+    def test_downloads_clip_over_multiple_connections_with_segmented_engine(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        ydl_mock = MagicMock()
+        ydl_mock.extract_info.return_value = {
+            'protocol': 'http',
+            'url': "http://127.0.0.1:{port}/clip.mp4".format(port=server.server_port),
+            'http_headers': {}
+        }
+
+        try:
+            with tempfile.TemporaryDirectory() as output_dir_path:
+                with tempfile.TemporaryDirectory() as tmp_dir_path:
+                    spider = NaverTvSpider(
+                        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                        start_date='2020-05-16',
+                        end_date='2020-05-16',
+                        output_dir_path=output_dir_path,
+                        tmp_dir_path=tmp_dir_path
+                    )
+                    pipeline = ClipDownloadPipeline(
+                        download_engine='segmented',
+                        download_num_connections=3
+                    )
+
+                    with patch('kbo.pipelines.DOWNLOAD_SEGMENT_SIZE', 1000):
+                        pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                    file_names = os.listdir(tmp_dir_path)
+
+                    with open(os.path.join(tmp_dir_path, 'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'), 'rb') as f:
+                        content = f.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(_RangeRequestHandler.content, content)
+        self.assertEqual(
+            [
+                '.kbo_transfer_ledger.json',
+                '.kbo_transfer_ledger.json.lock',
+                'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+            ],
+            sorted(file_names)
+        )
+        ydl_mock.process_info.assert_not_called()
+
+    def test_resumes_segmented_download_from_transfer_ledger(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        ydl_mock = MagicMock()
+        ydl_mock.extract_info.return_value = {
+            'protocol': 'http',
+            'url': "http://127.0.0.1:{port}/clip.mp4".format(port=server.server_port),
+            'http_headers': {}
+        }
+        _RangeRequestHandler.requested_ranges = []
+
+        try:
+            with tempfile.TemporaryDirectory() as output_dir_path:
+                with tempfile.TemporaryDirectory() as tmp_dir_path:
+                    spider = NaverTvSpider(
+                        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                        start_date='2020-05-16',
+                        end_date='2020-05-16',
+                        output_dir_path=output_dir_path,
+                        tmp_dir_path=tmp_dir_path
+                    )
+                    file_path = os.path.join(
+                        tmp_dir_path,
+                        'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+                    )
+
+                    with open(file_path + '.kbo.part', 'wb') as f:
+                        f.write(_RangeRequestHandler.content[:8000])
+                        f.write(bytes(len(_RangeRequestHandler.content) - 8000))
+
+                    transfer_ledger = TransferLedger(
+                        os.path.join(tmp_dir_path, '.kbo_transfer_ledger.json')
+                    )
+                    transfer_ledger.start_transfer(
+                        13820293,
+                        ydl_mock.extract_info.return_value['url'],
+                        file_path,
+                        len(_RangeRequestHandler.content)
+                    )
+
+                    for offset in range(0, 8000, 1000):
+                        transfer_ledger.add_progress(13820293, 1000, offset)
+
+                    pipeline = ClipDownloadPipeline(download_engine='segmented')
+
+                    with patch('kbo.pipelines.DOWNLOAD_SEGMENT_SIZE', 1000):
+                        pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(_RangeRequestHandler.content, content)
+        self.assertEqual(
+            ['bytes=0-0', 'bytes=8000-8999', 'bytes=9000-9999', 'bytes=10000-10239'],
+            sorted(_RangeRequestHandler.requested_ranges, key=lambda r: int(r[6:].split('-')[0]))
+        )
+
+    def test_appends_hls_segments_in_order_without_sizing_them_first(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _HlsRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        ydl_mock = MagicMock()
+        ydl_mock.extract_info.return_value = {
+            'protocol': 'm3u8_native',
+            'url': "http://127.0.0.1:{port}/clip.m3u8".format(port=server.server_port),
+            'http_headers': {}
+        }
+        _HlsRequestHandler.requests = []
+
+        try:
+            with tempfile.TemporaryDirectory() as output_dir_path:
+                with tempfile.TemporaryDirectory() as tmp_dir_path:
+                    spider = NaverTvSpider(
+                        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                        start_date='2020-05-16',
+                        end_date='2020-05-16',
+                        output_dir_path=output_dir_path,
+                        tmp_dir_path=tmp_dir_path
+                    )
+                    pipeline = ClipDownloadPipeline(
+                        download_engine='segmented',
+                        download_num_connections=2
+                    )
+
+                    with patch('kbo.pipelines._remux_hls_part_file'):
+                        pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                    with open(os.path.join(tmp_dir_path, 'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'), 'rb') as f:
+                        content = f.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(b''.join(_HlsRequestHandler.segments), content)
+        self.assertEqual(['GET'] * 6, [method for method, _ in _HlsRequestHandler.requests])
+        ydl_mock.process_info.assert_not_called()
+
+    def test_resumes_segmented_download_after_failed_segment(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _RangeRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        ydl_mock = MagicMock()
+        ydl_mock.extract_info.return_value = {
+            'protocol': 'http',
+            'url': "http://127.0.0.1:{port}/clip.mp4".format(port=server.server_port),
+            'http_headers': {}
+        }
+        _RangeRequestHandler.requested_ranges = []
+        _RangeRequestHandler.truncated_ranges = ['bytes=5000-5999']
+
+        try:
+            with tempfile.TemporaryDirectory() as output_dir_path:
+                with tempfile.TemporaryDirectory() as tmp_dir_path:
+                    spider = NaverTvSpider(
+                        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                        start_date='2020-05-16',
+                        end_date='2020-05-16',
+                        output_dir_path=output_dir_path,
+                        tmp_dir_path=tmp_dir_path
+                    )
+                    pipeline = ClipDownloadPipeline(
+                        download_engine='segmented',
+                        download_num_connections=1
+                    )
+
+                    with patch('kbo.pipelines.DOWNLOAD_SEGMENT_SIZE', 1000):
+                        with self.assertRaisesRegex(ValueError, 'Segment at byte 5000 incomplete'):
+                            pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                        failed_attempt_ranges = _RangeRequestHandler.requested_ranges
+                        _RangeRequestHandler.requested_ranges = []
+                        file_names_after_failed_attempt = os.listdir(tmp_dir_path)
+
+                        pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                    with open(os.path.join(tmp_dir_path, 'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'), 'rb') as f:
+                        content = f.read()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(_RangeRequestHandler.content, content)
+        self.assertIn(
+            'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4.kbo.part',
+            file_names_after_failed_attempt
+        )
+        self.assertEqual(
+            ['bytes=0-0', 'bytes=0-999', 'bytes=1000-1999', 'bytes=2000-2999', 'bytes=3000-3999', 'bytes=4000-4999', 'bytes=5000-5999'],
+            failed_attempt_ranges[:7]
+        )
+        self.assertEqual(
+            ['bytes=0-0', 'bytes=5000-5999', 'bytes=6000-6999', 'bytes=7000-7999', 'bytes=8000-8999', 'bytes=9000-9999', 'bytes=10000-10239'],
+            _RangeRequestHandler.requested_ranges
+        )
+        ydl_mock.process_info.assert_not_called()
+
+    def test_falls_back_to_youtube_dl_when_segmented_engine_unsupported(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        ydl_mock = MagicMock()
+        ydl_mock.extract_info.return_value = {
+            'protocol': 'rtmp',
+            'url': 'rtmp://example.com/clip'
+        }
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipDownloadPipeline(download_engine='segmented')
+
+                pipeline._download_clip_segmented(item, spider, ydl_mock, ydl_mock.extract_info.return_value)
+
+                file_names = os.listdir(tmp_dir_path)
+
+        ydl_mock.process_info.assert_called_once_with(
+            ydl_mock.extract_info.return_value
+        )
+        self.assertEqual(['.kbo_transfer_ledger.json', '.kbo_transfer_ledger.json.lock'], sorted(file_names))
+
+    def test_raises_drop_item_after_retrying_failed_download(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipDownloadPipeline(download_retry_times=2)
+
+                with patch('youtube_dl.YoutubeDL') as youtube_dl_mock:
+                    youtube_dl_mock.return_value.__enter__.return_value.download.side_effect = OSError('Connection reset')
+
+                    with patch('time.sleep') as sleep_mock:
+                        with self.assertRaisesRegex(scrapy.exceptions.DropItem, '^Could not download clip'):
+                            pipeline._download_clip(item, spider)
+
+                record = TransferLedger(
+                    os.path.join(tmp_dir_path, '.kbo_transfer_ledger.json')
+                ).get(13820293)
+
+        self.assertEqual(3, record['attempts'])
+        self.assertEqual('Connection reset', record['last_error'])
+        self.assertEqual(2, sleep_mock.call_count)
+
+    def test_raises_drop_item_when_backing_off_after_failed_attempts(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                TransferLedger(
+                    os.path.join(tmp_dir_path, '.kbo_transfer_ledger.json')
+                ).record_failure(13820293, 'HTTP Error 503')
+                pipeline = ClipDownloadPipeline()
+
+                with patch('youtube_dl.YoutubeDL') as youtube_dl_mock:
+                    with self.assertRaisesRegex(scrapy.exceptions.DropItem, '^Clip download backing off'):
+                        pipeline.process_item(item, spider)
+
+        youtube_dl_mock.assert_not_called()
+
+    def test_removes_orphaned_part_files_on_open(self):
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                tracked_file_path = os.path.join(tmp_dir_path, 'tracked.mp4')
+                TransferLedger(
+                    os.path.join(tmp_dir_path, '.kbo_transfer_ledger.json')
+                ).start_transfer(13820293, 'https://tv.naver.com/v/13820293', tracked_file_path)
+
+                for file_name in ['tracked.mp4.part', 'orphaned.mp4.part', 'orphaned.mp4.kbo.part', 'finished.mp4']:
+                    pathlib.Path(tmp_dir_path, file_name).touch()
+                    os.utime(os.path.join(tmp_dir_path, file_name), (1000, 1000))
+
+                pathlib.Path(tmp_dir_path, 'downloading.mp4.part').touch()
+
+                pipeline = ClipDownloadPipeline()
+                pipeline.open_spider(spider)
+
+                file_names = os.listdir(tmp_dir_path)
+
+        self.assertEqual(
+            [
+                '.kbo_transfer_ledger.json',
+                '.kbo_transfer_ledger.json.lock',
+                'downloading.mp4.part',
+                'finished.mp4',
+                'tracked.mp4.part'
+            ],
+            sorted(file_names)
+        )
+
+    def test_creates_thumbnail_from_media_url_during_download(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        clip_info = {
+            'protocol': 'https',
+            'url': 'https://example.com/clip.mp4',
+            'http_headers': {'User-Agent': 'kbo'}
+        }
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipDownloadPipeline(thumbnail_during_download=True)
+
+                with patch('youtube_dl.YoutubeDL') as youtube_dl_mock:
+                    ydl_mock = youtube_dl_mock.return_value.__enter__.return_value
+                    ydl_mock.extract_info.return_value = clip_info
+
+                    with patch('subprocess.Popen') as popen_mock:
+                        popen_mock.return_value.communicate.return_value = (None, b'')
+                        popen_mock.return_value.returncode = 0
+
+                        pipeline._download_clip(item, spider)
+
+        args, _ = popen_mock.call_args
+        self.assertEqual(
+            ['ffmpeg', '-headers', 'User-Agent: kbo\r\n', '-ss', '00:00:03', '-i', 'https://example.com/clip.mp4'],
+            args[0][:7]
+        )
+        self.assertEqual(
+            os.path.join(
+                tmp_dir_path,
+                'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.jpg'
+            ),
+            args[0][-2]
+        )
+        ydl_mock.process_info.assert_called_once_with(clip_info)
+        ydl_mock.download.assert_not_called()
+
+    def test_limits_connections_per_media_host(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        clip_info = {
+            'protocol': 'https',
+            'url': 'https://cdn.example.com/clip.mp4',
+            'http_headers': {}
+        }
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipDownloadPipeline(max_connections_per_host=2)
+
+                with patch('youtube_dl.YoutubeDL') as youtube_dl_mock:
+                    ydl_mock = youtube_dl_mock.return_value.__enter__.return_value
+                    ydl_mock.extract_info.return_value = clip_info
+
+                    pipeline._download_clip(item, spider)
+
+        ydl_mock.process_info.assert_called_once_with(clip_info)
+        ydl_mock.download.assert_not_called()
+        self.assertEqual(['cdn.example.com'], list(pipeline._transfer_limiter._host_semaphores))
+
     def test_skips_download_on_dry_run(self):
         item = NaverTvClip(
             clip_id=13820293,
@@ -361,8 +1109,295 @@ class ClipDownloadPipelineTestCase(TestCase):
         youtube_dl_mock.assert_not_called()
 
 
+class ClipTagPipelineTestCase(TestCase):
+
+    def test_tags_clip_without_moving_media_data(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        mdat_data = bytes(range(256)) * 4096
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                file_path = os.path.join(
+                    tmp_dir_path,
+                    'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+                )
+                _create_mp4_file(file_path, mdat_data)
+                mdat_offset = os.path.getsize(file_path) - len(mdat_data)
+
+                pipeline = ClipTagPipeline()
+                result = pipeline.process_item(item, spider)
+
+                with open(file_path, 'rb') as f:
+                    f.seek(mdat_offset)
+                    tagged_mdat_data = f.read(len(mdat_data))
+
+                tags = MP4(file_path).tags
+
+        self.assertEqual(item, result)
+        self.assertEqual(mdat_data, tagged_mdat_data)
+        self.assertEqual(['KBO League'], tags['\xa9ART'])
+        self.assertEqual(['KBO League'], tags['tvsh'])
+        self.assertEqual(['NC Dinos at SK Wyverns'], tags['\xa9nam'])
+        self.assertEqual(['2020-05-16'], tags['\xa9day'])
+
+    def test_tags_clip_in_place_when_tags_fit_in_padding(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                file_path = os.path.join(
+                    tmp_dir_path,
+                    'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+                )
+                _create_mp4_file(file_path, bytes(1024))
+                clip_file = MP4(file_path)
+                clip_file.add_tags()
+                clip_file.save(padding=lambda padding_info: 4096)
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+
+                pipeline = ClipTagPipeline()
+                pipeline.process_item(item, spider)
+
+                with open(file_path, 'rb') as f:
+                    tagged_data = f.read()
+
+                tags = MP4(file_path).tags
+
+        self.assertLess(data.index(b'moov'), data.index(b'mdat'))
+        self.assertEqual(len(data), len(tagged_data))
+        self.assertEqual(data.index(b'mdat'), tagged_data.index(b'mdat'))
+        self.assertNotIn(b'free', tagged_data[:tagged_data.index(b'moov')])
+        self.assertEqual(['NC Dinos at SK Wyverns'], tags['\xa9nam'])
+
+    def test_skips_saving_clip_when_already_tagged(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                file_path = os.path.join(
+                    tmp_dir_path,
+                    'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+                )
+                _create_mp4_file(file_path, bytes(1024))
+
+                pipeline = ClipTagPipeline()
+                pipeline.process_item(item, spider)
+
+                with patch('mutagen.mp4.MP4.save') as save_mock:
+                    pipeline.process_item(item, spider)
+
+        save_mock.assert_not_called()
+
+
 class ClipThumbnailPipelineTestCase(TestCase):
 
+    def test_batches_thumbnails_when_backlog_exists(self):
+        items = [
+            NaverTvClip(
+                clip_id=clip_id,
+                clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                url="https://tv.naver.com/v/{clip_id}".format(clip_id=clip_id),
+                length=15813,
+                channel_path='/wyvernsvod',
+                home_team_name='SK Wyverns',
+                away_team_name='NC Dinos',
+                year=2020,
+                month=5,
+                day=16
+            )
+            for clip_id in [1, 2, 3, 4]
+        ]
+        ffmpeg_deferreds = []
+        results = []
+
+        def run_ffmpeg(args):
+            ffmpeg_deferreds.append((args, defer.Deferred()))
+
+            return ffmpeg_deferreds[-1][1]
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipThumbnailPipeline(
+                    thumbnail_concurrency=1,
+                    thumbnail_batch_size=3
+                )
+
+                for item in items:
+                    pathlib.Path(tmp_dir_path, "KBO League - S2020E{clip_id} - 2020.05.16 - NC Dinos at SK Wyverns.mp4".format(clip_id=item['clip_id'])).touch()
+
+                with patch.object(pipeline, '_run_ffmpeg', run_ffmpeg):
+                    for item in items:
+                        pipeline.process_item(item, spider).addCallback(results.append)
+
+                    ffmpeg_deferreds[0][1].callback((b'', b'', 0))
+                    ffmpeg_deferreds[1][1].callback((b'', b'', 0))
+
+        self.assertEqual(2, len(ffmpeg_deferreds))
+        self.assertEqual(1, ffmpeg_deferreds[0][0].count('-i'))
+        self.assertEqual(3, ffmpeg_deferreds[1][0].count('-i'))
+        self.assertEqual(items, results)
+
+    def test_retries_failed_batch_one_thumbnail_at_a_time(self):
+        items = [
+            NaverTvClip(
+                clip_id=clip_id,
+                clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                url="https://tv.naver.com/v/{clip_id}".format(clip_id=clip_id),
+                length=15813,
+                channel_path='/wyvernsvod',
+                home_team_name='SK Wyverns',
+                away_team_name='NC Dinos',
+                year=2020,
+                month=5,
+                day=16
+            )
+            for clip_id in [1, 2]
+        ]
+        results = []
+        failures = []
+
+        def run_ffmpeg(args):
+            if args.count('-i') > 1 or 'S2020E2' in ' '.join(args):
+                return defer.succeed((b'', b'Invalid data found', 1))
+
+            return defer.succeed((b'', b'', 0))
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pipeline = ClipThumbnailPipeline()
+                deferreds = []
+
+                for item in items:
+                    file_path = pathlib.Path(tmp_dir_path, "KBO League - S2020E{clip_id} - 2020.05.16 - NC Dinos at SK Wyverns.mp4".format(clip_id=item['clip_id']))
+                    file_path.touch()
+                    deferred = defer.Deferred()
+                    pipeline._pending_thumbnails.append((
+                        str(file_path),
+                        str(file_path.with_suffix('.jpg')),
+                        deferred
+                    ))
+                    deferred.addCallbacks(results.append, failures.append)
+                    deferreds.append(deferred)
+
+                with patch.object(pipeline, '_run_ffmpeg', run_ffmpeg):
+                    pipeline._run_pending_thumbnails()
+
+        self.assertEqual([None], results)
+        self.assertEqual(1, len(failures))
+        self.assertRegex(str(failures[0].value), '^Could not create thumbnail: Invalid data found')
+
+    def test_drops_items_when_ffmpeg_is_killed(self):
+        clock = task.Clock()
+        process_deferred = defer.Deferred()
+        process_protocol = kbo.pipelines._FfmpegProcessProtocol(process_deferred, clock, 300)
+        process_protocol.transport = MagicMock()
+        failures = []
+
+        clock.advance(300)
+        process_protocol.errReceived(b'frame=    0')
+        process_protocol.processEnded(failure.Failure(error.ProcessTerminated(signal=9)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            pipeline = ClipThumbnailPipeline()
+            deferreds = [defer.Deferred(), defer.Deferred()]
+
+            for clip_id, deferred in enumerate(deferreds):
+                pipeline._pending_thumbnails.append((
+                    os.path.join(tmp_dir_path, "{clip_id}.mp4".format(clip_id=clip_id)),
+                    os.path.join(tmp_dir_path, "{clip_id}.jpg".format(clip_id=clip_id)),
+                    deferred
+                ))
+                deferred.addErrback(failures.append)
+
+            with patch.object(pipeline, '_run_ffmpeg', lambda args: defer.succeed(process_deferred.result)):
+                pipeline._run_pending_thumbnails()
+
+        process_protocol.transport.signalProcess.assert_called_once_with('KILL')
+        self.assertEqual((b'', b'frame=    0', -9), process_deferred.result)
+        self.assertEqual(2, len(failures))
+        self.assertEqual('Could not create thumbnail: FFmpeg was killed by signal 9', str(failures[0].value))
+        self.assertEqual(0, pipeline._num_running_batches)
+
+    def test_uses_keyframe_only_seek_when_enabled(self):
+        args = kbo.pipelines._get_thumbnail_ffmpeg_args(
+            [('clip.mp4', 'clip.jpg')],
+            True
+        )
+
+        self.assertEqual(
+            ['-noaccurate_seek', '-skip_frame', 'nokey', '-ss', '00:00:03', '-i', 'clip.mp4'],
+            args[:7]
+        )
+
     def test_skips_thumbnail_on_dry_run(self):
         item = NaverTvClip(
             clip_id=13820293,
@@ -397,6 +1432,88 @@ class ClipThumbnailPipelineTestCase(TestCase):
 
 class ClipMovePipelineTestCase(TestCase):
 
+    def test_moves_clip_files_to_output_dir(self):
+        item = NaverTvClip(
+            clip_id=13820293,
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+        results = []
+
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                spider = NaverTvSpider(
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    start_date='2020-05-16',
+                    end_date='2020-05-16',
+                    output_dir_path=output_dir_path,
+                    tmp_dir_path=tmp_dir_path
+                )
+                pathlib.Path(tmp_dir_path, 'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4').write_bytes(b'clip')
+                pathlib.Path(tmp_dir_path, 'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.jpg').write_bytes(b'thumbnail')
+                pipeline = ClipMovePipeline()
+
+                with patch('twisted.internet.threads.deferToThread', defer.maybeDeferred):
+                    pipeline.process_item(item, spider).addCallback(results.append)
+
+                tmp_file_names = os.listdir(tmp_dir_path)
+                output_file_names = os.listdir(output_dir_path)
+
+        self.assertEqual([item], results)
+        self.assertEqual([], tmp_file_names)
+        self.assertEqual(
+            [
+                'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.jpg',
+                'KBO League - S2020E13820293 - 2020.05.16 - NC Dinos at SK Wyverns.mp4'
+            ],
+            sorted(output_file_names)
+        )
+
+    def test_copies_then_renames_across_file_systems(self):
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                source_path = os.path.join(tmp_dir_path, 'clip.mp4')
+                destination_path = os.path.join(output_dir_path, 'clip.mp4')
+                pathlib.Path(source_path).write_bytes(b'clip' * 1024)
+
+                with patch('kbo.pipelines._is_same_file_system', return_value=False):
+                    with patch('os.rename') as rename_mock:
+                        kbo.pipelines._move_file(source_path, destination_path)
+
+                source_exists = os.path.exists(source_path)
+                output_file_names = os.listdir(output_dir_path)
+                content = pathlib.Path(destination_path).read_bytes()
+
+        rename_mock.assert_not_called()
+        self.assertFalse(source_exists)
+        self.assertEqual(['clip.mp4'], output_file_names)
+        self.assertEqual(b'clip' * 1024, content)
+
+    def test_removes_hidden_tmp_file_when_copy_fails(self):
+        with tempfile.TemporaryDirectory() as output_dir_path:
+            with tempfile.TemporaryDirectory() as tmp_dir_path:
+                source_path = os.path.join(tmp_dir_path, 'clip.mp4')
+                destination_path = os.path.join(output_dir_path, 'clip.mp4')
+                pathlib.Path(source_path).write_bytes(b'clip')
+
+                with patch('kbo.pipelines._is_same_file_system', return_value=False):
+                    with patch('os.replace', side_effect=OSError('No space left on device')):
+                        with self.assertRaises(OSError):
+                            kbo.pipelines._move_file(source_path, destination_path)
+
+                source_exists = os.path.exists(source_path)
+                output_file_names = os.listdir(output_dir_path)
+
+        self.assertTrue(source_exists)
+        self.assertEqual([], output_file_names)
+
     def test_skips_move_on_dry_run(self):
         item = NaverTvClip(
             clip_id=13820293,
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+import scrapy
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer
+
+from kbo.constants import NAVER_TV_CLIP_TYPE_FULL_GAME
+from kbo.items import NaverTvClip
+from kbo.pipelines import ClipValidationPipeline
+from kbo.profiling import CrawlProfiler, profile_stage
+from kbo.spiders.naver_tv import NaverTvSpider
+
+
+def _get_search_clip_response():
+    fixture_path = os.path.join(
+        os.path.dirname(__file__),
+        'spiders',
+        'fixtures',
+        'naver_tv_search_clip.html'
+    )
+
+    with open(fixture_path, 'rb') as f:
+        return scrapy.http.HtmlResponse(
+            url='https://tv.naver.com/search/clip?page=1',
+            body=f.read(),
+            encoding='utf-8'
+        )
+
+
+class _DeferredPipeline:
+
+    def __init__(self):
+        self.deferred = defer.Deferred()
+
+    @profile_stage
+    def process_item(self, item, spider):
+        return self.deferred
+
+
+def _get_spider(settings=None):
+    crawler = get_crawler(NaverTvSpider, settings)
+
+    return NaverTvSpider.from_crawler(
+        crawler,
+        clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+        start_date='2020-05-16',
+        end_date='2020-05-16',
+        do_dry_run=True
+    )
+
+
+class CrawlProfilerTestCase(TestCase):
+
+    def test_is_not_configured_without_profile_dir_path(self):
+        spider = _get_spider()
+
+        with self.assertRaises(NotConfigured):
+            CrawlProfiler.from_crawler(spider.crawler)
+
+    def test_profiles_spider_callbacks_and_pipeline_stages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            spider = _get_spider({
+                'KBO_PROFILE_DIR_PATH': tmp_dir_path,
+                'KBO_PROFILE_TRACEMALLOC': True
+            })
+            profiler = CrawlProfiler.from_crawler(spider.crawler)
+            profiler.spider_opened(spider)
+
+            list(spider._parse_search_clip_response(_get_search_clip_response()))
+            ClipValidationPipeline().process_item(
+                NaverTvClip(
+                    clip_id=13820293,
+                    clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+                    url='https://tv.naver.com/v/13820293',
+                    length=15813,
+                    channel_path='/wyvernsvod',
+                    home_team_name='SK Wyverns',
+                    away_team_name='NC Dinos',
+                    year=2020,
+                    month=5,
+                    day=16
+                ),
+                spider
+            )
+            samples = profiler.get_samples()
+
+            profiler.spider_closed(spider, 'finished')
+            file_names = sorted(os.listdir(tmp_dir_path))
+
+            with open(os.path.join(tmp_dir_path, file_names[1])) as f:
+                summary = f.read()
+
+        search_sample = samples['NaverTvSpider._parse_search_clip_response']
+
+        self.assertEqual(1, search_sample['calls'])
+        self.assertGreater(search_sample['wall_seconds'], 0)
+        self.assertGreater(search_sample['allocated_bytes'], 0)
+        self.assertEqual(1, samples['ClipValidationPipeline.process_item']['calls'])
+        self.assertEqual(['.prof', '.txt'], [os.path.splitext(file_name)[1] for file_name in file_names])
+        self.assertIn('NaverTvSpider._parse_search_clip_response', summary)
+        self.assertIn('Top 20 functions by cumulative time:', summary)
+        self.assertIsNone(spider.kbo_profiler)
+
+    def test_skips_profiling_when_not_opened(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            spider = _get_spider({'KBO_PROFILE_DIR_PATH': tmp_dir_path})
+            profiler = CrawlProfiler.from_crawler(spider.crawler)
+
+            list(spider._parse_search_clip_response(_get_search_clip_response()))
+
+        self.assertEqual({}, profiler.get_samples())
+
+    def test_times_pipeline_stages_until_their_deferred_fires(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            spider = _get_spider({'KBO_PROFILE_DIR_PATH': tmp_dir_path})
+            profiler = CrawlProfiler.from_crawler(spider.crawler)
+            profiler.spider_opened(spider)
+
+            pipeline = _DeferredPipeline()
+            results = []
+            pipeline.process_item({}, spider).addCallback(results.append)
+            time.sleep(0.05)
+            pipeline.deferred.callback('item')
+            sample = profiler.get_samples()['_DeferredPipeline.process_item']
+
+        self.assertEqual(['item'], results)
+        self.assertEqual(1, sample['calls'])
+        self.assertGreaterEqual(sample['wall_seconds'], 0.05)
+        self.assertLess(sample['cpu_seconds'], 0.05)
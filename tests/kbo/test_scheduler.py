@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from scrapy.exceptions import NotSupported
+from twisted.internet import defer, task
+
+from kbo.constants import (
+    DOWNLOAD_SCHEDULER_WAKEUP_INTERVAL,
+    KST_TZINFO,
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_GAME
+)
+from kbo.scheduler import (
+    DownloadScheduler,
+    TransferLimiter,
+    get_download_priority,
+    parse_hours
+)
+
+
+class DownloadSchedulerTestCase(TestCase):
+
+    def setUp(self):
+        self.started_jobs = []
+        self.job_deferreds = {}
+
+        def defer_to_thread_pool(reactor, thread_pool, f, *args, **kwargs):
+            self.started_jobs.append(args[0])
+            self.job_deferreds[args[0]] = defer.Deferred()
+
+            return self.job_deferreds[args[0]]
+
+        patcher = patch('twisted.internet.threads.deferToThreadPool', defer_to_thread_pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_queued_jobs_by_priority(self):
+        scheduler = DownloadScheduler(task.Clock(), None, 1)
+        results = []
+
+        for priority, job_name in [(3, 'first'), (2, 'backfill'), (0, 'tonight'), (1, 'yesterday')]:
+            scheduler.submit(priority, False, None, job_name).addCallback(results.append)
+
+        for _ in range(4):
+            self.job_deferreds[self.started_jobs[-1]].callback(self.started_jobs[-1])
+
+        self.assertEqual(['first', 'tonight', 'yesterday', 'backfill'], self.started_jobs)
+        self.assertEqual(self.started_jobs, results)
+
+    def test_holds_backfill_jobs_outside_of_backfill_hours(self):
+        clock = task.Clock()
+        hour = datetime.datetime.now(KST_TZINFO).hour
+        scheduler = DownloadScheduler(clock, None, 2, backfill_hours=((hour + 2) % 24, (hour + 3) % 24))
+
+        scheduler.submit(0, True, None, 'backfill')
+        scheduler.submit(1, False, None, 'tonight')
+        clock.advance(DOWNLOAD_SCHEDULER_WAKEUP_INTERVAL)
+
+        self.assertEqual(['tonight'], self.started_jobs)
+        self.assertEqual(1, scheduler.get_num_pending())
+        self.assertEqual(1, len(clock.getDelayedCalls()))
+
+        scheduler.stop()
+
+        self.assertEqual([], clock.getDelayedCalls())
+
+
+class TransferLimiterTestCase(TestCase):
+
+    def test_throttles_transfers_over_max_bandwidth(self):
+        transfer_limiter = TransferLimiter(max_bandwidth=1000)
+
+        with patch('time.sleep') as sleep_mock:
+            transfer_limiter.throttle(1000)
+            transfer_limiter.throttle(500)
+
+        self.assertEqual(1, sleep_mock.call_count)
+        self.assertAlmostEqual(0.5, sleep_mock.call_args[0][0], places=2)
+
+    def test_limits_connections_per_host(self):
+        transfer_limiter = TransferLimiter(max_connections_per_host=1)
+        connected_urls = []
+
+        def connect(url):
+            with transfer_limiter.connection(url):
+                connected_urls.append(url)
+
+        with transfer_limiter.connection('https://a.example.com/1.ts'):
+            same_host_thread = threading.Thread(target=connect, args=('https://a.example.com/2.ts',))
+            other_host_thread = threading.Thread(target=connect, args=('https://b.example.com/1.ts',))
+            same_host_thread.start()
+            other_host_thread.start()
+            other_host_thread.join(1)
+            same_host_thread.join(0.1)
+
+            self.assertEqual(['https://b.example.com/1.ts'], connected_urls)
+
+        same_host_thread.join(1)
+
+        self.assertEqual(['https://b.example.com/1.ts', 'https://a.example.com/2.ts'], connected_urls)
+
+    def test_limits_connections_to_every_host_of_a_transfer(self):
+        transfer_limiter = TransferLimiter(max_connections_per_host=1)
+        connected_urls = []
+
+        def connect(*urls):
+            with transfer_limiter.connection(*urls):
+                connected_urls.append(urls)
+
+        with transfer_limiter.connection('https://b.example.com/audio.mp4'):
+            thread = threading.Thread(
+                target=connect,
+                args=('https://a.example.com/video.mp4', 'https://b.example.com/audio.mp4')
+            )
+            thread.start()
+            thread.join(0.1)
+
+            self.assertEqual([], connected_urls)
+
+        thread.join(1)
+
+        self.assertEqual(1, len(connected_urls))
+        self.assertEqual(['a.example.com', 'b.example.com'], sorted(transfer_limiter._host_semaphores))
+
+
+class SchedulerModuleTestCase(TestCase):
+
+    def test_prioritizes_newest_games_then_condensed_games(self):
+        items = [
+            {'clip_id': 1, 'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME, 'year': 2020, 'month': 5, 'day': 15},
+            {'clip_id': 2, 'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME, 'year': 2020, 'month': 5, 'day': 16},
+            {'clip_id': 3, 'clip_type': NAVER_TV_CLIP_TYPE_CONDENSED_GAME, 'year': 2020, 'month': 5, 'day': 15},
+            {'clip_id': 4, 'clip_type': NAVER_TV_CLIP_TYPE_CONDENSED_GAME, 'year': 2020, 'month': 5, 'day': 16}
+        ]
+
+        clip_ids = [item['clip_id'] for item in sorted(items, key=get_download_priority)]
+
+        self.assertEqual([4, 2, 3, 1], clip_ids)
+
+    def test_parses_hours(self):
+        self.assertEqual((22, 6), parse_hours('22-6'))
+        self.assertIsNone(parse_hours(None))
+
+        with self.assertRaises(NotSupported):
+            parse_hours('22:00-06:00')
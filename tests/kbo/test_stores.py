@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import datetime
+import os
+import tempfile
+from unittest import TestCase
+
+from kbo.constants import (
+    KST_TZINFO,
+    NAVER_TV_CLIP_TYPE_CONDENSED_GAME,
+    NAVER_TV_CLIP_TYPE_FULL_GAME
+)
+from kbo.items import NaverTvClip
+from kbo.stores import ClipMetadataStore, FullGameStore
+
+
+class FullGameStoreTestCase(TestCase):
+
+    def test_appends_full_games_once_per_clip_id(self):
+        item = NaverTvClip(
+            clip_id='13820293',
+            clip_type=NAVER_TV_CLIP_TYPE_FULL_GAME,
+            url='https://tv.naver.com/v/13820293',
+            length=15813,
+            channel_path='/wyvernsvod',
+            home_team_name='SK Wyverns',
+            away_team_name='NC Dinos',
+            year=2020,
+            month=5,
+            day=16
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            file_path = os.path.join(tmp_dir_path, 'full_games.db')
+            first_store = FullGameStore(file_path)
+            first_added = first_store.add(item)
+            second_added = first_store.add(item)
+            first_store.close()
+
+            second_store = FullGameStore(file_path)
+            rows = second_store.get_by_date_range(
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 5, 16, tzinfo=KST_TZINFO)
+            )
+            second_store.close()
+
+        self.assertTrue(first_added)
+        self.assertFalse(second_added)
+        self.assertEqual([dict(item)], rows)
+
+    def test_gets_full_games_by_date_range(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            store = FullGameStore(os.path.join(tmp_dir_path, 'full_games.db'))
+            store.add_many([
+                {'clip_id': day, 'home_team_name': 'KT Wiz', 'away_team_name': 'LG Twins', 'year': 2020, 'month': 5, 'day': day}
+                for day in range(10, 20)
+            ])
+
+            rows = store.get_by_date_range(
+                datetime.datetime(2020, 5, 13, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 5, 15, tzinfo=KST_TZINFO)
+            )
+            store.close()
+
+        self.assertEqual(['13', '14', '15'], [row['clip_id'] for row in rows])
+        self.assertEqual([13, 14, 15], [row['day'] for row in rows])
+
+    def test_imports_full_games_from_csv_feed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            csv_file_path = os.path.join(tmp_dir_path, 'full_game_feed.csv')
+
+            with open(csv_file_path, 'w') as csv_file:
+                csv_writer = csv.DictWriter(
+                    csv_file,
+                    ['clip_id', 'clip_type', 'length', 'home_team_name', 'away_team_name', 'year', 'month', 'day']
+                )
+                csv_writer.writeheader()
+                csv_writer.writerows([
+                    {'clip_id': 1, 'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME, 'length': 15813, 'home_team_name': 'SK Wyverns', 'away_team_name': 'NC Dinos', 'year': 2020, 'month': 5, 'day': 16},
+                    {'clip_id': 2, 'clip_type': NAVER_TV_CLIP_TYPE_FULL_GAME, 'length': '', 'home_team_name': 'KT Wiz', 'away_team_name': 'LG Twins', 'year': '', 'month': '', 'day': ''},
+                    {'clip_id': 3, 'clip_type': NAVER_TV_CLIP_TYPE_CONDENSED_GAME, 'length': 620, 'home_team_name': 'KT Wiz', 'away_team_name': 'LG Twins', 'year': 2020, 'month': 5, 'day': 16}
+                ])
+
+            store = FullGameStore(os.path.join(tmp_dir_path, 'full_games.db'))
+            first_num_imported = store.import_csv(csv_file_path)
+            second_num_imported = store.import_csv(csv_file_path)
+            rows = store.get_by_date_range(
+                datetime.datetime(2020, 1, 1, tzinfo=KST_TZINFO),
+                datetime.datetime(2020, 12, 31, tzinfo=KST_TZINFO)
+            )
+            store.close()
+
+        self.assertEqual(1, first_num_imported)
+        self.assertEqual(0, second_num_imported)
+        self.assertEqual(['1'], [row['clip_id'] for row in rows])
+        self.assertEqual(15813, rows[0]['length'])
+
+
+class ClipMetadataStoreTestCase(TestCase):
+
+    def test_persists_clip_metadata_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            file_path = os.path.join(tmp_dir_path, 'clip_metadata.db')
+            first_store = ClipMetadataStore(file_path)
+            first_store.add(13820293, 2020, 5, 16, length=15813, channel_path='/wyvernsvod')
+            first_store.close()
+
+            second_store = ClipMetadataStore(file_path)
+            clip_metadata = second_store.get(13820293)
+            missing_clip_metadata = second_store.get(13875922)
+            second_store.close()
+
+        self.assertEqual(
+            {
+                'clip_id': '13820293',
+                'length': 15813,
+                'channel_path': '/wyvernsvod',
+                'year': 2020,
+                'month': 5,
+                'day': 16
+            },
+            clip_metadata
+        )
+        self.assertIsNone(missing_clip_metadata)